@@ -28,7 +28,7 @@ import torch
 
 from songo_game import SongoGame
 from network_v3 import SongoNetV3, NetworkV3Config
-from self_play_v3 import MctsNode, SelfPlayEngine, MctsConfig
+from self_play_v3 import ROOT, SelfPlayEngine, MctsConfig
 
 
 @dataclass
@@ -46,6 +46,16 @@ class ArenaConfig:
     # 40-game match (one per starting side) — Wilson CI becomes meaningless.
     temperature_plies: int = 6
     rng_seed: int = 2026
+    # Carry each engine's subtree over its own move and the opponent's reply.
+    reuse_tree: bool = True
+    # Per-engine network evaluation cache, kept across the match (0 = off).
+    eval_cache_entries: int = 0
+    # "puct" (argmax visits) or "gumbel" (sequential halving; Gumbel noise
+    # only during the first `temperature_plies` plies).
+    root_search: str = "puct"
+    # Play forced moves without searching, and stop once the argmax move
+    # is settled (deterministic plies only).
+    early_stop: bool = True
 
 
 @dataclass
@@ -93,6 +103,10 @@ class ArenaEngine:
         c_puct: float,
         temperature_plies: int = 0,
         rng: np.random.Generator | None = None,
+        reuse_tree: bool = True,
+        eval_cache_entries: int = 0,
+        root_search: str = "puct",
+        early_stop: bool = True,
     ):
         self.model = model.eval()
         self.device = device
@@ -110,26 +124,72 @@ class ArenaEngine:
                 temperature_start=0.0,
                 temperature_end=0.0,
                 temperature_threshold=0,
+                reuse_tree=reuse_tree,
+                eval_cache_entries=eval_cache_entries,
+                root_search=root_search,
+                early_stop=early_stop,
             )
         )
+        # Position at the tree root after our last move (None = no tree kept).
+        self._root_game: SongoGame | None = None
+
+    def _sync_tree(self, game: SongoGame):
+        """Re-root the kept tree on the opponent's reply, or reset it."""
+        tree = self.engine.tree
+        prev, self._root_game = self._root_game, None
+        if prev is not None and tree.first_child[ROOT] >= 0:
+            target = game.packed_key()
+            mover_start = 0 if prev.current_player == 0 else 7
+            for rel in np.flatnonzero(tree.legal[ROOT]):
+                record = prev.execute_move_undoable(mover_start + int(rel))
+                found = prev.packed_key() == target
+                prev.undo_move(record)
+                if found:
+                    tree.reroot(tree.child(ROOT, int(rel)))
+                    return
+        tree.reset()
 
     def choose_move(self, game: SongoGame, ply: int = 0) -> int:
         """Return the relative pit index (0..6) to play."""
-        root = MctsNode()
-        self.engine._expand(root, game)
-        if root.terminal_value is not None or root.legal_mask is None:
+        tree = self.engine.tree
+        self._sync_tree(game)
+        if not tree.is_expanded(ROOT):
+            self.engine._expand(tree, ROOT, game)
+        if tree.is_terminal(ROOT):
             mask = self.engine._legal_mask(game)
             legal = [i for i in range(7) if mask[i]]
             return legal[0] if legal else 0
-        for _ in range(self.sims):
-            self.engine._simulate(root, game)
-        visits = np.zeros(7, dtype=np.float32)
-        for rel, child in root.children.items():
-            visits[rel] = child.visits
-        if ply < self.temperature_plies and visits.sum() > 0:
-            probs = visits / visits.sum()
-            return int(self.rng.choice(7, p=probs))
-        return int(visits.argmax())
+        engine = self.engine
+        gumbel = engine.cfg.root_search == "gumbel"
+        if gumbel:
+            engine.stats["sims"] += self.sims
+            sims = self.sims
+        else:
+            sims = engine._search_budget(tree, self.sims)
+        if engine.cfg.early_stop and tree.legal[ROOT].sum() == 1:
+            # Forced move: no search
+            engine._skip_sims(sims)
+            rel = int(np.flatnonzero(tree.legal[ROOT])[0])
+        elif gumbel:
+            rel, _ = engine._search(tree, game, sims, self.rng,
+                                    noise=ply < self.temperature_plies)
+        else:
+            # Past the stochastic opening only the argmax matters
+            stop_early = engine.cfg.early_stop and ply >= self.temperature_plies
+            for want, _ in engine._puct_steps(tree, sims, stop_early):
+                for _ in range(want):
+                    engine._simulate(tree, game)
+            visits = tree.child_visits(ROOT).astype(np.float32)
+            if ply < self.temperature_plies and visits.sum() > 0:
+                probs = visits / visits.sum()
+                rel = int(self.rng.choice(7, p=probs))
+            else:
+                rel = int(visits.argmax())
+        if self.engine.cfg.reuse_tree:
+            self._root_game = game.clone()
+            self._root_game.execute_move((0 if game.current_player == 0 else 7) + rel)
+        self.engine._advance(tree, rel)
+        return rel
 
 
 def play_one_game(
@@ -171,9 +231,17 @@ def pit(
     """Run `cfg.num_games` between A and B, alternating starting side."""
     rng = np.random.default_rng(cfg.rng_seed)
     engine_a = ArenaEngine(model_a, device, cfg.num_simulations, cfg.c_puct,
-                           temperature_plies=cfg.temperature_plies, rng=rng)
+                           temperature_plies=cfg.temperature_plies, rng=rng,
+                           reuse_tree=cfg.reuse_tree,
+                           eval_cache_entries=cfg.eval_cache_entries,
+                           root_search=cfg.root_search,
+                           early_stop=cfg.early_stop)
     engine_b = ArenaEngine(model_b, device, cfg.num_simulations, cfg.c_puct,
-                           temperature_plies=cfg.temperature_plies, rng=rng)
+                           temperature_plies=cfg.temperature_plies, rng=rng,
+                           reuse_tree=cfg.reuse_tree,
+                           eval_cache_entries=cfg.eval_cache_entries,
+                           root_search=cfg.root_search,
+                           early_stop=cfg.early_stop)
 
     wins_a = 0
     wins_b = 0
@@ -216,6 +284,19 @@ def pit(
         print(f"[arena] A={wins_a} B={wins_b} D={draws} over {n} games, "
               f"A rate={a_rate:.3f} (95% CI [{lo:.3f}, {hi:.3f}]), "
               f"promote={promote}")
+        stats = [e.engine.stats for e in (engine_a, engine_b)]
+        run = sum(st["sims"] for st in stats)
+        reused = sum(st["sims_reused"] for st in stats)
+        saved = sum(st["sims_saved"] for st in stats)
+        print(f"[arena] sims run/reused = {run}/{reused} "
+              f"({reused / max(run + reused, 1):.1%} reused), "
+              f"saved by early stop {saved / max(n, 1):.0f}/game")
+        caches = [e.engine.eval_cache for e in (engine_a, engine_b)
+                  if e.engine.eval_cache is not None]
+        if caches:
+            hits = sum(c.hits for c in caches)
+            misses = sum(c.misses for c in caches)
+            print(f"[arena] eval cache {hits} hits / {misses} misses")
     return result
 
 
@@ -244,6 +325,7 @@ def main():
     p.add_argument("--c-puct", type=float, default=1.5)
     p.add_argument("--win-threshold", type=float, default=0.55)
     p.add_argument("--alpha", type=float, default=0.05)
+    p.add_argument("--root-search", choices=("puct", "gumbel"), default="puct")
     p.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
     args = p.parse_args()
 
@@ -257,6 +339,7 @@ def main():
         c_puct=args.c_puct,
         win_threshold=args.win_threshold,
         alpha=args.alpha,
+        root_search=args.root_search,
     )
     result = pit(model_a, model_b, args.device, cfg)
     print()
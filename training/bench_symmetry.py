@@ -0,0 +1,127 @@
+"""
+Symmetry-ensembling benchmark for the v2 MCTS — strength against search speed.
+
+For every `MCTSConfig.symmetry` mode:
+
+    speed    : simulations/sec and network states evaluated per simulation,
+               searching a fixed set of positions reached by random play
+    strength : score (wins + draws/2) of the mode against the "all" mode
+               with the same network, over `--games` games with alternating
+               sides
+
+    none   : one orientation everywhere (1× compute)
+    root   : original + mirror averaged at the root only
+    random : one random orientation per evaluation (1× compute)
+    all    : original + mirror averaged at every evaluation (2× compute)
+
+Usage:
+    python bench_symmetry.py --checkpoint checkpoints/best_model.pt --sims 200 --games 40
+    python bench_symmetry.py --modes none random --json symmetry_report.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import time
+
+import numpy as np
+import torch
+
+from config import MCTSConfig, NetworkConfig
+from mcts import MCTS, SYMMETRY_MODES
+from neural_network import create_network
+from pit_evaluation import play_pit_game
+from songo_game import SongoGame
+
+
+def sample_positions(count: int, seed: int, max_plies: int = 40) -> list[SongoGame]:
+    """`count` non-terminal positions after 0..max_plies random moves."""
+    rng = np.random.default_rng(seed)
+    positions = []
+    while len(positions) < count:
+        game = SongoGame()
+        for _ in range(int(rng.integers(0, max_plies + 1))):
+            valid = game.get_valid_moves()
+            if game.is_terminal or len(valid) == 0:
+                break
+            game.execute_move(int(rng.choice(valid)))
+        if not game.is_terminal and len(game.get_valid_moves()) > 0:
+            positions.append(game)
+    return positions
+
+
+def measure_speed(model, mode: str, sims: int, positions: list[SongoGame],
+                  device: str) -> dict:
+    """Search every position once; count the states sent through the net."""
+    engine = MCTS(model, MCTSConfig(num_simulations=sims, symmetry=mode),
+                  device=device, batch_size=16)
+    evaluated = [0]
+    hook = model.register_forward_hook(lambda m, inp, out: evaluated.__setitem__(
+        0, evaluated[0] + len(inp[0])))
+    try:
+        t0 = time.perf_counter()
+        for game in positions:
+            engine.search(game, add_noise=False)
+        elapsed = time.perf_counter() - t0
+    finally:
+        hook.remove()
+    total = sims * len(positions)
+    return {"sims_per_sec": total / elapsed, "states_per_sim": evaluated[0] / total,
+            "seconds": elapsed}
+
+
+def measure_strength(model, mode: str, sims: int, games: int, device: str) -> float:
+    """Score of `mode` against the "all" mode, alternating sides."""
+    ours = MCTS(model, MCTSConfig(num_simulations=sims, symmetry=mode),
+                device=device, batch_size=16)
+    ref = MCTS(model, MCTSConfig(num_simulations=sims, symmetry="all"),
+               device=device, batch_size=16)
+    score = 0.0
+    for g in range(games):
+        ours_first = g % 2 == 0
+        winner = play_pit_game(ours, ref) if ours_first else play_pit_game(ref, ours)
+        if winner == -1 or winner is None:
+            score += 0.5
+        elif winner == (0 if ours_first else 1):
+            score += 1.0
+    return score / max(games, 1)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--checkpoint", default=None, help="v2 checkpoint (random-init net if omitted)")
+    p.add_argument("--modes", nargs="+", choices=SYMMETRY_MODES, default=list(SYMMETRY_MODES))
+    p.add_argument("--sims", type=int, default=200)
+    p.add_argument("--positions", type=int, default=16, help="positions searched for speed")
+    p.add_argument("--games", type=int, default=20, help="games per mode against 'all' (0 = skip)")
+    p.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json", default=None, help="write the report to this file")
+    args = p.parse_args()
+
+    torch.manual_seed(args.seed)
+    np.random.seed(args.seed)
+    model = create_network(NetworkConfig(), device=args.device)
+    if args.checkpoint:
+        ckpt = torch.load(args.checkpoint, map_location=args.device, weights_only=False)
+        model.load_state_dict(ckpt["model_state_dict"])
+    model.eval()
+    positions = sample_positions(args.positions, args.seed)
+
+    report = {}
+    print(f"{'mode':<8} {'sims/s':>9} {'states/sim':>11} {'score vs all':>13}")
+    for mode in args.modes:
+        row = measure_speed(model, mode, args.sims, positions, args.device)
+        if args.games > 0 and mode != "all":
+            row["score_vs_all"] = measure_strength(model, mode, args.sims,
+                                                   args.games, args.device)
+        report[mode] = row
+        score = f"{row['score_vs_all']:.3f}" if "score_vs_all" in row else "-"
+        print(f"{mode:<8} {row['sims_per_sec']:>9.0f} {row['states_per_sim']:>11.2f} {score:>13}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"sims": args.sims, "positions": args.positions,
+                       "games": args.games, "modes": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 AlphaZero for Songo — Configuration & Hyperparameters
 """
 from dataclasses import dataclass, field
+from typing import Optional
 
 
 @dataclass
@@ -34,6 +35,11 @@ class MCTSConfig:
     temperature_start: float = 0.9  # Augmenté 0.8→0.9 : diversifier les parties self-play sans revenir au chaos 1.0
     temperature_end: float = 0.1   # Inchangé : déterministe en fin de partie
     temperature_threshold: int = 15  # Move number to switch from start to end temp
+    virtual_loss: float = 1.0  # Q penalty on pending selections within a leaf batch
+    symmetry: str = "all"  # Mirror ensembling: "none", "root" (root only), "random" (one orientation per eval), "all"
+    transposition_entries: int = 0  # Positions in the MCTS transposition table (0 = off)
+    eval_cache_entries: int = 0  # Network evaluations cached across searches (0 = off)
+    egtb_dir: Optional[str] = None  # Uncompressed egtb-n*.bin layers probed at leaves (None = off)
 
 
 @dataclass
@@ -61,6 +67,7 @@ class TrainingConfig:
 
     # Parallelism
     num_workers: int = 0  # Self-play workers (0 = auto-detect CPU cores)
+    inference_server: bool = False  # Workers share one batched model process on `device`
 
     # MCTS batching (v2)
     mcts_batch_size: int = 16  # Leaves evaluated per batched inference call
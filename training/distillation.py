@@ -31,7 +31,7 @@ import numpy as np
 import torch
 from torch.utils.data import Dataset
 
-from encoding_v3 import StateView, encode
+from encoding_v3 import encode_arrays
 
 
 @dataclass
@@ -43,20 +43,10 @@ class EgtbSample:
     move_mask: np.ndarray  # (7,) bool — legal moves (cp-relative)
 
 
-def _parse_line(line: str) -> EgtbSample:
+def _parse_fields(line: str) -> dict:
+    """Raw fields of one JSONL sample (everything but the encoded state)."""
     obj = json.loads(line)
-    board = np.asarray(obj["board"], dtype=np.int16)
-    scores = tuple(int(s) for s in obj["scores"])
     cp = int(obj["cp"])
-    sm = bool(obj["sm"])
-    sb_raw = obj["sb"]
-    sb = None if sb_raw is None else int(sb_raw)
-    view = StateView(board=board, scores=scores, current_player=cp,
-                     solidarity_mode=sm, solidarity_beneficiary=sb)
-    x = encode(view)
-    policy = np.asarray(obj["policy"], dtype=np.float32)
-    value = float(obj["value"])
-    wdl_class = int(obj["wdl_class"])
     # Build relative legal-move mask
     move_mask = np.zeros(7, dtype=bool)
     mover_start = 0 if cp == 0 else 7
@@ -64,8 +54,32 @@ def _parse_line(line: str) -> EgtbSample:
         rel = int(abs_pit) - mover_start
         if 0 <= rel < 7:
             move_mask[rel] = True
-    return EgtbSample(x=x, policy=policy, value=value,
-                      wdl_class=wdl_class, move_mask=move_mask)
+    return {
+        "board": obj["board"],
+        "scores": obj["scores"],
+        "cp": cp,
+        "sm": bool(obj["sm"]),
+        "policy": np.asarray(obj["policy"], dtype=np.float32),
+        "value": float(obj["value"]),
+        "wdl_class": int(obj["wdl_class"]),
+        "move_mask": move_mask,
+    }
+
+
+def _encode_fields(fields: list[dict]) -> np.ndarray:
+    """Encode many parsed samples in one vectorized call → (N, 16, 2, 7)."""
+    return encode_arrays(
+        np.array([f["board"] for f in fields], dtype=np.int16),
+        np.array([f["scores"] for f in fields], dtype=np.int64),
+        np.array([f["cp"] for f in fields], dtype=np.int64),
+        np.array([f["sm"] for f in fields], dtype=bool),
+    )
+
+
+def _parse_line(line: str) -> EgtbSample:
+    f = _parse_fields(line)
+    return EgtbSample(x=_encode_fields([f])[0], policy=f["policy"], value=f["value"],
+                      wdl_class=f["wdl_class"], move_mask=f["move_mask"])
 
 
 def iter_samples(jsonl_path: str | Path) -> Iterator[EgtbSample]:
@@ -87,19 +101,14 @@ def load_all(jsonl_path: str | Path) -> dict[str, np.ndarray]:
         "wdl_class" (N,)          int64
         "move_mask" (N, 7)        bool
     """
-    xs, policies, values, wdls, masks = [], [], [], [], []
-    for s in iter_samples(jsonl_path):
-        xs.append(s.x)
-        policies.append(s.policy)
-        values.append(s.value)
-        wdls.append(s.wdl_class)
-        masks.append(s.move_mask)
+    with Path(jsonl_path).open("r", encoding="utf-8") as f:
+        fields = [_parse_fields(line) for line in (l.strip() for l in f) if line]
     return {
-        "x": np.stack(xs, axis=0),
-        "policy": np.stack(policies, axis=0),
-        "value": np.asarray(values, dtype=np.float32),
-        "wdl_class": np.asarray(wdls, dtype=np.int64),
-        "move_mask": np.stack(masks, axis=0),
+        "x": _encode_fields(fields),
+        "policy": np.stack([f["policy"] for f in fields], axis=0),
+        "value": np.asarray([f["value"] for f in fields], dtype=np.float32),
+        "wdl_class": np.asarray([f["wdl_class"] for f in fields], dtype=np.int64),
+        "move_mask": np.stack([f["move_mask"] for f in fields], axis=0),
     }
 
 
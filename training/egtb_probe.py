@@ -0,0 +1,199 @@
+"""
+Endgame tablebase probing for MCTS leaves.
+
+`engine-rs` (`egtb_gen`) solves every position with at most N seeds left
+on the board and writes one `egtb-n{n}.bin` layer per seed count:
+
+    magic 8B     "AKGTB01\n"
+    n u8         seeds in play
+    flags u8     bit 0 = zstd-compressed payload
+    reserved 6B
+    count u64 LE payload length in bytes
+    payload      one WDL byte per ranked position:
+                 0 = unset, 1 = win, 2 = loss, 3 = draw (for the player to move)
+
+`EgtbProbe` memory-maps the uncompressed layers of a directory (compressed
+ones are decompressed into memory, which needs the optional `zstandard`
+package; `egtb_gen --no-compress` avoids both) and answers the exact value
+of any position it covers. The ranking is a vectorized port of
+`egtb/rank.rs`:
+
+    board rank    : lex rank of the 14-pit composition of N, in [0, C(N+13, 13))
+    position rank : ((board_rank * (71 - N) + score_p1) * 2 + player) * 3 + solidarity
+
+where solidarity is 0 (inactive), 1 (beneficiary P1) or 2 (beneficiary P2).
+Positions the solver left unset probe as unknown.
+
+Usage:
+    egtb = EgtbProbe("egtb-data/")          # loads every egtb-n*.bin
+    v = egtb.probe(game)                     # +1 / -1 / 0, or None
+"""
+from __future__ import annotations
+import re
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from songo_game import SongoGame
+
+MAGIC = b"AKGTB01\n"
+HEADER_LEN = 24
+TOTAL_SEEDS = 70
+NUM_PITS = 14
+
+# WDL byte -> value for the player to move (NaN = unset)
+_WDL_VALUE = np.array([np.nan, 1.0, -1.0, 0.0])
+
+
+def _binomials(max_n: int = 84, max_k: int = 14) -> np.ndarray:
+    """Pascal table C[n, k] (int64), 0 where k > n."""
+    table = np.zeros((max_n + 1, max_k + 1), dtype=np.int64)
+    table[:, 0] = 1
+    for n in range(1, max_n + 1):
+        table[n, 1:] = table[n - 1, :-1] + table[n - 1, 1:]
+    return table
+
+
+_C = _binomials()
+_C_ROWS = _C.tolist()
+
+
+def board_count(n: int) -> int:
+    """Compositions of `n` seeds into 14 pits: C(n + 13, 13)."""
+    return int(_C[n + 13, 13])
+
+
+def position_count(n: int) -> int:
+    """Positions of layer `n`: boards × scores × player × solidarity."""
+    return board_count(n) * (TOTAL_SEEDS + 1 - n) * 2 * 3
+
+
+def rank_boards(boards: np.ndarray) -> np.ndarray:
+    """Lex rank of each (B, 14) board among the compositions of its own
+    seed count, as `rank_board` in rank.rs."""
+    boards = np.asarray(boards, dtype=np.int64).reshape(-1, NUM_PITS)
+    remaining = boards.sum(axis=1)
+    rank = np.zeros(len(boards), dtype=np.int64)
+    for i in range(NUM_PITS - 1):
+        parts = NUM_PITS - 1 - i
+        # sum_{k < b} C(rem - k + parts - 1, parts - 1)
+        #   = C(rem + parts, parts) - C(rem - b + parts, parts)   (hockey stick)
+        after = remaining - boards[:, i]
+        rank += _C[remaining + parts, parts] - _C[after + parts, parts]
+        remaining = after
+    return rank
+
+
+def rank_positions(boards: np.ndarray, scores: np.ndarray, cp: np.ndarray,
+                   sm: np.ndarray, sb: np.ndarray) -> np.ndarray:
+    """Rank of each position within its layer, as `rank_position` in
+    rank.rs. `sb` is the solidarity beneficiary (0 | 1, or -1 for none);
+    solidarity without a beneficiary ranks as inactive."""
+    boards = np.asarray(boards, dtype=np.int64).reshape(-1, NUM_PITS)
+    n = boards.sum(axis=1)
+    s1 = np.asarray(scores, dtype=np.int64).reshape(-1, 2)[:, 0]
+    sb = np.asarray(sb, dtype=np.int64)
+    sol = np.where(np.asarray(sm, dtype=bool) & (sb >= 0), sb + 1, 0)
+    br = rank_boards(boards)
+    return ((br * (TOTAL_SEEDS + 1 - n) + s1) * 2 + np.asarray(cp, dtype=np.int64)) * 3 + sol
+
+
+def read_layer(path: str | Path) -> tuple[int, np.ndarray]:
+    """(n, payload) of one layer file; the payload is a read-only memmap
+    unless the file is compressed."""
+    path = Path(path)
+    with open(path, "rb") as f:
+        header = f.read(HEADER_LEN)
+        if len(header) < HEADER_LEN or header[:8] != MAGIC:
+            raise ValueError(f"{path}: not an AKGTB01 layer (bad magic {header[:8]!r})")
+        n, flags = header[8], header[9]
+        count = int.from_bytes(header[16:24], "little")
+        if flags & 1:
+            try:
+                import zstandard
+            except ImportError as e:
+                raise RuntimeError(
+                    f"{path} is zstd-compressed and the `zstandard` package is not "
+                    f"installed; install it or regenerate with `egtb_gen --no-compress`"
+                ) from e
+            raw = zstandard.ZstdDecompressor().decompress(
+                f.read(count), max_output_size=position_count(n))
+            payload = np.frombuffer(raw, dtype=np.uint8)
+        else:
+            payload = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER_LEN, shape=(count,))
+    if len(payload) != position_count(n):
+        raise ValueError(f"{path}: layer n={n} holds {len(payload)} positions, "
+                         f"expected {position_count(n)}")
+    return n, payload
+
+
+class EgtbProbe:
+    """Exact WDL values of the positions covered by a directory of layers."""
+
+    def __init__(self, directory: str | Path, max_n: Optional[int] = None):
+        self.directory = Path(directory)
+        self.layers: dict[int, np.ndarray] = {}
+        for path in sorted(self.directory.glob("egtb-n*.bin")):
+            m = re.fullmatch(r"egtb-n(\d+)\.bin", path.name)
+            if m is None or (max_n is not None and int(m.group(1)) > max_n):
+                continue
+            n, payload = read_layer(path)
+            self.layers[n] = payload
+        if not self.layers:
+            raise FileNotFoundError(f"no egtb-n*.bin layers in {self.directory}")
+        # Positions with more seeds in play are never looked up
+        self.max_n = max(self.layers)
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, n: int) -> bool:
+        return n in self.layers
+
+    def probe_arrays(self, boards: np.ndarray, scores: np.ndarray, cp: np.ndarray,
+                     sm: np.ndarray, sb: np.ndarray) -> np.ndarray:
+        """Values (B,) for the player to move: +1 win, -1 loss, 0 draw, NaN
+        where the position is not in a loaded layer or was left unset.
+        Arguments as `rank_positions`."""
+        boards = np.asarray(boards, dtype=np.int64).reshape(-1, NUM_PITS)
+        n = boards.sum(axis=1)
+        idx = rank_positions(boards, scores, cp, sm, sb)
+        out = np.full(len(boards), np.nan)
+        for layer_n in np.unique(n[n <= self.max_n]).tolist():
+            payload = self.layers.get(layer_n)
+            if payload is not None:
+                sel = n == layer_n
+                out[sel] = _WDL_VALUE[payload[idx[sel]]]
+                found = int(np.count_nonzero(~np.isnan(out[sel])))
+                self.hits += found
+                self.misses += int(sel.sum()) - found
+        return out
+
+    def probe(self, game: SongoGame) -> Optional[float]:
+        """Exact value of `game` for the player to move, or None."""
+        n = game.side_seeds(0) + game.side_seeds(1)
+        payload = self.layers.get(n)
+        if payload is None or game.is_terminal:
+            return None
+        # Scalar `rank_positions`: cheaper than numpy on a single position
+        rank, remaining = 0, n
+        board = game.board.tolist()
+        for i in range(NUM_PITS - 1):
+            parts = NUM_PITS - 1 - i
+            after = remaining - board[i]
+            rank += _C_ROWS[remaining + parts][parts] - _C_ROWS[after + parts][parts]
+            remaining = after
+        sb = game.solidarity_beneficiary
+        sol = sb + 1 if game.solidarity_mode and sb is not None else 0
+        idx = ((rank * (TOTAL_SEEDS + 1 - n) + int(game.scores[0])) * 2
+               + game.current_player) * 3 + sol
+        code = int(payload[idx])
+        if code == 0:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return float(_WDL_VALUE[code])
+
+    def stats(self) -> dict:
+        return {"egtb_layers": sorted(self.layers), "egtb_hits": self.hits,
+                "egtb_misses": self.misses}
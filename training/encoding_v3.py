@@ -146,7 +146,106 @@ def encode(view: StateView) -> np.ndarray:
 
 def encode_batch(views: list[StateView]) -> np.ndarray:
     """Batch version: returns (B, 16, 2, 7) float32."""
-    return np.stack([encode(v) for v in views], axis=0)
+    if not views:
+        return np.zeros((0, CHANNELS, HEIGHT, WIDTH), dtype=np.float32)
+    return encode_arrays(
+        np.stack([np.asarray(v.board) for v in views]),
+        np.array([v.scores for v in views]),
+        np.array([v.current_player for v in views]),
+        np.array([v.solidarity_mode for v in views]),
+    )
+
+
+def encode_arrays(boards: np.ndarray, scores: np.ndarray,
+                  cp: np.ndarray, sm: np.ndarray) -> np.ndarray:
+    """
+    Vectorized `encode` straight from raw arrays (no StateView per row):
+        boards (N, 14), scores (N, 2), cp (N,), sm (N,)  →  (N, 16, 2, 7) float32
+    The solidarity beneficiary does not enter the encoding.
+    """
+    boards = np.asarray(boards, dtype=np.int64).reshape(-1, 14)
+    scores = np.asarray(scores, dtype=np.int64).reshape(-1, 2)
+    cp = np.asarray(cp, dtype=np.int64).reshape(-1)
+    sm = np.asarray(sm, dtype=bool).reshape(-1)
+    n = boards.shape[0]
+
+    # (N, 2, 7) from the mover's perspective: row 0 = mine, row 1 = opponent
+    halves = boards.reshape(-1, HEIGHT, WIDTH)
+    rows = np.where((cp == 1)[:, None, None], halves[:, ::-1], halves)
+    my_score = np.where(cp == 0, scores[:, 0], scores[:, 1])
+    opp_score = np.where(cp == 0, scores[:, 1], scores[:, 0])
+    side = np.arange(HEIGHT)[None, :, None]              # 0 = my row, 1 = opp row
+    vulnerable = (rows >= 2) & (rows <= 4)
+    grenier = rows >= 14
+
+    # Computed in float64 like the per-view encoder, rounded once at the end.
+    out = np.empty((n, CHANNELS, HEIGHT, WIDTH), dtype=np.float64)
+    out[:, 0] = np.clip(rows, 0, 60) / 15.0
+    out[:, 1] = side == 0
+    out[:, 2] = side == 1
+    out[:, 3] = rows == 5
+    out[:, 4] = vulnerable & (side == 0)
+    out[:, 5] = vulnerable & (side == 1)
+    out[:, 6] = grenier & (side == 0)
+    out[:, 7] = grenier & (side == 1)
+    out[:, 8] = rows == 0
+    out[:, 9] = (rows[:, 1].sum(axis=1) == 0)[:, None, None]
+    out[:, 10] = sm[:, None, None]
+    out[:, 11] = (my_score / 36.0)[:, None, None]
+    out[:, 12] = (opp_score / 36.0)[:, None, None]
+    out[:, 13] = ((my_score - opp_score) / 36.0)[:, None, None]
+    out[:, 14] = (boards.sum(axis=1) / 70.0)[:, None, None]
+    out[:, 15] = 1.0
+    return out.astype(np.float32)
+
+
+def encode_arrays_torch(boards, scores, cp, sm, device=None):
+    """
+    Same as `encode_arrays`, computed with torch on `device` (e.g. the model's
+    device), so a leaf batch goes from raw arrays to network input without a
+    host-side float tensor. Inputs may be numpy arrays or torch tensors.
+    Returns a (N, 16, 2, 7) float32 torch.Tensor.
+    """
+    import torch
+
+    def as_tensor(a, dtype):
+        return torch.as_tensor(np.asarray(a) if not torch.is_tensor(a) else a,
+                               device=device).to(dtype)
+
+    boards = as_tensor(boards, torch.int64).reshape(-1, 14)
+    scores = as_tensor(scores, torch.int64).reshape(-1, 2)
+    cp = as_tensor(cp, torch.int64).reshape(-1)
+    sm = as_tensor(sm, torch.bool).reshape(-1)
+    n = boards.shape[0]
+
+    halves = boards.reshape(-1, HEIGHT, WIDTH)
+    rows = torch.where((cp == 1)[:, None, None], halves.flip(1), halves)
+    my_score = torch.where(cp == 0, scores[:, 0], scores[:, 1]).double()
+    opp_score = torch.where(cp == 0, scores[:, 1], scores[:, 0]).double()
+    side = torch.arange(HEIGHT, device=boards.device)[None, :, None]
+    vulnerable = (rows >= 2) & (rows <= 4)
+    grenier = rows >= 14
+    full = (n, HEIGHT, WIDTH)
+
+    out = torch.empty((n, CHANNELS, HEIGHT, WIDTH), dtype=torch.float64,
+                      device=boards.device)
+    out[:, 0] = rows.clamp(0, 60).double() / 15.0
+    out[:, 1] = (side == 0).expand(full)
+    out[:, 2] = (side == 1).expand(full)
+    out[:, 3] = rows == 5
+    out[:, 4] = vulnerable & (side == 0)
+    out[:, 5] = vulnerable & (side == 1)
+    out[:, 6] = grenier & (side == 0)
+    out[:, 7] = grenier & (side == 1)
+    out[:, 8] = rows == 0
+    out[:, 9] = (rows[:, 1].sum(dim=1) == 0)[:, None, None].expand(full)
+    out[:, 10] = sm[:, None, None].expand(full)
+    out[:, 11] = (my_score / 36.0)[:, None, None]
+    out[:, 12] = (opp_score / 36.0)[:, None, None]
+    out[:, 13] = ((my_score - opp_score) / 36.0)[:, None, None]
+    out[:, 14] = (boards.sum(dim=1).double() / 70.0)[:, None, None]
+    out[:, 15] = 1.0
+    return out.float()
 
 
 def mirror(encoded: np.ndarray) -> np.ndarray:
@@ -0,0 +1,77 @@
+"""
+Bounded LRU cache of network evaluations.
+
+Self-play and arena searches keep asking the network about the same
+positions — openings, forced lines, the subtree of the previous move.
+`EvalCache` remembers the raw network output (policy over the 7 relative
+actions, value from the mover's perspective) per (model version, position
+key), so only misses reach the batched forward pass.
+
+The model version is whatever the owner uses to tell weights apart (the
+trainers use a counter bumped on every promotion). `retire(version)` drops
+the entries of a superseded model at once; otherwise they age out through
+the LRU order like any other entry.
+
+Usage:
+    cache = EvalCache(max_entries=200_000)
+    hit = cache.get(version, game.key())
+    if hit is None:
+        policy, value = net(...)
+        cache.put(version, game.key(), policy, value)
+    print(cache.stats())
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+import numpy as np
+
+
+class EvalCache:
+    """LRU map (model version, position key) -> (policy (7,), value)."""
+
+    def __init__(self, max_entries: int):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be ≥ 1, got {max_entries}")
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[np.ndarray, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, item: tuple) -> bool:
+        """`(version, key) in cache`, without touching LRU order or counters."""
+        return item in self._entries
+
+    def get(self, version: Hashable, key: int) -> Optional[tuple[np.ndarray, float]]:
+        entry = self._entries.get((version, key))
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end((version, key))
+        self.hits += 1
+        return entry
+
+    def put(self, version: Hashable, key: int, policy: np.ndarray, value: float):
+        self._entries[(version, key)] = (np.array(policy, dtype=np.float32), float(value))
+        self._entries.move_to_end((version, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def retire(self, version: Hashable):
+        """Drop every entry computed by model `version`."""
+        for item in [item for item in self._entries if item[0] == version]:
+            del self._entries[item]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"cache_entries": len(self), "cache_hits": self.hits,
+                "cache_misses": self.misses, "cache_evictions": self.evictions,
+                "cache_hit_rate": self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,298 @@
+"""
+Centralized batched inference for multi-process self-play.
+
+One server process owns the network (SongoNet or SongoNetV3). Each search
+worker gets an `InferenceClient` and writes its encoded leaves into its
+own shared-memory ring of request slots. The server answers in the same
+slot, so only tiny (client, slot, n) tickets go through a queue, never
+the tensors.
+
+    ring of client k (shared memory, float32):
+        slot s : inputs  (max_leaves, *input_shape)
+                 policy  (max_leaves, 7)     softmax probabilities
+                 value   (max_leaves,)
+
+Batching policy: the server blocks for a first request, then keeps
+gathering requests until `max_batch` leaves are queued, `max_wait_ms` has
+elapsed, or every live client has a request in the batch (a synchronous
+searcher cannot send another one before it is answered). All gathered
+requests go through one forward pass.
+
+If the server process dies (a model exception, a CUDA error, the OOM
+killer), waiting clients raise RuntimeError instead of blocking forever:
+the server clears a shared `alive` flag on its way out, and the owner's
+`check()` clears it when the process was killed outright.
+
+Usage:
+    server = InferenceServer(model, input_shape=(16, 2, 7), num_clients=8)
+    clients = server.start()          # hand one client to each worker
+    ...                               # workers: client.evaluate(states)
+    server.stop()
+"""
+from __future__ import annotations
+import copy
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import torch
+
+NUM_ACTIONS = 7
+# Seconds between server-liveness checks while a client waits for an answer
+POLL_INTERVAL = 0.5
+
+
+def _ring_views(buf, ring_slots: int, max_leaves: int, input_shape: tuple):
+    """(inputs, policy, value) numpy views of a client ring, each indexed
+    by slot first."""
+    in_size = int(np.prod(input_shape))
+    per_slot = max_leaves * (in_size + NUM_ACTIONS + 1)
+    arr = np.ndarray((ring_slots, per_slot), dtype=np.float32, buffer=buf)
+    a, b = max_leaves * in_size, max_leaves * (in_size + NUM_ACTIONS)
+    inputs = arr[:, :a].reshape((ring_slots, max_leaves) + tuple(input_shape))
+    policy = arr[:, a:b].reshape(ring_slots, max_leaves, NUM_ACTIONS)
+    value = arr[:, b:]
+    return inputs, policy, value
+
+
+class InferenceClient:
+    """
+    A worker's handle on the server. Requests are answered in order:
+    `submit()` up to `ring_slots` batches, then collect them with
+    `result()` in the same order — or just call `evaluate()`.
+
+    Clients are passed to worker processes as `Process` arguments (they
+    hold semaphores, which can only be shared at process creation).
+    """
+
+    def __init__(self, index: int, shm_name: str, ring_slots: int, max_leaves: int,
+                 input_shape: tuple, requests, done, alive):
+        self.index = index
+        self.shm_name = shm_name
+        self.ring_slots = ring_slots
+        self.max_leaves = max_leaves
+        self.input_shape = tuple(input_shape)
+        self._requests = requests
+        self._done = done
+        self._alive = alive
+        self._shm = None
+        self._views = None
+        self._head = 0          # next slot to submit into
+        self._tail = 0          # next slot to collect
+        self.requests_sent = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shm"] = state["_views"] = None
+        return state
+
+    def _attach(self):
+        if self._views is None:
+            self._shm = shared_memory.SharedMemory(name=self.shm_name)
+            self._views = _ring_views(self._shm.buf, self.ring_slots,
+                                      self.max_leaves, self.input_shape)
+
+    def submit(self, states: np.ndarray) -> int:
+        """Queue up to `max_leaves` encoded states; returns the slot."""
+        n = len(states)
+        if not 0 < n <= self.max_leaves:
+            raise ValueError(f"batch of {n} states, expected 1..{self.max_leaves}")
+        if self._head - self._tail >= self.ring_slots:
+            raise RuntimeError("ring full: collect a result() before submitting")
+        self._attach()
+        slot = self._head % self.ring_slots
+        self._views[0][slot, :n] = states
+        self._requests.put((self.index, slot, n))
+        self._head += 1
+        self.requests_sent += 1
+        return slot
+
+    def result(self, n: int) -> tuple[np.ndarray, np.ndarray]:
+        """Wait for the oldest outstanding request (of `n` states) and
+        return copies of its (policies (n, 7), values (n,)). Raises
+        RuntimeError if the server dies first."""
+        if self._tail == self._head:
+            raise RuntimeError("no outstanding request")
+        while not self._done.acquire(timeout=POLL_INTERVAL):
+            if not self._alive.value:
+                raise RuntimeError("inference server stopped before answering")
+        slot = self._tail % self.ring_slots
+        self._tail += 1
+        _, policy, value = self._views
+        return policy[slot, :n].copy(), value[slot, :n].copy()
+
+    def evaluate(self, states: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Policies (n, 7) and values (n,) of `states`, split into
+        `max_leaves` chunks if needed."""
+        states = np.ascontiguousarray(states, dtype=np.float32)
+        if len(states) <= self.max_leaves:
+            self.submit(states)
+            return self.result(len(states))
+        chunks = [states[i:i + self.max_leaves]
+                  for i in range(0, len(states), self.max_leaves)]
+        policies, values = [], []
+        for i in range(0, len(chunks), self.ring_slots):
+            group = chunks[i:i + self.ring_slots]
+            for chunk in group:
+                self.submit(chunk)
+            for chunk in group:
+                p, v = self.result(len(chunk))
+                policies.append(p)
+                values.append(v)
+        return np.concatenate(policies), np.concatenate(values)
+
+    def close(self):
+        """Tell the server this worker is finished (no more requests)."""
+        self._requests.put((self.index, -1, 0))
+        if self._shm is not None:
+            self._views = None
+            self._shm.close()
+            self._shm = None
+
+
+def _serve(*args, alive):
+    """Server process entry point: clears `alive` however the loop ends,
+    so waiting clients fail instead of blocking."""
+    try:
+        _serve_loop(*args)
+    finally:
+        alive.value = 0
+
+
+def _serve_loop(model, device: str, shm_names: list[str], ring_slots: int, max_leaves: int,
+                input_shape: tuple, requests, done_sems, max_batch: int,
+                max_wait_ms: float, stats):
+    """Server process main loop."""
+    torch.set_grad_enabled(False)
+    model = model.to(device).eval()
+    shms = [shared_memory.SharedMemory(name=name) for name in shm_names]
+    views = [_ring_views(shm.buf, ring_slots, max_leaves, input_shape) for shm in shms]
+    live = set(range(len(shm_names)))
+    forwards = leaves = 0
+    try:
+        while live:
+            batch: list[tuple[int, int, int]] = []
+            total = 0
+            deadline = None
+            while total < max_batch and live:
+                if deadline is None:
+                    item = requests.get()
+                else:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = requests.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                if item is None:            # stop() while workers still live
+                    live.clear()
+                    break
+                client, slot, n = item
+                if slot < 0:
+                    live.discard(client)
+                else:
+                    batch.append(item)
+                    total += n
+                    if deadline is None:
+                        deadline = time.monotonic() + max_wait_ms / 1000.0
+                if batch and live <= {c for c, _, _ in batch}:
+                    break                    # every live client is waiting
+            if not batch:
+                continue
+
+            x = np.concatenate([views[c][0][s, :n] for c, s, n in batch])
+            out = model(torch.from_numpy(x).to(device))
+            logits, value = (out["policy"], out["value"]) if isinstance(out, dict) else out
+            policy = torch.softmax(logits.float(), dim=1).cpu().numpy()
+            value = value.float().reshape(-1).cpu().numpy()
+            i = 0
+            for c, s, n in batch:
+                views[c][1][s, :n] = policy[i:i + n]
+                views[c][2][s, :n] = value[i:i + n]
+                i += n
+                done_sems[c].release()
+            forwards += 1
+            leaves += total
+    finally:
+        stats[0], stats[1] = forwards, leaves
+        for shm in shms:
+            shm.close()
+
+
+class InferenceServer:
+    """Owns the model in a dedicated process and batches across clients."""
+
+    def __init__(self, model: torch.nn.Module, input_shape: tuple, num_clients: int,
+                 device: str = "cpu", max_leaves: int = 128, ring_slots: int = 2,
+                 max_batch: int = 512, max_wait_ms: float = 2.0):
+        if num_clients < 1:
+            raise ValueError(f"num_clients must be ≥ 1, got {num_clients}")
+        self.model = model
+        self.input_shape = tuple(input_shape)
+        self.num_clients = num_clients
+        self.device = device
+        self.max_leaves = max_leaves
+        self.ring_slots = ring_slots
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._ctx = mp.get_context("spawn")
+        self._process = None
+        self._shms: list[shared_memory.SharedMemory] = []
+        self._requests = None
+        self._stats = None
+        self._alive = None
+        self.stats: dict = {}
+
+    def start(self) -> list[InferenceClient]:
+        """Spawn the server process; returns one client per worker."""
+        in_size = int(np.prod(self.input_shape))
+        nbytes = 4 * self.ring_slots * self.max_leaves * (in_size + NUM_ACTIONS + 1)
+        self._shms = [shared_memory.SharedMemory(create=True, size=nbytes)
+                      for _ in range(self.num_clients)]
+        self._requests = self._ctx.Queue()
+        done = [self._ctx.Semaphore(0) for _ in range(self.num_clients)]
+        self._stats = self._ctx.Array("q", 2)     # forwards, leaves
+        self._alive = self._ctx.RawValue("b", 1)
+        # The server gets its own CPU copy; it moves it to `device` itself.
+        model = copy.deepcopy(self.model).cpu()
+        self._process = self._ctx.Process(
+            target=_serve, daemon=True,
+            args=(model, self.device, [shm.name for shm in self._shms],
+                  self.ring_slots, self.max_leaves, self.input_shape, self._requests,
+                  done, self.max_batch, self.max_wait_ms, self._stats),
+            kwargs={"alive": self._alive})
+        self._process.start()
+        return [InferenceClient(k, shm.name, self.ring_slots, self.max_leaves,
+                                self.input_shape, self._requests, done[k], self._alive)
+                for k, shm in enumerate(self._shms)]
+
+    def check(self):
+        """Raise RuntimeError if the server process has died. Also marks it
+        dead for the clients, which a killed process cannot do itself."""
+        if self._process is not None and not self._process.is_alive():
+            self._alive.value = 0
+            raise RuntimeError(f"inference server exited with code {self._process.exitcode}")
+
+    def stop(self):
+        """Shut the server down (after all clients closed, or forcibly)."""
+        if self._process is None:
+            return
+        self._requests.put(None)
+        self._process.join()
+        forwards, leaves = self._stats[:]
+        self.stats = {"forwards": forwards, "leaves": leaves,
+                      "mean_batch": leaves / forwards if forwards else 0.0}
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        self._shms = []
+        self._process = None
+
+    def __enter__(self) -> list[InferenceClient]:
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -4,69 +4,65 @@ AlphaZero for Songo — Monte Carlo Tree Search (MCTS)
 v2: Batched inference + GPU support + symmetry augmentation.
 
 Uses the neural network to guide the search:
-- Selection: PUCT formula (UCB variant with NN priors) with virtual loss
+- Selection: PUCT formula (UCB variant with NN priors) with virtual loss;
+  selections colliding on one leaf share its evaluation
 - Expansion: Batched NN evaluation (multiple leaves per forward pass)
 - Backpropagation: Updates visit counts and values
 - No random rollouts (replaced by NN value head)
-- Mirror symmetry: optionally evaluate both original and mirrored state
+- Mirror symmetry: evaluate the original and the mirrored state and average
+  them — at every evaluation ("all"), at the root only ("root"), or use one
+  random orientation per evaluation instead ("random"); see MCTSConfig.symmetry
 """
 import math
 import numpy as np
 import torch
 from typing import Optional, Dict, List, Tuple
 
-from songo_game import SongoGame
+from songo_game import SongoGame, encode_states_batch, NO_BENEFICIARY
 from neural_network import SongoNet
 from config import MCTSConfig
+from transposition import TranspositionTable
+from eval_cache import EvalCache
+from egtb_probe import EgtbProbe
 
 
 # ─── Symmetry helpers ────────────────────────────────────────────────────────
 
-def mirror_encoded_state(state: np.ndarray) -> np.ndarray:
+SYMMETRY_MODES = ("none", "root", "random", "all")
+
+def _build_mirror_permutation() -> Tuple[np.ndarray, np.ndarray]:
     """
-    Mirror a canonical 80-feature state vector by reversing pit order.
-    Pit 0↔6, 1↔5, 2↔4, 3 stays — for both current and opponent sides.
-    Zone features and derived features are recomputed by reversing the
-    underlying pit arrays.
+    Mirroring the canonical 80-feature vector (pit 0↔6, 1↔5, 2↔4, 3 stays,
+    on both sides) is a fixed feature permutation plus a sign flip:
+      [0-6], [7-13]       : my / opponent pits → reversed
+      [32]↔[34], [35]↔[37]: Tête ↔ Membres zone sums (Pivot unchanged)
+      [38-44], [45-51]    : per-pit maison proximity / capture potential → reversed
+      [52]↔[54], [55]↔[57]: Tête ↔ Membres vulnerability (Pivot unchanged)
+      [61], [62]          : zone imbalances → negated
+      [64-70]             : landing positions per pit → reversed
+    Scalar and aggregate features (scores, totals, bidoua, counts) are unchanged.
     """
-    m = state.copy()
-
-    # [0-6]: my pits → reverse
-    m[0:7] = state[0:7][::-1]
-    # [7-13]: opponent pits → reverse
-    m[7:14] = state[7:14][::-1]
-
-    # [14-27]: scalar features — unchanged (scores, totals, etc.)
-
-    # [28-31]: bidoua/threats — unchanged (aggregates)
-
-    # [32-37]: zone features need swapping: Tête ↔ Membres, Pivot unchanged
-    # my_tete(32) ↔ my_membres(34), my_pivot(33) unchanged
-    m[32], m[34] = state[34], state[32]
-    # op_tete(35) ↔ op_membres(37), op_pivot(36) unchanged
-    m[35], m[37] = state[37], state[35]
+    perm = np.arange(80)
+    for lo in (0, 7, 38, 45, 64):
+        perm[lo:lo + 7] = np.arange(lo + 6, lo - 1, -1)
+    for a, b in ((32, 34), (35, 37), (52, 54), (55, 57)):
+        perm[a], perm[b] = b, a
+    sign = np.ones(80, dtype=np.float32)
+    sign[61] = sign[62] = -1.0
+    return perm, sign
 
-    # [38-44]: maison proximity per-pit → reverse
-    m[38:45] = state[38:45][::-1]
 
-    # [45-51]: capture potential per-pit → reverse
-    m[45:52] = state[45:52][::-1]
+MIRROR_PERMUTATION, MIRROR_SIGN = _build_mirror_permutation()
 
-    # [52-57]: vulnerability by zone — swap Tête ↔ Membres
-    m[52], m[54] = state[54], state[52]  # my tête ↔ my membres
-    m[55], m[57] = state[57], state[55]  # op tête ↔ op membres
-    # Pivot (53, 56) unchanged
 
-    # [58-63]: strategic balance
-    m[61] = -state[61]  # tête imbalance → negate (swapped sides)
-    m[62] = -state[62]  # membres imbalance → negate
+def mirror_encoded_states(states: np.ndarray) -> np.ndarray:
+    """Mirror a batch of canonical 80-feature vectors, shape (..., 80)."""
+    return states[..., MIRROR_PERMUTATION] * MIRROR_SIGN
 
-    # [64-70]: landing positions per-pit → reverse
-    m[64:71] = state[64:71][::-1]
 
-    # [71-76]: yini/olôa/akuru counts — unchanged (aggregates)
-
-    return m
+def mirror_encoded_state(state: np.ndarray) -> np.ndarray:
+    """Mirror a canonical 80-feature state vector by reversing pit order."""
+    return mirror_encoded_states(state)
 
 
 def mirror_policy(policy: np.ndarray) -> np.ndarray:
@@ -77,26 +73,37 @@ def mirror_policy(policy: np.ndarray) -> np.ndarray:
 # ─── MCTS Node ───────────────────────────────────────────────────────────────
 
 class MCTSNode:
-    """A node in the MCTS tree."""
+    """
+    A node in the MCTS tree. Nodes carry statistics only — the position is
+    reproduced during descent by playing moves on one mutable game
+    (make/unmake), so no SongoGame is stored per node.
+
+    Expansion only records the legal moves as (action, prior) `edges`; the
+    child node of an edge is created the first time selection follows it,
+    so `children` holds the visited children only.
+
+    With a transposition table, `row` links the node to the shared
+    statistics of its position (0 = not linked yet).
+    """
 
-    __slots__ = ['game', 'parent', 'action', 'prior', 'children',
-                 'visit_count', 'value_sum', 'is_expanded']
+    __slots__ = ['parent', 'action', 'prior', 'children', 'edges',
+                 'visit_count', 'value_sum', 'is_expanded', 'row']
 
     def __init__(
         self,
-        game: SongoGame,
         parent: Optional['MCTSNode'] = None,
         action: int = -1,
         prior: float = 0.0
     ):
-        self.game = game
         self.parent = parent
         self.action = action  # Action that led to this node (relative, 0-6)
         self.prior = prior    # P(s, a) from NN policy
         self.children: Dict[int, 'MCTSNode'] = {}
+        self.edges: List[Tuple[int, float]] = []
         self.visit_count = 0
         self.value_sum = 0.0
         self.is_expanded = False
+        self.row = 0
 
     @property
     def q_value(self) -> float:
@@ -105,35 +112,47 @@ class MCTSNode:
             return 0.0
         return self.value_sum / self.visit_count
 
-    def ucb_score(self, c_puct: float) -> float:
+    def ucb_score(self, c_puct: float, q: Optional[float] = None) -> float:
         """
         Upper Confidence Bound score using PUCT formula.
         We NEGATE Q because: each node stores value from its OWN player's
         perspective. The parent (opponent) wants the child worst for child.
+        `q` overrides the node's own Q (shared transposition statistics).
         """
         parent_visits = self.parent.visit_count if self.parent else 1
         exploration = c_puct * self.prior * math.sqrt(parent_visits) / (1 + self.visit_count)
-        return -self.q_value + exploration
+        return -(self.q_value if q is None else q) + exploration
 
-    def select_child(self, c_puct: float) -> 'MCTSNode':
-        """Select the child with the highest UCB score."""
+    def select_child(
+        self, c_puct: float, table: Optional[TranspositionTable] = None
+    ) -> 'MCTSNode':
+        """Select the edge with the highest UCB score, creating its child
+        node on first selection."""
         best_score = -float('inf')
-        best_child = None
-        for child in self.children.values():
-            score = child.ucb_score(c_puct)
+        best = None
+        sqrt_visits = math.sqrt(self.visit_count)
+        for action, prior in self.edges:
+            child = self.children.get(action)
+            if child is None:
+                # Never selected: Q = 0, no visits
+                score = c_puct * prior * sqrt_visits
+            else:
+                q = None if table is None else table.q(child.row)
+                score = child.ucb_score(c_puct, q)
             if score > best_score:
                 best_score = score
-                best_child = child
-        return best_child
-
-    def expand(self, policy_probs: np.ndarray):
-        """Expand this node using the NN policy output."""
-        if self.game.is_terminal:
-            return
-
-        self.is_expanded = True
-        valid_mask = self.game.get_valid_moves_mask()
-
+                best = (action, prior, child)
+        action, prior, child = best
+        if child is None:
+            child = MCTSNode(parent=self, action=action, prior=prior)
+            self.children[action] = child
+        return child
+
+    def expand(self, policy_probs: np.ndarray, valid_mask: np.ndarray):
+        """
+        Expand this node using the NN policy output. `valid_mask` is the
+        (7,) legal-move mask of the node's position (terminal → all zeros).
+        """
         # Mask and renormalize policy
         masked_probs = policy_probs * valid_mask
         prob_sum = masked_probs.sum()
@@ -144,28 +163,9 @@ class MCTSNode:
         else:
             return
 
-        for action in range(7):
-            if valid_mask[action] > 0:
-                child_game = self.game.clone()
-                pit_index = child_game.action_to_pit_index(action)
-                child_game.execute_move(pit_index)
-
-                child = MCTSNode(
-                    game=child_game,
-                    parent=self,
-                    action=action,
-                    prior=float(masked_probs[action])
-                )
-                self.children[action] = child
-
-    def backpropagate(self, value: float):
-        """Backpropagate the value up the tree, alternating perspective."""
-        node = self
-        while node is not None:
-            node.visit_count += 1
-            node.value_sum += value
-            value = -value
-            node = node.parent
+        self.is_expanded = True
+        self.edges = [(action, float(masked_probs[action]))
+                      for action in range(7) if valid_mask[action] > 0]
 
 
 # ─── Batched MCTS ────────────────────────────────────────────────────────────
@@ -180,75 +180,103 @@ class MCTS:
         device: str = "cpu",
         batch_size: int = 16,
         use_symmetry: bool = True,
+        eval_cache: Optional[EvalCache] = None,
+        inference=None,
+        egtb: Optional[EgtbProbe] = None,
     ):
         self.model = model
+        # Optional `inference_server.InferenceClient`: forward passes go to
+        # a shared server process instead of `model` (which may be None).
+        self.inference = inference
         self.config = config
         self.device = device
         self.batch_size = batch_size
-        self.use_symmetry = use_symmetry
+        # Mirror ensembling mode; `use_symmetry=False` overrides the config
+        self.symmetry = config.symmetry if use_symmetry else "none"
+        if self.symmetry not in SYMMETRY_MODES:
+            raise ValueError(f"unknown symmetry mode {self.symmetry!r}")
+        # Shared per-position statistics and evaluations, kept across searches
+        self.table = (TranspositionTable(config.transposition_entries)
+                      if config.transposition_entries > 0 else None)
+        # Batched (leaf) evaluations keyed by (model_version, position key).
+        # Bump `model_version` whenever the model's weights change.
+        if eval_cache is None and config.eval_cache_entries > 0:
+            eval_cache = EvalCache(config.eval_cache_entries)
+        self.eval_cache = eval_cache
+        self.model_version = 0
+        # Endgame tablebase: covered leaves get their exact value
+        if egtb is None and config.egtb_dir:
+            egtb = EgtbProbe(config.egtb_dir)
+        self.egtb = egtb
+        # Leaf batches run, their selection slots, and the slots lost to
+        # selections colliding on a leaf already in the batch
+        self.stats = {"batches": 0, "slots": 0, "wasted_slots": 0}
 
-    @torch.no_grad()
-    def _evaluate_single(self, game: SongoGame) -> Tuple[np.ndarray, float]:
-        """Evaluate a single game state (fallback)."""
-        state = game.encode_state()
-        state_tensor = torch.FloatTensor(state).unsqueeze(0).to(self.device)
-
-        self.model.eval()
-        policy_logits, value = self.model(state_tensor)
-        policy_probs = torch.softmax(policy_logits, dim=1).cpu().numpy()[0]
-        value = value.cpu().item()
+    @property
+    def root_symmetry(self) -> str:
+        """Evaluation mode of the root: averaged unless symmetry is off or
+        random."""
+        return "all" if self.symmetry == "root" else self.symmetry
 
-        return policy_probs, value
+    @property
+    def leaf_symmetry(self) -> str:
+        """Evaluation mode below the root."""
+        return "none" if self.symmetry == "root" else self.symmetry
 
     @torch.no_grad()
     def _evaluate_batch(
-        self, games: List[SongoGame]
+        self, states: np.ndarray, symmetry: Optional[str] = None
     ) -> List[Tuple[np.ndarray, float]]:
         """
-        Evaluate a batch of game states in a single forward pass.
-        With symmetry: evaluates both original and mirrored, averages results.
+        Evaluate a batch of encoded states (n, 80) in a single forward pass.
+        `symmetry` (default: the leaf mode) is "all" to evaluate both the
+        original and the mirrored states and average them, "random" to
+        evaluate each state in one random orientation, or "none".
         """
-        if len(games) == 0:
+        if len(states) == 0:
             return []
 
-        self.model.eval()
-        n = len(games)
-
-        # Encode all states
-        states = np.stack([g.encode_state() for g in games], axis=0)
+        n = len(states)
+        symmetry = self.leaf_symmetry if symmetry is None else symmetry
+        flip = None
 
-        if self.use_symmetry:
+        if symmetry == "all":
             # Stack original + mirrored → batch of 2n
-            mirrored = np.stack([mirror_encoded_state(s) for s in states], axis=0)
-            batch = np.concatenate([states, mirrored], axis=0)  # (2n, 80)
+            batch = np.concatenate([states, mirror_encoded_states(states)], axis=0)  # (2n, 80)
+        elif symmetry == "random":
+            flip = np.random.random(n) < 0.5
+            batch = states.copy()
+            batch[flip] = mirror_encoded_states(states[flip])
         else:
             batch = states  # (n, 80)
 
-        batch_tensor = torch.FloatTensor(batch).to(self.device)
-        policy_logits, values = self.model(batch_tensor)
-        policy_probs = torch.softmax(policy_logits, dim=1).cpu().numpy()
-        values = values.cpu().numpy().flatten()
-
-        results = []
-        for i in range(n):
-            if self.use_symmetry:
-                # Average original and un-mirrored policy/value
-                orig_policy = policy_probs[i]
-                mirror_pol = mirror_policy(policy_probs[n + i])
-                avg_policy = (orig_policy + mirror_pol) / 2.0
-                avg_value = (values[i] + values[n + i]) / 2.0
-                results.append((avg_policy, float(avg_value)))
-            else:
-                results.append((policy_probs[i], float(values[i])))
-
-        return results
+        if self.inference is not None:
+            policy_probs, values = self.inference.evaluate(batch)
+        else:
+            self.model.eval()
+            batch_tensor = torch.FloatTensor(batch).to(self.device)
+            policy_logits, values = self.model(batch_tensor)
+            policy_probs = torch.softmax(policy_logits, dim=1).cpu().numpy()
+            values = values.cpu().numpy().flatten()
+
+        if symmetry == "all":
+            # Average original and un-mirrored policy/value
+            policy_probs = (policy_probs[:n] + policy_probs[n:, ::-1]) / 2.0
+            values = (values[:n] + values[n:]) / 2.0
+        elif flip is not None:
+            # Un-mirror the policies of the flipped states
+            policy_probs = np.where(flip[:, None], policy_probs[:, ::-1], policy_probs)
+
+        return [(policy_probs[i], float(values[i])) for i in range(n)]
 
     def search(self, game: SongoGame, add_noise: bool = True) -> np.ndarray:
         """
         Run batched MCTS from the given game state.
 
         Collects `batch_size` leaves per iteration using virtual loss,
-        then evaluates them in a single batched forward pass.
+        then evaluates them in a single batched forward pass. A single copy
+        of `game` is walked down and back up the tree with make/unmake;
+        each leaf is encoded while the walk sits on it.
 
         Args:
             game: Current game state
@@ -257,20 +285,44 @@ class MCTS:
         Returns:
             action_probs: (7,) normalized visit count distribution
         """
-        root = MCTSNode(game.clone())
-
-        if root.game.is_terminal:
+        if game.is_terminal:
             return np.zeros(7, dtype=np.float32)
 
-        # Expand root (single evaluation)
-        policy_probs, value = self._evaluate_single(root.game)
+        game = game.clone()
+        root = MCTSNode()
+        table = self.table
+        cache = self.eval_cache
+
+        # Expand root (single evaluation). The cache only holds batched leaf
+        # evaluations, so a root miss is evaluated but not stored; neither
+        # is used when the root is evaluated with more symmetry than leaves.
+        valid_mask = game.get_valid_moves_mask()
+        reuse = self.root_symmetry == self.leaf_symmetry
+        cached = None
+        if table is not None:
+            table.new_search()
+            root.row = table.link(game.key())
+            if reuse:
+                cached = table.lookup(root.row)
+        if cached is None and cache is not None and reuse:
+            hit = cache.get(self.model_version, game.key())
+            if hit is not None:
+                cached = (hit[0], None, hit[1])
+                if table is not None:
+                    table.store(root.row, hit[0], valid_mask > 0, hit[1])
+        if cached is not None:
+            policy_probs, _, value = cached
+        else:
+            policy_probs, value = self._evaluate_batch(game.encode_state()[None],
+                                                       self.root_symmetry)[0]
+            if table is not None:
+                table.store(root.row, policy_probs, valid_mask > 0, value)
 
         # Add Dirichlet noise for exploration
         if add_noise:
             noise = np.random.dirichlet(
                 [self.config.dirichlet_alpha] * 7
             )
-            valid_mask = root.game.get_valid_moves_mask()
             noise *= valid_mask
             noise_sum = noise.sum()
             if noise_sum > 0:
@@ -280,66 +332,129 @@ class MCTS:
                 + self.config.dirichlet_epsilon * noise
             )
 
-        root.expand(policy_probs)
+        root.expand(policy_probs, valid_mask)
         root.visit_count = 1
         root.value_sum = value
+        if table is not None:
+            table.visits[root.row] += 1
+            table.value_sum[root.row] += value
 
         # ── Batched simulation loop ──────────────────────────────────────
         sims_done = 0
         total_sims = self.config.num_simulations
+        vloss = self.config.virtual_loss
 
         while sims_done < total_sims:
-            batch_leaves: List[MCTSNode] = []
-            batch_games: List[SongoGame] = []
-            terminal_results: List[Tuple[MCTSNode, float]] = []
-
-            # 1. Selection — collect batch_size leaves with virtual loss
-            for _ in range(min(self.batch_size, total_sims - sims_done)):
+            # Selections waiting for the network, grouped by evaluation:
+            # batch_paths[i] holds every root-to-leaf path backed up with
+            # evaluation i (several when selections collide on one leaf or
+            # reach one position through different nodes).
+            batch_paths: List[List[List[MCTSNode]]] = []
+            batch_nodes: Dict[MCTSNode, int] = {}  # pending leaf -> evaluation index
+            batch_keys: Dict[int, int] = {}    # position key -> evaluation index
+            batch_rows: List[int] = []         # evaluation -> table row (0 = none)
+            batch_positions: List[tuple] = []  # (board, scores, cp, sm, sb)
+            batch_masks: List[np.ndarray] = []
+            resolved: List[Tuple[List[MCTSNode], float]] = []  # no network call
+            slots = min(self.batch_size, total_sims - sims_done)
+
+            # 1. Selection — collect `slots` leaves with virtual loss
+            for _ in range(slots):
                 node = root
-
-                # Traverse to leaf
-                while node.is_expanded and len(node.children) > 0:
-                    node = node.select_child(self.config.c_puct)
-
-                # Apply virtual loss to discourage re-selection
-                vl_node = node
-                while vl_node is not None:
-                    vl_node.visit_count += 1
-                    vl_node.value_sum -= 1.0  # Pessimistic
-                    vl_node = vl_node.parent
-
-                if node.game.is_terminal:
-                    result = node.game.get_result(node.game.current_player)
-                    terminal_results.append((node, result))
-                elif node.is_expanded:
-                    # Already expanded (duplicate in batch) — treat as terminal-ish
-                    terminal_results.append((node, node.q_value))
-                else:
-                    batch_leaves.append(node)
-                    batch_games.append(node.game)
+                path = [root]
+                undo = []
+
+                try:
+                    # Traverse to leaf, playing the moves on the shared game
+                    while node.is_expanded and node.edges:
+                        node = node.select_child(self.config.c_puct, table)
+                        undo.append(game.execute_move_undoable(
+                            game.action_to_pit_index(node.action)))
+                        path.append(node)
+                    if table is not None and node.row == 0:
+                        node.row = table.link(game.key())
+                    self._add_virtual_loss(path, vloss)
+
+                    if node in batch_nodes:
+                        # Collision with a leaf already in the batch: a
+                        # wasted slot, backed up with that leaf's evaluation
+                        batch_paths[batch_nodes[node]].append(path)
+                        self.stats["wasted_slots"] += 1
+                        continue
+
+                    cached = None
+                    key = None
+                    solved = None
+                    if self.egtb is not None and not node.is_expanded:
+                        solved = self.egtb.probe(game)
+                    if not game.is_terminal and not node.is_expanded and solved is None:
+                        if table is not None:
+                            cached = table.lookup(node.row)
+                        if table is not None or cache is not None:
+                            key = game.key()
+                        if cached is None and cache is not None and key not in batch_keys:
+                            hit = cache.get(self.model_version, key)
+                            if hit is not None:
+                                mask = game.get_valid_moves_mask()
+                                cached = (hit[0], mask, hit[1])
+                                if table is not None:
+                                    table.store(node.row, hit[0], mask > 0, hit[1])
+                    if game.is_terminal:
+                        resolved.append((path, game.get_result(game.current_player)))
+                    elif solved is not None:
+                        # Endgame tablebase: exact value, left unexpanded
+                        # like a terminal node
+                        resolved.append((path, solved))
+                    elif cached is not None:
+                        # Transposition or cached evaluation: no network call
+                        policy, mask, value = cached
+                        node.expand(policy, mask.astype(np.float32))
+                        resolved.append((path, value))
+                    elif key is not None and key in batch_keys:
+                        # Same position as an earlier leaf of this batch
+                        batch_nodes[node] = batch_keys[key]
+                        batch_paths[batch_keys[key]].append(path)
+                    else:
+                        if key is not None:
+                            batch_keys[key] = len(batch_positions)
+                        batch_nodes[node] = len(batch_positions)
+                        batch_paths.append([path])
+                        batch_rows.append(node.row)
+                        batch_positions.append((
+                            game.board.copy(), game.scores.copy(), game.current_player,
+                            game.solidarity_mode,
+                            NO_BENEFICIARY if game.solidarity_beneficiary is None
+                            else game.solidarity_beneficiary))
+                        batch_masks.append(game.get_valid_moves_mask())
+                finally:
+                    for record in reversed(undo):
+                        game.undo_move(record)
+            self.stats["batches"] += 1
+            self.stats["slots"] += slots
 
             # 2. Batched expansion + evaluation
-            if len(batch_games) > 0:
-                eval_results = self._evaluate_batch(batch_games)
-                for node, (policy, val) in zip(batch_leaves, eval_results):
-                    node.expand(policy)
-
-            # 3. Undo virtual loss + backpropagate real values
-            all_nodes = [(n, v) for n, v in terminal_results]
-            if len(batch_games) > 0:
-                all_nodes += [(n, v) for n, (_, v) in zip(batch_leaves, eval_results)]
-
-            for node, value in all_nodes:
-                # Undo virtual loss (walk up from node to root)
-                vl_node = node
-                while vl_node is not None:
-                    vl_node.visit_count -= 1
-                    vl_node.value_sum += 1.0
-                    vl_node = vl_node.parent
-
-                # Real backpropagation
-                node.backpropagate(value)
-                sims_done += 1
+            if batch_positions:
+                boards, scores, cp, sm, sb = zip(*batch_positions)
+                states = encode_states_batch(np.stack(boards), np.stack(scores),
+                                             np.array(cp), np.array(sm), np.array(sb))
+                eval_results = self._evaluate_batch(states)
+                for i, paths in enumerate(batch_paths):
+                    policy, value = eval_results[i]
+                    for path in paths:
+                        if not path[-1].is_expanded:
+                            path[-1].expand(policy, batch_masks[i])
+                        resolved.append((path, value))
+                    if batch_rows[i]:
+                        table.store(batch_rows[i], policy, batch_masks[i] > 0, value)
+                if cache is not None:
+                    for key, i in batch_keys.items():
+                        policy, val = eval_results[i]
+                        cache.put(self.model_version, key, policy, val)
+
+            # 3. Remove virtual loss and back up real values, one pass per path
+            for path, value in resolved:
+                self._backup(path, value, vloss)
+            sims_done += slots
 
         # Extract action probabilities from visit counts
         action_probs = np.zeros(7, dtype=np.float32)
@@ -352,6 +467,44 @@ class MCTS:
 
         return action_probs
 
+    def _add_virtual_loss(self, path: List[MCTSNode], vloss: float):
+        """Count a visit to every node of a selection `path` and make each
+        node look like a loss to the parent choosing it (raise its own Q),
+        so the rest of the batch spreads over other leaves."""
+        table = self.table
+        for node in path:
+            node.visit_count += 1
+            node.value_sum += vloss
+            if table is not None:
+                table.visits[node.row] += 1
+                table.value_sum[node.row] += vloss
+
+    def _backup(self, path: List[MCTSNode], value: float, vloss: float):
+        """
+        Replace the virtual loss of a selection by its real value, in one
+        pass from the leaf up. `value` is from the leaf mover's perspective
+        and flips sign per level. The virtual visits become the real ones;
+        a position met twice on the path keeps one visit in the table.
+        """
+        table = self.table
+        seen = set()
+        for node in reversed(path):
+            node.value_sum += value - vloss
+            if table is not None:
+                row = node.row
+                table.value_sum[row] -= vloss
+                if row in seen:
+                    table.visits[row] -= 1
+                else:
+                    seen.add(row)
+                    table.value_sum[row] += value
+            value = -value
+
+    def wasted_slot_fraction(self) -> float:
+        """Fraction of leaf-batch slots spent on selections that collided
+        with a leaf already waiting in the same batch."""
+        return self.stats["wasted_slots"] / max(self.stats["slots"], 1)
+
     def get_action(
         self,
         game: SongoGame,
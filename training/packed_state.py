@@ -0,0 +1,137 @@
+"""
+Compact packed position — 20 bytes per state.
+
+`PackedState` stores a Songo position as the 20-byte layout of engine-rs
+`book/hash.rs` (the same bytes as `SongoGame.packed_key()`):
+
+    [0..14] : pits 0..13 (one byte each)
+    [14]    : Player One score
+    [15]    : Player Two score
+    [16]    : current player (0 | 1)
+    [17]    : variant marker (0 = Gabon)
+    [18]    : solidarity flags (bit 0 = mode, bits 1-2 = beneficiary)
+    [19]    : reserved (0)
+
+A SongoGame carries two numpy arrays, a config reference and a handful of
+attributes; a PackedState is one `bytes` object behind a single slot, so
+search trees and replay buffers can hold millions of positions. Move count
+and terminal status are not stored (see `SongoGame.from_key`).
+
+Usage:
+    p = PackedState.from_game(game)
+    blob = p.to_bytes()
+    game2 = PackedState.from_bytes(blob).to_game()
+    view = p.to_view()               # encoding_v3.StateView
+"""
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+
+from config import GameConfig
+from encoding_v3 import StateView
+from songo_game import (
+    SongoGame, PACKED_KEY_LEN, SOLIDARITY_CODE, SOLIDARITY_FROM_CODE, fnv1a_64,
+)
+
+
+class PackedState:
+    """Immutable 20-byte Songo position (hashable, comparable)."""
+
+    __slots__ = ("data",)
+
+    SIZE = PACKED_KEY_LEN
+
+    def __init__(self, data: bytes):
+        if len(data) != PACKED_KEY_LEN:
+            raise ValueError(f"packed state must be {PACKED_KEY_LEN} bytes, got {len(data)}")
+        if data[18] not in SOLIDARITY_FROM_CODE:
+            raise ValueError(f"invalid solidarity byte {data[18]:#04x}")
+        self.data = bytes(data)
+
+    # ─── Conversions ──────────────────────────────────────────────────────
+
+    @classmethod
+    def from_game(cls, game: SongoGame) -> "PackedState":
+        return cls(game.packed_key())
+
+    def to_game(self, config: Optional[GameConfig] = None) -> SongoGame:
+        return SongoGame.from_key(self.data, config)
+
+    @classmethod
+    def from_view(cls, view: StateView) -> "PackedState":
+        code = SOLIDARITY_CODE[view.solidarity_beneficiary] if view.solidarity_mode else 0
+        board = np.asarray(view.board, dtype=np.uint8)
+        return cls(bytes(board) + bytes((
+            int(view.scores[0]), int(view.scores[1]), int(view.current_player),
+            0, code, 0)))
+
+    def to_view(self) -> StateView:
+        mode, beneficiary = SOLIDARITY_FROM_CODE[self.data[18]]
+        return StateView(
+            board=self.board.astype(np.int16),
+            scores=(self.data[14], self.data[15]),
+            current_player=self.data[16],
+            solidarity_mode=mode,
+            solidarity_beneficiary=beneficiary,
+        )
+
+    def to_bytes(self) -> bytes:
+        return self.data
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PackedState":
+        return cls(data)
+
+    def to_int(self) -> int:
+        """The 20 bytes as one little-endian integer."""
+        return int.from_bytes(self.data, "little")
+
+    @classmethod
+    def from_int(cls, value: int) -> "PackedState":
+        return cls(value.to_bytes(PACKED_KEY_LEN, "little"))
+
+    # ─── Field access ─────────────────────────────────────────────────────
+
+    @property
+    def board(self) -> np.ndarray:
+        """(14,) uint8 read-only view of the pits."""
+        return np.frombuffer(self.data, dtype=np.uint8, count=14)
+
+    @property
+    def scores(self) -> tuple[int, int]:
+        return self.data[14], self.data[15]
+
+    @property
+    def current_player(self) -> int:
+        return self.data[16]
+
+    @property
+    def solidarity_mode(self) -> bool:
+        return SOLIDARITY_FROM_CODE[self.data[18]][0]
+
+    @property
+    def solidarity_beneficiary(self) -> Optional[int]:
+        return SOLIDARITY_FROM_CODE[self.data[18]][1]
+
+    def book_hash(self) -> int:
+        """FNV-1a StateHash, same as `SongoGame.book_hash()`."""
+        return fnv1a_64(self.data)
+
+    # ─── Dunder ───────────────────────────────────────────────────────────
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PackedState) and self.data == other.data
+
+    def __hash__(self) -> int:
+        return hash(self.data)
+
+    def __getstate__(self):
+        return self.data
+
+    def __setstate__(self, data):
+        self.data = data
+
+    def __repr__(self) -> str:
+        return (f"PackedState(board={self.board.tolist()}, scores={self.scores}, "
+                f"cp={self.current_player}, sol={self.data[18]:#05b})")
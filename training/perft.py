@@ -0,0 +1,187 @@
+"""
+Perft — move-generation benchmark and node-rate harness for the rules engine.
+
+Counts the leaf positions reached after exactly `depth` plies from the
+initial position and from a few stored midgame positions, with every
+available engine variant, and checks the counts against known totals. A
+terminal position (or one with no legal move) before the last ply has no
+children and contributes nothing.
+
+Engine variants:
+    clone  : SongoGame, clone() + execute_move per child (copy-make)
+    undo   : SongoGame, execute_move_undoable / undo_move on one game
+    batch  : SongoBatch, one vectorized step per ply over the whole frontier
+
+The JSON report (`--json`) records counts, wall time and nodes/sec per
+(engine, position) so runs can be diffed across commits.
+
+Usage:
+    python perft.py --depth 5
+    python perft.py --depth 6 --engines undo batch --json perft_report.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+from songo_game import SongoGame
+from songo_batch import SongoBatch
+
+
+# Positions as `SongoGame.packed_key()` hex (None = initial position).
+POSITIONS: dict[str, Optional[str]] = {
+    "initial":    None,
+    "mid":        "07010001050c05020c03020a0102050201000000",
+    "grenier":    "100305020400010c050400060201070200000000",  # 16- and 12-seed pits
+    "late":       "02020000000000010308010306020d1d01000000",
+    "solidarity": "0000000000000005010f000100011b1401000300",  # P2 must feed P1
+}
+
+# Leaf counts for depth 0..6, from the original scalar SongoGame.
+KNOWN_TOTALS: dict[str, list[int]] = {
+    "initial":    [1, 7, 49, 309, 1964, 11929, 73269],
+    "mid":        [1, 7, 43, 266, 1552, 9205, 52211],
+    "grenier":    [1, 5, 27, 153, 908, 5293, 30051],
+    "late":       [1, 7, 17, 102, 354, 1851, 7089],
+    "solidarity": [1, 1, 4, 24, 86, 454, 1668],
+}
+
+
+def load_position(name: str) -> SongoGame:
+    packed = POSITIONS[name]
+    return SongoGame() if packed is None else SongoGame.from_key(bytes.fromhex(packed))
+
+
+# ─── Engine variants ──────────────────────────────────────────────────────────
+
+def perft_clone(game: SongoGame, depth: int) -> int:
+    if depth == 0:
+        return 1
+    if game.is_terminal:
+        return 0
+    nodes = 0
+    for pit in game.get_valid_moves():
+        child = game.clone()
+        child.execute_move(int(pit))
+        nodes += perft_clone(child, depth - 1)
+    return nodes
+
+
+def perft_undo(game: SongoGame, depth: int) -> int:
+    if depth == 0:
+        return 1
+    if game.is_terminal:
+        return 0
+    if depth == 1:
+        return len(game.get_valid_moves())
+    nodes = 0
+    for pit in game.get_valid_moves():
+        record = game.execute_move_undoable(int(pit))
+        nodes += perft_undo(game, depth - 1)
+        game.undo_move(record)
+    return nodes
+
+
+def perft_batch(game: SongoGame, depth: int) -> int:
+    frontier = SongoBatch.from_games([game])
+    for _ in range(depth):
+        rows, actions = np.nonzero(frontier.valid_moves_mask())
+        if rows.size == 0:
+            return 0
+        frontier = frontier.take(rows)
+        frontier.execute_moves(actions)
+    return len(frontier)
+
+
+ENGINES: dict[str, Callable[[SongoGame, int], int]] = {
+    "clone": perft_clone,
+    "undo": perft_undo,
+    "batch": perft_batch,
+}
+
+
+# ─── Harness ──────────────────────────────────────────────────────────────────
+
+def run_perft(depth: int, positions: list[str], engines: list[str],
+              verbose: bool = True) -> dict:
+    """Run every (engine, position) pair; returns the report dict."""
+    results = []
+    for engine in engines:
+        fn = ENGINES[engine]
+        total_nodes, total_time = 0, 0.0
+        for name in positions:
+            game = load_position(name)
+            t0 = time.perf_counter()
+            nodes = fn(game, depth)
+            elapsed = time.perf_counter() - t0
+            known = KNOWN_TOTALS.get(name, [])
+            expected = known[depth] if depth < len(known) else None
+            ok = expected is None or nodes == expected
+            results.append({
+                "engine": engine, "position": name, "depth": depth,
+                "nodes": nodes, "expected": expected, "ok": ok,
+                "seconds": round(elapsed, 4),
+                "nodes_per_sec": round(nodes / elapsed, 1) if elapsed > 0 else None,
+            })
+            total_nodes += nodes
+            total_time += elapsed
+            if verbose:
+                status = "ok" if expected is not None and ok else ("??" if ok else "MISMATCH")
+                print(f"  {engine:6s} {name:11s} d={depth}  nodes={nodes:9d}  "
+                      f"{elapsed:7.3f}s  {nodes / max(elapsed, 1e-9):11,.0f} n/s  [{status}]")
+        if verbose:
+            print(f"  {engine:6s} {'TOTAL':11s}       nodes={total_nodes:9d}  "
+                  f"{total_time:7.3f}s  {total_nodes / max(total_time, 1e-9):11,.0f} n/s")
+
+    return {
+        "depth": depth,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "all_ok": all(r["ok"] for r in results),
+        "results": results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, timeout=10,
+                             cwd=Path(__file__).resolve().parent)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--depth", type=int, default=5)
+    p.add_argument("--positions", nargs="+", default=list(POSITIONS),
+                   choices=list(POSITIONS))
+    p.add_argument("--engines", nargs="+", default=list(ENGINES),
+                   choices=list(ENGINES))
+    p.add_argument("--json", type=str, default=None,
+                   help="write the report to this JSON file")
+    args = p.parse_args()
+
+    print(f"[PERFT] depth={args.depth}  positions={len(args.positions)}  "
+          f"engines={','.join(args.engines)}")
+    report = run_perft(args.depth, args.positions, args.engines)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"[PERFT] report → {args.json}")
+    if not report["all_ok"]:
+        print("[PERFT] node counts differ from KNOWN_TOTALS")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
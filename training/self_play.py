@@ -9,14 +9,15 @@ Plays complete games using MCTS + NN, collecting training data:
 Key changes from v1:
 - Main process uses GPU with batched MCTS (much faster than CPU workers)
 - Parallel CPU workers available as fallback
-- ReplayBuffer can be persisted to disk
+- ReplayBuffer can be memory-mapped to disk and persisted incrementally
 """
+import json
 import os
 import pickle
 import numpy as np
 import multiprocessing as mp
 from concurrent.futures import ProcessPoolExecutor, as_completed
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from tqdm import tqdm
 
 from songo_game import SongoGame
@@ -65,6 +66,35 @@ def _worker_play_games(
     return samples, game_results
 
 
+def _worker_play_games_served(
+    client,
+    mcts_config: MCTSConfig,
+    num_games: int,
+    batch_size: int,
+    use_symmetry: bool,
+    results,
+):
+    """
+    Worker for self-play behind an inference server: runs the tree search
+    only, sending leaf batches through `client`. Puts (samples, game_results)
+    on `results`.
+    """
+    import torch
+    torch.set_num_threads(1)
+    engine = MCTS(None, mcts_config, device="cpu", batch_size=batch_size,
+                  use_symmetry=use_symmetry, inference=client)
+    samples: List[TrainingSample] = []
+    game_results = {0: 0, 1: 0, -1: 0}
+    try:
+        for _ in range(num_games):
+            game_samples, winner = play_self_play_game(engine, mcts_config)
+            samples.extend(game_samples)
+            game_results[winner if winner in (0, 1) else -1] += 1
+        results.put((samples, game_results))
+    finally:
+        client.close()
+
+
 def play_self_play_game(
     mcts_engine: MCTS,
     config: MCTSConfig,
@@ -133,6 +163,7 @@ def generate_self_play_data(
     network_config: NetworkConfig = None,
     batch_size: int = 16,
     use_symmetry: bool = True,
+    inference_server: bool = False,
 ) -> List[TrainingSample]:
     """
     Generate training data from self-play games.
@@ -141,8 +172,16 @@ def generate_self_play_data(
     - num_workers > 1: parallel CPU workers (best for Python-heavy MCTS)
       Each worker gets its own model copy on CPU. Linear speedup with cores.
       The GPU is NOT the bottleneck — Python tree operations are.
+    - num_workers > 1 and inference_server: workers only search; one server
+      process owns the model on `device` and batches leaves across workers.
     - num_workers <= 1: single-process on specified device (GPU or CPU)
     """
+    if num_workers > 1 and inference_server:
+        return _generate_served(
+            model, num_games, mcts_config, num_workers, device,
+            show_progress, batch_size, use_symmetry
+        )
+
     # Parallel CPU workers: use all cores for MCTS tree operations
     if num_workers > 1:
         return _generate_parallel(
@@ -206,6 +245,8 @@ def _generate_gpu(
     print(f"[Self-Play] Results: P1={game_results[0]} P2={game_results[1]} Draw={game_results[-1]}")
     actual_games = sum(game_results.values())
     print(f"[Self-Play] Avg game length: {total_moves / max(actual_games, 1):.1f} samples/game")
+    print(f"[Self-Play] Leaf batches: {mcts_engine.stats['batches']}, "
+          f"{mcts_engine.wasted_slot_fraction():.1%} of slots lost to colliding selections")
 
     return all_samples
 
@@ -281,60 +322,241 @@ def _generate_parallel(
     return all_samples
 
 
+def _generate_served(
+    model: SongoNet,
+    num_games: int,
+    mcts_config: MCTSConfig,
+    num_workers: int,
+    device: str,
+    show_progress: bool,
+    batch_size: int,
+    use_symmetry: bool,
+) -> List[TrainingSample]:
+    """Parallel self-play: CPU search workers + one batched inference server."""
+    import queue
+    from inference_server import InferenceServer
+
+    base = num_games // num_workers
+    remainder = num_games % num_workers
+    games_per_worker = [base + (1 if i < remainder else 0) for i in range(num_workers)]
+    games_per_worker = [n for n in games_per_worker if n > 0]
+    actual_workers = len(games_per_worker)
+
+    print(f"[Self-Play] Inference-server mode: {actual_workers} search workers "
+          f"x ~{games_per_worker[0]} games, model on {device}")
+
+    # Symmetry doubles the states of each leaf batch.
+    server = InferenceServer(model, input_shape=(80,), num_clients=actual_workers,
+                             device=device,
+                             max_leaves=batch_size * (2 if use_symmetry else 1))
+    ctx = mp.get_context('spawn')
+    results = ctx.Queue()
+    clients = server.start()
+    workers = [
+        ctx.Process(target=_worker_play_games_served,
+                    args=(client, mcts_config, n, batch_size, use_symmetry, results))
+        for client, n in zip(clients, games_per_worker)
+    ]
+    for w in workers:
+        w.start()
+
+    all_samples: List[TrainingSample] = []
+    total_moves = 0
+    games_done = 0
+    total_results = {0: 0, 1: 0, -1: 0}
+    bar = tqdm(total=num_games, desc="Self-play (server)", unit="game") if show_progress else None
+    try:
+        while games_done < num_games:
+            try:
+                batch_samples, batch_results = results.get(timeout=1.0)
+            except queue.Empty:
+                server.check()
+                failed = [w for w in workers if w.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"self-play worker exited with code {failed[0].exitcode}")
+                continue
+            batch_games = sum(batch_results.values())
+            all_samples.extend(batch_samples)
+            total_moves += len(batch_samples)
+            games_done += batch_games
+            for k, v in batch_results.items():
+                total_results[k] += v
+            if bar is not None:
+                bar.update(batch_games)
+                bar.set_postfix({
+                    'samples': len(all_samples),
+                    'avg_len': f'{total_moves / max(games_done, 1):.0f}',
+                    'P1': total_results[0],
+                    'P2': total_results[1],
+                    'D': total_results[-1],
+                })
+        for w in workers:
+            w.join()
+    finally:
+        for w in workers:
+            if w.is_alive():
+                w.terminate()
+        server.stop()
+        if bar is not None:
+            bar.close()
+
+    print(f"\n[Self-Play] Generated {len(all_samples)} samples from {num_games} games")
+    print(f"[Self-Play] Results: P1={total_results[0]} P2={total_results[1]} Draw={total_results[-1]}")
+    print(f"[Self-Play] Avg game length: {total_moves / num_games:.1f} samples/game")
+    if server.stats:
+        print(f"[Self-Play] Inference server: {server.stats['forwards']} forwards, "
+              f"mean batch {server.stats['mean_batch']:.1f}")
+
+    return all_samples
+
+
+def stack_samples(
+    samples: List[TrainingSample],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(states (n, 80), policies (n, 7), values (n,)) float32 arrays of a
+    list of samples, ready for `ReplayBuffer.add`."""
+    if not samples:
+        return (np.zeros((0, NetworkConfig.input_size), dtype=np.float32),
+                np.zeros((0, 7), dtype=np.float32), np.zeros(0, dtype=np.float32))
+    states, policies, values = zip(*samples)
+    return (np.asarray(states, dtype=np.float32), np.asarray(policies, dtype=np.float32),
+            np.asarray(values, dtype=np.float32))
+
+
 class ReplayBuffer:
-    """Fixed-size replay buffer with disk persistence."""
+    """
+    Fixed-size replay buffer with disk persistence.
 
-    def __init__(self, max_size: int = 150_000):
-        self.max_size = max_size
-        self.buffer: List[TrainingSample] = []
+    Samples live in preallocated float32 arrays (states (max_size,
+    state_size), policies (max_size, 7), values (max_size,)) used as a
+    ring: `cursor` is the next slot to write, so once full each `add`
+    overwrites the oldest samples in place.
 
-    def add(self, samples: List[TrainingSample]):
-        """Add samples to buffer, evicting oldest if full."""
-        self.buffer.extend(samples)
-        if len(self.buffer) > self.max_size:
-            self.buffer = self.buffer[-self.max_size:]
+    With a `path`, the arrays are memory-mapped `.npy` files in that
+    directory and `header.json` holds the cursor and size:
 
-    def sample_batch(self, batch_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        """Sample a random batch from the buffer."""
-        indices = np.random.choice(
-            len(self.buffer),
-            size=min(batch_size, len(self.buffer)),
-            replace=False
-        )
+        path/states.npy  policies.npy  values.npy  header.json
+
+    `add` writes new samples straight into the mapped files and `flush`
+    makes them durable, so persisting costs only the new rows, and
+    reopening the directory is instant and loads samples lazily.
+    """
 
-        states = np.array([self.buffer[i][0] for i in indices], dtype=np.float32)
-        policies = np.array([self.buffer[i][1] for i in indices], dtype=np.float32)
-        values = np.array([self.buffer[i][2] for i in indices], dtype=np.float32)
+    ARRAYS = ("states", "policies", "values")
+    HEADER = "header.json"
 
-        return states, policies, values
+    def __init__(self, max_size: int = 150_000, state_size: int = NetworkConfig.input_size,
+                 seed: Optional[int] = None, path: Optional[str] = None):
+        self.max_size = max_size
+        self.state_size = state_size
+        self.path = path
+        self.cursor = 0
+        self.size = 0
+        self._rng = np.random.default_rng(seed)
+        if path is None:
+            for name, shape in self._shapes().items():
+                setattr(self, name, np.zeros(shape, dtype=np.float32))
+        else:
+            self._open(path)
+
+    def _shapes(self) -> dict:
+        return {"states": (self.max_size, self.state_size),
+                "policies": (self.max_size, 7), "values": (self.max_size,)}
+
+    def _open(self, path: str):
+        """Map the buffer stored in `path`, or create it. A buffer saved
+        with another shape is rewritten at this one, keeping its newest
+        samples."""
+        os.makedirs(path, exist_ok=True)
+        files = {name: os.path.join(path, f"{name}.npy") for name in self.ARRAYS}
+        header_path = os.path.join(path, self.HEADER)
+        header = None
+        if os.path.exists(header_path) and all(os.path.exists(f) for f in files.values()):
+            with open(header_path) as f:
+                header = json.load(f)
+        if (header is not None and header["max_size"] == self.max_size
+                and header["state_size"] == self.state_size):
+            for name, file in files.items():
+                setattr(self, name, np.load(file, mmap_mode="r+"))
+            self.cursor, self.size = header["cursor"], header["size"]
+            print(f"[ReplayBuffer] Mapped {len(self)} samples from {path}")
+            return
+
+        old = None
+        if header is not None:
+            old_arrays = [np.load(files[name], mmap_mode="r") for name in self.ARRAYS]
+            order = self._oldest_first(header["cursor"], header["size"], len(old_arrays[2]))
+            old = [arr[order] for arr in old_arrays]
+            del old_arrays
+        for name, shape in self._shapes().items():
+            setattr(self, name, np.lib.format.open_memmap(
+                files[name], mode="w+", dtype=np.float32, shape=shape))
+        if old is not None and old[0].shape[1:] == (self.state_size,):
+            self.add(*old)
+        self.flush()
+
+    @staticmethod
+    def _oldest_first(cursor: int, size: int, capacity: int) -> np.ndarray:
+        """Slots of a ring's samples from oldest to newest."""
+        if size < capacity:
+            return np.arange(size)
+        return (cursor + np.arange(capacity)) % capacity
+
+    def add(self, states: np.ndarray, policies: np.ndarray, values: np.ndarray):
+        """Add stacked samples (see `stack_samples`), evicting the oldest
+        if full."""
+        n = len(states)
+        if n == 0:
+            return
+        if n > self.max_size:
+            states, policies, values = (states[-self.max_size:], policies[-self.max_size:],
+                                        values[-self.max_size:])
+            n = self.max_size
+        slots = (self.cursor + np.arange(n)) % self.max_size
+        self.states[slots] = states
+        self.policies[slots] = policies
+        self.values[slots] = values
+        self.cursor = (self.cursor + n) % self.max_size
+        self.size = min(self.size + n, self.max_size)
 
-    def save(self, path: str):
-        """Persist replay buffer to disk."""
-        os.makedirs(os.path.dirname(path) if os.path.dirname(path) else '.', exist_ok=True)
-        with open(path, 'wb') as f:
-            pickle.dump({
-                'buffer': self.buffer,
-                'max_size': self.max_size,
-            }, f, protocol=pickle.HIGHEST_PROTOCOL)
-        print(f"[ReplayBuffer] Saved {len(self.buffer)} samples to {path}")
+    def sample_batch(self, batch_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Sample a random batch from the buffer (without replacement)."""
+        indices = self._rng.choice(self.size, size=min(batch_size, self.size), replace=False)
+        return self.states[indices], self.policies[indices], self.values[indices]
+
+    def flush(self):
+        """Write the samples added since the last flush, then the header,
+        to the buffer's directory (no-op without a `path`)."""
+        if self.path is None:
+            return
+        for name in self.ARRAYS:
+            getattr(self, name).flush()
+        header_path = os.path.join(self.path, self.HEADER)
+        with open(header_path + ".tmp", "w") as f:
+            json.dump({"max_size": self.max_size, "state_size": self.state_size,
+                       "cursor": self.cursor, "size": self.size}, f)
+        os.replace(header_path + ".tmp", header_path)
 
     def load(self, path: str) -> bool:
-        """Load replay buffer from disk. Returns True if loaded successfully."""
+        """Add the samples of the `replay_buffer.pkl` of earlier versions
+        (a list of (state, policy, value) tuples, oldest first). Returns
+        True if loaded successfully."""
         if not os.path.exists(path):
             return False
         try:
             with open(path, 'rb') as f:
                 data = pickle.load(f)
-            self.buffer = data['buffer']
-            self.max_size = data.get('max_size', self.max_size)
-            print(f"[ReplayBuffer] Loaded {len(self.buffer)} samples from {path}")
+            stacked = stack_samples(data['buffer'])
+            self.add(*stacked)
+            self.flush()
+            print(f"[ReplayBuffer] Loaded {len(stacked[2])} samples from {path}")
             return True
         except Exception as e:
             print(f"[ReplayBuffer] Failed to load {path}: {e}")
             return False
 
     def __len__(self):
-        return len(self.buffer)
+        return self.size
 
 
 if __name__ == "__main__":
@@ -21,40 +21,229 @@ Usage:
     python self_play_v3.py \
         --checkpoint checkpoints/pretrain-v3/model_best.pt \
         --games 100 --sims 200 --out data/selfplay-v3.npz
+
+    # 8 games in lockstep, one forward pass per step for all of them
+    python self_play_v3.py --games 100 --parallel-games 8 --leaf-batch 32
+
+    # 4 search processes feeding one inference server
+    python self_play_v3.py --games 100 --workers 4 --parallel-games 4
 """
 from __future__ import annotations
 import argparse
 import math
+import multiprocessing as mp
 import os
+import queue
 import time
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Generator, Optional
 
 import numpy as np
 import torch
 
 from songo_game import SongoGame
 from network_v3 import SongoNetV3, NetworkV3Config
-from encoding_v3 import StateView, encode
+from encoding_v3 import StateView, encode, encode_arrays, encode_arrays_torch
+from transposition import TranspositionTable
+from eval_cache import EvalCache
+from egtb_probe import EgtbProbe
+from inference_server import InferenceServer, InferenceClient
 
 
 # ─── PUCT MCTS ────────────────────────────────────────────────────────────────
 
-class MctsNode:
-    __slots__ = ("prior", "children", "visits", "value_sum",
-                 "legal_mask", "terminal_value", "is_expanded")
-
-    def __init__(self, prior: float = 0.0):
-        self.prior = prior
-        self.children: dict[int, "MctsNode"] = {}   # pit_rel -> child
-        self.visits = 0
-        self.value_sum = 0.0
-        self.legal_mask: np.ndarray | None = None   # (7,) bool
-        self.terminal_value: float | None = None    # None if not terminal
-        self.is_expanded = False
-
-    def q(self) -> float:
-        return 0.0 if self.visits == 0 else self.value_sum / self.visits
+ROOT = 0  # node id of the search root
+
+
+class MctsTree:
+    """
+    Array-backed PUCT tree (struct of arrays), indexed by integer node ids.
+
+    Node 0 is the root. Expanding a node reserves a block of 7 consecutive
+    ids, one per relative action, starting at `first_child[node]`; slots of
+    illegal actions keep prior 0 and are never selected. Statistics of a
+    node are from the perspective of the player to move at that node.
+    `bias` is 0 for a legal child slot and -inf for an illegal one, so PUCT
+    can rank all 7 slots without a separate mask.
+
+    The arrays are allocated once and `reset()` between moves; they only
+    grow (doubling) if a search outruns the capacity.
+
+    With a `table`, every node on a simulated path is linked (`row`) to the
+    transposition-table row of its position. The tree's own visits then act
+    as edge counts (exploration term, visit policy, reuse budget) while Q
+    is read from the shared row.
+    """
+
+    def __init__(self, capacity: int = 1 + 7 * 256,
+                 table: TranspositionTable | None = None):
+        self.table = table
+        self.capacity = 0
+        self.size = 0
+        self.prior = np.zeros(0)
+        self.visits = np.zeros(0)
+        self.value_sum = np.zeros(0)
+        self.first_child = np.zeros(0, dtype=np.int64)
+        self.legal = np.zeros((0, 7), dtype=bool)
+        self.bias = np.zeros(0)
+        self.terminal_value = np.zeros(0)
+        self.row = np.zeros(0, dtype=np.int64)
+        self._grow(capacity)
+        self.reset()
+
+    def _grow(self, capacity: int):
+        def grown(arr: np.ndarray, fill) -> np.ndarray:
+            out = np.full((capacity,) + arr.shape[1:], fill, dtype=arr.dtype)
+            out[:self.capacity] = arr
+            return out
+        self.prior = grown(self.prior, 0.0)
+        self.visits = grown(self.visits, 0.0)
+        self.value_sum = grown(self.value_sum, 0.0)
+        self.first_child = grown(self.first_child, -1)
+        self.legal = grown(self.legal, False)
+        self.bias = grown(self.bias, 0.0)
+        self.terminal_value = grown(self.terminal_value, np.nan)
+        self.row = grown(self.row, 0)
+        self.capacity = capacity
+
+    def reset(self):
+        """Drop the whole tree but a fresh root, reusing the arrays."""
+        self._clear(0, max(self.size, 1))
+        self.size = 1
+        if self.table is not None:
+            self.table.new_search()
+
+    def _clear(self, lo: int, hi: int):
+        self.prior[lo:hi] = 0.0
+        self.visits[lo:hi] = 0.0
+        self.value_sum[lo:hi] = 0.0
+        self.first_child[lo:hi] = -1
+        self.legal[lo:hi] = False
+        self.bias[lo:hi] = 0.0
+        self.terminal_value[lo:hi] = np.nan
+        self.row[lo:hi] = 0
+
+    def reroot(self, node: int):
+        """
+        Make `node` the new root, keeping its subtree (with all statistics)
+        and dropping everything else. The subtree is compacted in place,
+        breadth first, one vectorized gather per array.
+        """
+        src = [np.array([node])]
+        first_child = []
+        next_id = 1
+        frontier = src[0]
+        while frontier.size:
+            fc = self.first_child[frontier]
+            expanded = fc >= 0
+            starts = np.full(frontier.size, -1, dtype=np.int64)
+            starts[expanded] = next_id + 7 * np.arange(int(expanded.sum()))
+            first_child.append(starts)
+            frontier = (fc[expanded, None] + np.arange(7)).ravel()
+            src.append(frontier)
+            next_id += frontier.size
+        src = np.concatenate(src)
+        n = src.size
+        for arr in (self.prior, self.visits, self.value_sum,
+                    self.legal, self.bias, self.terminal_value, self.row):
+            arr[:n] = arr[src]
+        self.first_child[:n] = np.concatenate(first_child)
+        self._clear(n, self.size)
+        self.size = n
+        if self.table is not None:
+            rows = self.row[:n]
+            self.table.new_search(protect=rows[rows > 0])
+
+    # ─── Node state ───────────────────────────────────────────────────────
+
+    def is_expanded(self, node: int) -> bool:
+        return self.first_child[node] >= 0 or self.is_terminal(node)
+
+    def is_terminal(self, node: int) -> bool:
+        return not math.isnan(self.terminal_value[node])
+
+    def q(self, node: int) -> float:
+        if self.table is not None and self.row[node] > 0:
+            return self.table.q(self.row[node])
+        n = self.visits[node]
+        return 0.0 if n == 0 else float(self.value_sum[node] / n)
+
+    def child(self, node: int, rel: int) -> int:
+        return int(self.first_child[node]) + rel
+
+    def child_visits(self, node: int) -> np.ndarray:
+        """(7,) visit counts of `node`'s children (zeros if unexpanded)."""
+        base = self.first_child[node]
+        if base < 0:
+            return np.zeros(7)
+        return self.visits[base:base + 7].copy()
+
+    # ─── Mutation ─────────────────────────────────────────────────────────
+
+    def expand(self, node: int, priors: np.ndarray, legal: np.ndarray):
+        """Attach 7 child slots to `node` with the given (masked) priors."""
+        base = self.size
+        if base + 7 > self.capacity:
+            self._grow(2 * self.capacity)
+        self.first_child[node] = base
+        self.legal[node] = legal
+        self.prior[base:base + 7] = np.where(legal, priors, 0.0)
+        self.bias[base:base + 7] = np.where(legal, 0.0, -np.inf)
+        self.size = base + 7
+
+    def set_terminal(self, node: int, value: float):
+        self.terminal_value[node] = value
+
+    def link(self, node: int, key: int) -> int:
+        """Transposition-table row of `node`, whose position has `key`."""
+        if self.row[node] == 0:
+            self.row[node] = self.table.link(key)
+        return int(self.row[node])
+
+    def add_virtual_loss(self, node: int, vloss: float):
+        self.visits[node] += vloss
+        self.value_sum[node] += vloss
+        if self.table is not None:
+            row = self.row[node]
+            self.table.visits[row] += vloss
+            self.table.value_sum[row] += vloss
+
+    def backup(self, path: list[int], leaf_value: float, vloss: float = 0.0):
+        """
+        Undo `vloss` and add `leaf_value` (from the leaf mover's view) along
+        `path`, flipping sign per level. A position met twice on one path
+        is updated once in the table, with the value of its occurrence
+        nearest the leaf; its virtual loss is undone once per occurrence.
+        """
+        nodes = np.asarray(path)
+        signed = np.where(np.arange(len(path))[::-1] % 2 == 0, leaf_value, -leaf_value)
+        self.visits[nodes] += 1 - vloss
+        self.value_sum[nodes] += signed - vloss
+        if self.table is not None:
+            # Fancy-index `+=` applies once per distinct row, so dedupe first
+            rows, first, count = np.unique(self.row[nodes][::-1], return_index=True,
+                                           return_counts=True)
+            self.table.visits[rows] += 1 - vloss * count
+            self.table.value_sum[rows] += signed[::-1][first] - vloss * count
+
+    def select(self, node: int, c_puct: float) -> int:
+        """PUCT over the 7 child slots: argmax of -Q(child) + U(child)."""
+        base = self.first_child[node]
+        end = base + 7
+        visits = self.visits[base:end]
+        score = self.prior[base:end] * (c_puct * math.sqrt(max(1.0, self.visits[node])))
+        score /= 1 + visits
+        # A child's Q is from the opponent's perspective, hence the sign flip.
+        # Unvisited children have value_sum 0, so Q = 0 there.
+        if self.table is None:
+            score -= self.value_sum[base:end] / (visits + (visits == 0))
+        else:
+            rows = self.row[base:end]
+            shared = self.table.visits[rows]
+            score -= self.table.value_sum[rows] / (shared + (shared == 0))
+        score += self.bias[base:end]
+        return int(score.argmax())
 
 
 def state_view_of(game: SongoGame) -> StateView:
@@ -78,6 +267,55 @@ def terminal_value_from_mover(game: SongoGame, mover: int) -> float:
     return 1.0 if game.winner == mover else -1.0
 
 
+def _masked_prior(policy: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Zero out illegal move probs and renormalize."""
+    masked = policy * mask.astype(np.float32)
+    s = masked.sum()
+    if s > 1e-8:
+        return masked / s
+    # Uniform over legal moves if priors are all on illegal
+    return mask.astype(np.float32) / max(mask.sum(), 1)
+
+
+class _LeafBatch:
+    """
+    Leaves waiting for one batched forward pass, from one or several trees.
+    Leaves on the same position (when keys are computed) share an
+    evaluation: `paths` holds (tree, path, eval index) per descent, the
+    other lists one entry per evaluation.
+    """
+
+    def __init__(self):
+        self.paths: list[tuple[MctsTree, list[int], int]] = []
+        self.keys: dict[int, int] = {}       # position key -> eval index
+        self.boards: list[np.ndarray] = []
+        self.scores: list[np.ndarray] = []
+        self.cp: list[int] = []
+        self.sm: list[bool] = []
+        self.masks: list[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self.boards)
+
+
+# Root search as a generator of (want, root_actions) collection steps,
+# returning (rel, policy) — see `SelfPlayEngine._puct_steps`.
+SearchSteps = Generator[tuple[int, Optional[list[int]]], None,
+                        tuple[Optional[int], Optional[np.ndarray]]]
+
+
+@dataclass
+class _GameSlot:
+    """A game in progress in `play_games_lockstep`."""
+    index: int
+    game: SongoGame
+    tree: MctsTree
+    records: list[dict]
+    plies: int = 0
+    search: Optional[SearchSteps] = None    # current move's search, if started
+    full_search: bool = True
+
+
 @dataclass
 class MctsConfig:
     num_simulations: int = 200
@@ -90,47 +328,110 @@ class MctsConfig:
     temperature_threshold: int = 15
     # Safety
     max_game_plies: int = 300
-    # Batched MCTS (used only by play_game_batched)
+    # Playout-cap randomization: each ply runs the full `num_simulations`
+    # search with probability `full_search_prob` (and yields a training
+    # record), else a `fast_simulations` search without root noise that
+    # only picks the move.
+    full_search_prob: float = 1.0
+    fast_simulations: int = 25
+    # Skip the search of forced moves (one legal move), and stop a PUCT
+    # search once the visit argmax cannot change — only on plies whose
+    # visit counts are not a training target (fast plies, arena).
+    early_stop: bool = True
+    # Leaves selected per forward pass, in every search mode
     leaf_batch_size: int = 32
     virtual_loss: float = 1.0
+    # Keep the subtree of the move played; its visits count toward the
+    # next search's `num_simulations`.
+    reuse_tree: bool = True
+    # Transposition table size (positions); 0 disables it.
+    transposition_entries: int = 0
+    # Network evaluation cache size (positions); 0 disables it. Ignored
+    # when the engine is given a shared `eval_cache`.
+    eval_cache_entries: int = 0
+    # Directory of uncompressed endgame tablebase layers (engine-rs
+    # `egtb_gen --no-compress`); leaves they cover are backed up with their
+    # exact value instead of a network evaluation. Ignored when the engine
+    # is given an `egtb` probe.
+    egtb_dir: Optional[str] = None
+    # Root search: "puct" (Dirichlet noise, visit-count target, temperature
+    # sampling) or "gumbel" (Gumbel-top-k + sequential halving, completed-Q
+    # target; the temperature schedule and Dirichlet noise are unused).
+    root_search: str = "puct"
+    gumbel_considered: int = 7       # m, root actions sampled (≤ 7)
+    gumbel_c_visit: float = 50.0
+    gumbel_c_scale: float = 0.1
 
 
 class SelfPlayEngine:
-    def __init__(self, model: SongoNetV3, device: str, cfg: MctsConfig):
-        self.model = model
-        self.model.eval()
+    def __init__(self, model: SongoNetV3, device: str, cfg: MctsConfig,
+                 eval_cache: EvalCache | None = None, model_version: int = 0,
+                 inference: InferenceClient | None = None,
+                 egtb: EgtbProbe | None = None):
+        if cfg.root_search not in ("puct", "gumbel"):
+            raise ValueError(f"unknown root_search {cfg.root_search!r}")
+        self.model = model.eval() if model is not None else None
         self.device = device
+        # Forward passes go to a shared inference server when given one
+        # (`model` may then be None).
+        self.inference = inference
         self.cfg = cfg
+        # Network outputs keyed by (model_version, position key); may be
+        # shared with other engines running the same weights.
+        if eval_cache is None and cfg.eval_cache_entries > 0:
+            eval_cache = EvalCache(cfg.eval_cache_entries)
+        self.eval_cache = eval_cache
+        self.model_version = model_version
+        if egtb is None and cfg.egtb_dir:
+            egtb = EgtbProbe(cfg.egtb_dir)
+        self.egtb = egtb
+        # Search tree, re-rooted or reset (not reallocated) after every move.
+        table = (TranspositionTable(cfg.transposition_entries)
+                 if cfg.transposition_entries > 0 else None)
+        self.tree = MctsTree(table=table)
+        # One tree per concurrent game of `play_games_lockstep`; trees[0] is
+        # `self.tree`.
+        self.trees = [self.tree]
+        # Simulations run / inherited from the previous move's tree / skipped
+        # by early stopping and forced moves.
+        self.stats = {"sims": 0, "sims_reused": 0, "sims_saved": 0}
 
     @torch.no_grad()
     def _nn_eval(self, game: SongoGame) -> tuple[np.ndarray, float]:
         """Return (policy probs over 7 rel actions, value estimate from mover)."""
+        if self.eval_cache is not None:
+            key = game.key()
+            hit = self.eval_cache.get(self.model_version, key)
+            if hit is not None:
+                return hit
         view = state_view_of(game)
         x = encode(view)
-        xt = torch.from_numpy(x).unsqueeze(0).to(self.device)
-        out = self.model(xt)
-        log_p = torch.log_softmax(out["policy"], dim=1).squeeze(0)
-        p = torch.exp(log_p).cpu().numpy()
-        v = float(out["value"].item())
+        if self.inference is not None:
+            ps, vs = self.inference.evaluate(x[None])
+            p, v = ps[0], float(vs[0])
+        else:
+            xt = torch.from_numpy(x).unsqueeze(0).to(self.device)
+            out = self.model(xt)
+            log_p = torch.log_softmax(out["policy"], dim=1).squeeze(0)
+            p = torch.exp(log_p).cpu().numpy()
+            v = float(out["value"].item())
+        if self.eval_cache is not None:
+            self.eval_cache.put(self.model_version, key, p, v)
         return p, v
 
     def _legal_mask(self, game: SongoGame) -> np.ndarray:
-        valid = game.get_valid_moves()
-        start = 0 if game.current_player == 0 else 7
-        mask = np.zeros(7, dtype=bool)
-        for abs_pit in valid:
-            rel = int(abs_pit) - start
-            if 0 <= rel < 7:
-                mask[rel] = True
-        return mask
-
-    def _expand(self, node: MctsNode, game: SongoGame) -> float:
-        """Expand a leaf node. Returns value estimate from mover's perspective."""
+        return game.get_valid_moves_mask() > 0
+
+    def _expand(self, tree: MctsTree, node: int, game: SongoGame,
+                evaluation: tuple[np.ndarray, float] | None = None) -> float:
+        """Expand a leaf node. Returns value estimate from mover's perspective.
+        `evaluation` is a (policy, value) already known for the position,
+        whose transposition-table row the caller has already looked up."""
+        row = tree.link(node, game.key()) if tree.table is not None else 0
         # Check terminal
         if game.is_terminal:
             v = terminal_value_from_mover(game, game.current_player)
-            node.terminal_value = v
-            node.is_expanded = True
+            tree.set_terminal(node, v)
             return v
 
         mask = self._legal_mask(game)
@@ -142,86 +443,106 @@ class SelfPlayEngine:
                 v = 1.0 if game.current_player == 0 else -1.0
             elif game.scores[1] > game.scores[0]:
                 v = 1.0 if game.current_player == 1 else -1.0
-            node.terminal_value = v
-            node.is_expanded = True
+            tree.set_terminal(node, v)
             return v
 
-        policy, value = self._nn_eval(game)
-        # Zero out illegal move probs and renormalize
-        masked = policy * mask.astype(np.float32)
-        s = masked.sum()
-        if s > 1e-8:
-            masked = masked / s
-        else:
-            # Uniform over legal moves if priors are all on illegal
-            masked = mask.astype(np.float32) / max(mask.sum(), 1)
-
-        node.legal_mask = mask
-        node.is_expanded = True
-        for rel in range(7):
-            if mask[rel]:
-                node.children[rel] = MctsNode(prior=float(masked[rel]))
-        return value
-
-    def _select_child(self, node: MctsNode) -> int:
-        """PUCT: argmax of Q + c * prior * sqrt(sum_visits) / (1 + visits)."""
-        total_visits_sqrt = math.sqrt(max(1, node.visits))
-        c = self.cfg.c_puct
-        best_score = -1e9
-        best_rel = -1
-        for rel, child in node.children.items():
-            u = c * child.prior * total_visits_sqrt / (1 + child.visits)
-            score = child.q() + u
-            if score > best_score:
-                best_score = score
-                best_rel = rel
-        return best_rel
-
-    def _simulate(self, root: MctsNode, root_game: SongoGame):
-        """Run one MCTS simulation from the root."""
-        node = root
-        game = root_game.clone()
-        path: list[MctsNode] = [node]
-
-        # Selection
-        while node.is_expanded and node.terminal_value is None:
-            rel = self._select_child(node)
-            mover_start = 0 if game.current_player == 0 else 7
-            game.execute_move(mover_start + rel)
-            node = node.children[rel]
-            path.append(node)
-
-        # Expansion + evaluation
-        value_for_leaf_mover = self._expand(node, game)
+        v = self._solve_egtb(tree, node, game)
+        if v is not None:
+            return v
 
-        # Backprop: alternating sign per level (each edge switches mover)
-        # The leaf node's value is from leaf's mover perspective.
-        # The parent stores this edge's value from PARENT's mover perspective,
-        # which is the opposite because playing the move flipped turn.
-        v = value_for_leaf_mover
-        for n in reversed(path):
-            n.visits += 1
-            n.value_sum += v
-            v = -v
+        if row and evaluation is None:
+            cached = tree.table.lookup(row)
+            if cached is not None:
+                prior, legal, value = cached
+                tree.expand(node, prior, legal)
+                return value
+
+        policy, value = evaluation if evaluation is not None else self._nn_eval(game)
+        prior = _masked_prior(policy, mask)
+        tree.expand(node, prior, mask)
+        if row:
+            tree.table.store(row, prior, mask, value)
+        return value
 
-    def _root_dirichlet(self, root: MctsNode):
+    def _solve_egtb(self, tree: MctsTree, node: int, game: SongoGame) -> float | None:
+        """Exact value of a tablebase position from the mover's perspective,
+        marking `node` terminal; None if not covered. The root is never
+        solved: its moves still have to be searched."""
+        if self.egtb is None or node == ROOT:
+            return None
+        v = self.egtb.probe(game)
+        if v is not None:
+            tree.set_terminal(node, v)
+        return v
+
+    def _select_child(self, tree: MctsTree, node: int) -> int:
+        """PUCT: argmax of -Q(child) + c * prior * sqrt(sum_visits) / (1 + visits)."""
+        return tree.select(node, self.cfg.c_puct)
+
+    def _simulate(self, tree: MctsTree, game: SongoGame):
+        """
+        Run one MCTS simulation from the root. `game` is the root position; it
+        is walked down the tree with make/unmake and restored before returning.
+        """
+        node = ROOT
+        path = [node]
+        undo = []
+
+        try:
+            # Selection
+            while tree.is_expanded(node) and not tree.is_terminal(node):
+                rel = self._select_child(tree, node)
+                mover_start = 0 if game.current_player == 0 else 7
+                undo.append(game.execute_move_undoable(mover_start + rel))
+                node = tree.child(node, rel)
+                if tree.table is not None:
+                    tree.link(node, game.key())
+                path.append(node)
+
+            # Expansion + evaluation
+            value_for_leaf_mover = self._expand(tree, node, game)
+        finally:
+            for record in reversed(undo):
+                game.undo_move(record)
+
+        # Backprop: alternating sign per level (each edge switches mover).
+        # Every node stores values from its own mover's perspective.
+        self._backprop(tree, path, value_for_leaf_mover, 0.0)
+
+    def _root_dirichlet(self, tree: MctsTree):
         """Inject Dirichlet noise at root to encourage exploration."""
-        legal = [rel for rel, _ in root.children.items()]
-        if not legal:
+        legal = np.flatnonzero(tree.legal[ROOT])
+        if legal.size == 0:
             return
-        noise = np.random.dirichlet([self.cfg.dirichlet_alpha] * len(legal))
+        noise = np.random.dirichlet([self.cfg.dirichlet_alpha] * legal.size)
         eps = self.cfg.dirichlet_epsilon
-        for i, rel in enumerate(legal):
-            child = root.children[rel]
-            child.prior = (1 - eps) * child.prior + eps * float(noise[i])
+        slots = tree.first_child[ROOT] + legal
+        tree.prior[slots] = (1 - eps) * tree.prior[slots] + eps * noise
+
+    def _search_budget(self, tree: MctsTree, sims: int) -> int:
+        """Simulations still to run at the root, after the reused ones."""
+        reused = int(round(tree.visits[ROOT]))
+        remaining = max(0, sims - reused)
+        self.stats["sims_reused"] += min(reused, sims)
+        self.stats["sims"] += remaining
+        return remaining
+
+    def _advance(self, tree: MctsTree, rel: int):
+        """Move the root to the child played (or start afresh)."""
+        if self.cfg.reuse_tree and tree.first_child[ROOT] >= 0:
+            tree.reroot(tree.child(ROOT, rel))
+        else:
+            tree.reset()
 
     # ─── Batched MCTS (virtual loss) ─────────────────────────────────────
 
     @torch.no_grad()
-    def _nn_eval_batch(self, games: list[SongoGame]) -> tuple[np.ndarray, np.ndarray]:
-        """Batched evaluation. Returns (policies (B, 7), values (B,)) as np.float32."""
-        xs = np.stack([encode(state_view_of(g)) for g in games], axis=0)
-        xt = torch.from_numpy(xs).to(self.device)
+    def _nn_eval_batch(self, xs: np.ndarray | torch.Tensor) -> tuple[np.ndarray, np.ndarray]:
+        """Batched evaluation of encoded states (B, 16, 2, 7), numpy or torch.
+        Returns (policies (B, 7), values (B,)) as np.float32."""
+        if self.inference is not None:
+            return self.inference.evaluate(xs.cpu().numpy() if torch.is_tensor(xs) else xs)
+        xt = xs.to(self.device) if torch.is_tensor(xs) else torch.from_numpy(xs).to(self.device)
         out = self.model(xt)
         log_p = torch.log_softmax(out["policy"], dim=1)
         p = torch.exp(log_p).cpu().numpy().astype(np.float32)
@@ -229,142 +550,332 @@ class SelfPlayEngine:
         return p, v
 
     def _descend_virtual_loss(
-        self, root: MctsNode, root_game: SongoGame, vloss: float
-    ) -> tuple[list[MctsNode], SongoGame]:
+        self, tree: MctsTree, game: SongoGame, vloss: float,
+        root_action: int | None = None,
+    ) -> tuple[list[int], list]:
         """
         Walk from root down to a leaf (unexpanded or terminal), applying
         virtual loss to every visited node to discourage subsequent sims in
-        this batch from retracing the same path. Returns (path, game).
+        this batch from retracing the same path. `game` is advanced in place
+        along the path; returns (path, undo records) so the caller can
+        inspect the leaf position and then rewind it. `root_action` forces
+        the first step (Gumbel root search); PUCT selects below it.
         """
-        node = root
-        game = root_game.clone()
+        node = ROOT
         path = [node]
+        undo = []
         # Virtual loss on root as well — affects PUCT denominator for children.
-        node.visits += vloss
-        node.value_sum += vloss
-        while node.is_expanded and node.terminal_value is None:
-            rel = self._select_child(node)
+        tree.add_virtual_loss(node, vloss)
+        while tree.is_expanded(node) and not tree.is_terminal(node):
+            if node == ROOT and root_action is not None:
+                rel = root_action
+            else:
+                rel = self._select_child(tree, node)
             mover_start = 0 if game.current_player == 0 else 7
-            game.execute_move(mover_start + rel)
-            child = node.children[rel]
-            child.visits += vloss
-            child.value_sum += vloss
-            path.append(child)
-            node = child
-        return path, game
-
-    def _backprop(self, path: list[MctsNode], leaf_value_from_mover: float, vloss: float):
+            undo.append(game.execute_move_undoable(mover_start + rel))
+            node = tree.child(node, rel)
+            if tree.table is not None:
+                tree.link(node, game.key())
+            tree.add_virtual_loss(node, vloss)
+            path.append(node)
+        return path, undo
+
+    def _backprop(self, tree: MctsTree, path: list[int], leaf_value_from_mover: float,
+                  vloss: float):
         """Undo virtual loss and apply the real value (sign-flipped per level)."""
-        v = leaf_value_from_mover
-        for node in reversed(path):
-            node.visits += 1 - vloss
-            node.value_sum += v - vloss
-            v = -v
+        tree.backup(path, leaf_value_from_mover, vloss)
 
     def _run_batched_sims(
-        self, root: MctsNode, root_game: SongoGame, total_sims: int
+        self, tree: MctsTree, root_game: SongoGame, total_sims: int
     ):
         """Run `total_sims` MCTS simulations in batches, batching NN leaf
-        evaluations to amortise GPU dispatch overhead."""
-        vloss = self.cfg.virtual_loss
-        batch_size = self.cfg.leaf_batch_size
+        evaluations to amortise GPU dispatch overhead. `root_game` is walked
+        with make/unmake and left unchanged."""
         done = 0
         while done < total_sims:
-            remaining = total_sims - done
-            want = min(batch_size, remaining)
-            pending_paths: list[list[MctsNode]] = []
-            pending_games: list[SongoGame] = []
-
-            # Phase 1: collect `want` descents, resolve terminals immediately
-            for _ in range(want):
-                path, game = self._descend_virtual_loss(root, root_game, vloss)
+            want = min(self.cfg.leaf_batch_size, total_sims - done)
+            batch = _LeafBatch()
+            self._collect_leaves(tree, root_game, want, batch)
+            self._evaluate_leaves(batch)
+            done += want
+
+    def _collect_leaves(self, tree: MctsTree, root_game: SongoGame, want: int,
+                        batch: _LeafBatch, root_actions: list[int] | None = None):
+        """
+        Run `want` virtual-loss descents from the root of `tree`, the i-th
+        one through `root_actions[i]` if given. Leaves that need no network
+        call (terminal, tablebase, transposition, cache hit) are backed up at once; the
+        rest are encoded into `batch` while the game sits on them, then the
+        game is rewound.
+        """
+        vloss = self.cfg.virtual_loss
+        for i in range(want):
+            path, undo = self._descend_virtual_loss(
+                tree, root_game, vloss, None if root_actions is None else root_actions[i])
+            try:
                 leaf = path[-1]
-                if leaf.terminal_value is not None:
+                if tree.is_terminal(leaf):
                     # Terminal already classified — apply stored value directly
-                    self._backprop(path, leaf.terminal_value, vloss)
-                    done += 1
-                elif leaf.is_expanded:
+                    self._backprop(tree, path, tree.terminal_value[leaf], vloss)
+                    continue
+                if tree.is_expanded(leaf):
                     # Tree hit an already-expanded node (shouldn't normally happen
                     # because selection continues until an unexpanded leaf). If it
                     # does, treat its Q as the value estimate.
-                    self._backprop(path, leaf.q(), vloss)
-                    done += 1
-                else:
-                    pending_paths.append(path)
-                    pending_games.append(game)
-
-            if not pending_games:
-                continue
-
-            # Phase 2: batched NN inference
-            policies, values = self._nn_eval_batch(pending_games)
-
-            # Phase 3: expand each leaf and backprop
-            for i, (path, game) in enumerate(zip(pending_paths, pending_games)):
-                leaf = path[-1]
-                mask = self._legal_mask(game)
-                if not mask.any():
-                    # Should have been classified terminal by game.is_terminal;
-                    # use 0 (draw) as defensive fallback
-                    leaf.terminal_value = 0.0
-                    leaf.is_expanded = True
-                    self._backprop(path, 0.0, vloss)
-                    done += 1
+                    self._backprop(tree, path, tree.q(leaf), vloss)
                     continue
-                prior = policies[i] * mask.astype(np.float32)
-                s = prior.sum()
-                if s > 1e-8:
-                    prior = prior / s
-                else:
-                    prior = mask.astype(np.float32) / max(mask.sum(), 1)
-                leaf.legal_mask = mask
-                leaf.is_expanded = True
-                for rel in range(7):
-                    if mask[rel]:
-                        leaf.children[rel] = MctsNode(prior=float(prior[rel]))
-                self._backprop(path, float(values[i]), vloss)
-                done += 1
+                solved = self._solve_egtb(tree, leaf, root_game)
+                if solved is not None:
+                    # Endgame tablebase: exact value, no network call
+                    self._backprop(tree, path, solved, vloss)
+                    continue
+                mask = self._legal_mask(root_game)
+                if root_game.is_terminal or not mask.any():
+                    # Game over at this leaf: `_expand` scores it
+                    self._backprop(tree, path, self._expand(tree, leaf, root_game), vloss)
+                    continue
+                row = int(tree.row[leaf])
+                cached = tree.table.lookup(row) if row else None
+                if cached is not None:
+                    # A transposition already evaluated: no network call
+                    prior, legal, value = cached
+                    tree.expand(leaf, prior, legal)
+                    self._backprop(tree, path, value, vloss)
+                    continue
+                key = None
+                if tree.table is not None or self.eval_cache is not None:
+                    key = root_game.key()
+                    if key in batch.keys:
+                        # Same position as an earlier leaf of this batch
+                        batch.paths.append((tree, path, batch.keys[key]))
+                        continue
+                if self.eval_cache is not None:
+                    hit = self.eval_cache.get(self.model_version, key)
+                    if hit is not None:
+                        value = self._expand(tree, leaf, root_game, hit)
+                        self._backprop(tree, path, value, vloss)
+                        continue
+                if key is not None:
+                    batch.keys[key] = len(batch)
+                batch.paths.append((tree, path, len(batch)))
+                batch.boards.append(root_game.board.copy())
+                batch.scores.append(root_game.scores.copy())
+                batch.cp.append(root_game.current_player)
+                batch.sm.append(root_game.solidarity_mode)
+                batch.masks.append(mask)
+            finally:
+                for record in reversed(undo):
+                    root_game.undo_move(record)
+
+    def _evaluate_leaves(self, batch: _LeafBatch):
+        """One forward pass over the batch, then expand and back up every
+        pending leaf (and fill the transposition tables and the cache)."""
+        if not batch.paths:
+            return
+        xt = encode_arrays_torch(np.stack(batch.boards), np.stack(batch.scores),
+                                 np.array(batch.cp), np.array(batch.sm),
+                                 device=self.device)
+        policies, values = self._nn_eval_batch(xt)
+
+        priors = [_masked_prior(p, mask) for p, mask in zip(policies, batch.masks)]
+        for tree, path, i in batch.paths:
+            leaf = path[-1]
+            if not tree.is_expanded(leaf):
+                tree.expand(leaf, priors[i], batch.masks[i])
+            row = tree.row[leaf]
+            if row and not tree.table.evaluated[row]:
+                tree.table.store(row, priors[i], batch.masks[i], float(values[i]))
+            self._backprop(tree, path, float(values[i]), self.cfg.virtual_loss)
+        if self.eval_cache is not None:
+            for key, i in batch.keys.items():
+                self.eval_cache.put(self.model_version, key, policies[i], float(values[i]))
+
+    # ─── Root search ─────────────────────────────────────────────────────
+    #
+    # A search is a generator of collection steps `(want, root_actions)`:
+    # the driver runs `want` descents (through `root_actions[i]` if not
+    # None) and evaluates their leaves before asking for the next step, so
+    # several games' steps can share one forward pass. Its return value is
+    # `(rel, policy)`: the move to play and the policy target, or None for
+    # the visit-count defaults.
+
+    def _root_decided(self, tree: MctsTree, remaining: int) -> bool:
+        """True if no root child can overtake the most-visited one within
+        `remaining` more simulations."""
+        runner_up, leader = np.partition(tree.child_visits(ROOT), -2)[-2:]
+        return leader - runner_up > remaining
+
+    def _skip_sims(self, n: int):
+        """Account `n` budgeted simulations as saved instead of run."""
+        self.stats["sims"] -= n
+        self.stats["sims_saved"] += n
+
+    def _puct_steps(self, tree: MctsTree, sims: int, stop_early: bool = False) -> SearchSteps:
+        """PUCT: `sims` free descents, `leaf_batch_size` per step. With
+        `stop_early`, stops as soon as the visit argmax is settled."""
+        done = 0
+        while done < sims:
+            if stop_early and self._root_decided(tree, sims - done):
+                self._skip_sims(sims - done)
+                break
+            want = min(self.cfg.leaf_batch_size, sims - done)
+            yield want, None
+            done += want
+        return None, None
 
-    def play_game_batched(self, rng: np.random.Generator) -> list[dict]:
+    def _gumbel_scores(self, tree: MctsTree) -> tuple[np.ndarray, np.ndarray]:
         """
-        Batched variant of `play_game` — identical semantics but amortises NN
-        inference across `cfg.leaf_batch_size` leaves per forward. Produces
-        training records in the same format.
+        Root (logits, sigma) over the 7 relative actions. `sigma` is the
+        monotone transform σ(q) = (c_visit + max N) · c_scale · q of the
+        completed Q-values, min-max rescaled to [0, 1]: visited actions keep
+        their Q (root mover's view), unvisited ones get the mixed value
+        v_mix = (v + ΣN / Σ_visited π · Σ_visited π·q) / (1 + ΣN).
         """
-        game = SongoGame()
-        records: list[dict] = []
-        plies = 0
-        vloss = self.cfg.virtual_loss
-        while not game.is_terminal and plies < self.cfg.max_game_plies:
-            root = MctsNode()
+        legal = tree.legal[ROOT]
+        slots = tree.first_child[ROOT] + np.arange(7)
+        prior = tree.prior[slots].astype(np.float64)
+        logits = np.where(legal, np.log(np.maximum(prior, 1e-12)), -np.inf)
+        n = tree.visits[slots]
+        q = np.array([-tree.q(int(c)) for c in slots])
+        visited = n > 0
+        v = tree.q(ROOT)
+        if visited.any() and prior[visited].sum() > 0:
+            sum_n = n.sum()
+            pq = (prior[visited] * q[visited]).sum() / prior[visited].sum()
+            v_mix = (v + sum_n * pq) / (1 + sum_n)
+        else:
+            v_mix = v
+        completed = np.where(visited, q, v_mix)
+        lo, hi = completed[legal].min(), completed[legal].max()
+        completed = (completed - lo) / max(hi - lo, 1e-8)
+        sigma = (self.cfg.gumbel_c_visit + n.max()) * self.cfg.gumbel_c_scale * completed
+        return logits, np.where(legal, sigma, 0.0)
+
+    def _gumbel_steps(self, tree: MctsTree, sims: int, rng: np.random.Generator,
+                      noise: bool = True) -> SearchSteps:
+        """
+        Gumbel root search (Danihelka et al., 2022). Sample the top-m root
+        actions by g + logits (Gumbel-top-k, i.e. without replacement from
+        the prior; g = 0 when `noise` is off), then split `sims` over
+        ceil(log2 m) rounds of sequential halving, visiting each surviving
+        action equally and keeping the best half by g + logits + σ(q).
+        Returns the survivor and the completed-Q policy softmax(logits + σ).
+        """
+        legal = np.flatnonzero(tree.legal[ROOT])
+        logits, _ = self._gumbel_scores(tree)
+        g = rng.gumbel(size=7) if noise else np.zeros(7)
+        m = min(self.cfg.gumbel_considered, legal.size)
+        considered = sorted(legal.tolist(), key=lambda a: -(g[a] + logits[a]))[:m]
+        rounds = max(1, math.ceil(math.log2(m))) if m > 1 else 1
+        left = sims
+        for r in range(rounds):
+            k = len(considered)
+            if r < rounds - 1:
+                per = max(1, sims // (rounds * k))
+            else:
+                per = -(-left // k)    # last round spends what is left
+            # Round-robin, best first, so a short round favours the leaders
+            actions = (considered * per)[:left]
+            for i in range(0, len(actions), self.cfg.leaf_batch_size):
+                chunk = actions[i:i + self.cfg.leaf_batch_size]
+                yield len(chunk), chunk
+            left -= len(actions)
+            logits, sigma = self._gumbel_scores(tree)
+            score = g + logits + sigma
+            considered.sort(key=lambda a: -score[a])
+            if r < rounds - 1:
+                considered = considered[:(k + 1) // 2]
+        z = logits + sigma
+        policy = np.exp(z - z.max())
+        return considered[0], (policy / policy.sum()).astype(np.float32)
+
+    def _search_steps(self, tree: MctsTree, sims: int, rng: np.random.Generator,
+                      noise: bool = True, stop_early: bool = False) -> SearchSteps:
+        """The configured root search. `stop_early` (PUCT only) is for
+        searches that pick the move by visit argmax and whose visit counts
+        are not a training target."""
+        if self.cfg.root_search == "gumbel":
+            return self._gumbel_steps(tree, sims, rng, noise)
+        return self._puct_steps(tree, sims, stop_early)
+
+    def _search(self, tree: MctsTree, game: SongoGame, sims: int,
+                rng: np.random.Generator, noise: bool = True, stop_early: bool = False):
+        """Run a whole root search on one tree; returns its (rel, policy)."""
+        steps = self._search_steps(tree, sims, rng, noise, stop_early)
+        try:
+            while True:
+                want, root_actions = next(steps)
+                batch = _LeafBatch()
+                self._collect_leaves(tree, game, want, batch, root_actions)
+                self._evaluate_leaves(batch)
+        except StopIteration as stop:
+            return stop.value
+
+    # ─── Move loop shared by the batched drivers ─────────────────────────
+
+    def _start_search(self, tree: MctsTree, game: SongoGame, plies: int,
+                      rng: np.random.Generator) -> tuple[int, bool] | None:
+        """Prepare the root for the next move: (simulations to run, whether
+        it is a full search), or None if the game is over. With playout-cap
+        randomization, a ply is a full search with probability
+        `full_search_prob` and otherwise a fast, noise-free one."""
+        if game.is_terminal or plies >= self.cfg.max_game_plies:
+            return None
+        if tree.is_terminal(ROOT):
+            # A tablebase leaf of the previous search, now to be played from
+            tree.reset()
+        if not tree.is_expanded(ROOT):
             # Seed the root so the first batch of descents can use its priors
-            self._expand(root, game)
-            if root.terminal_value is not None:
-                break
-            self._root_dirichlet(root)
-
-            self._run_batched_sims(root, game, self.cfg.num_simulations)
-
-            policy = np.zeros(7, dtype=np.float32)
-            for rel, child in root.children.items():
-                policy[rel] = child.visits
-            s = policy.sum()
-            if s > 0:
-                policy /= s
-
-            view = state_view_of(game)
-            records.append({
-                "board": view.board.copy(),
-                "scores": view.scores,
-                "cp": view.current_player,
-                "sm": view.solidarity_mode,
-                "sb": view.solidarity_beneficiary,
-                "policy": policy,
-                "move_mask": root.legal_mask.copy() if root.legal_mask is not None
-                             else np.zeros(7, dtype=bool),
-                "mover": view.current_player,
-            })
+            self._expand(tree, ROOT, game)
+        if tree.is_terminal(ROOT):
+            return None
+        full = (self.cfg.full_search_prob >= 1.0
+                or rng.random() < self.cfg.full_search_prob)
+        sims = self.cfg.num_simulations if full else self.cfg.fast_simulations
+        if self.cfg.root_search == "gumbel":
+            # Gumbel noise replaces Dirichlet noise; sequential halving needs
+            # the full budget of fresh visits.
+            self.stats["sims"] += sims
+        else:
+            if full:
+                self._root_dirichlet(tree)
+            sims = self._search_budget(tree, sims)
+        if self.cfg.early_stop and tree.legal[ROOT].sum() == 1:
+            # Forced move: nothing to search (its policy target is one-hot).
+            self._skip_sims(sims)
+            sims = 0
+        return sims, full
+
+    def _play_searched_move(self, tree: MctsTree, game: SongoGame, plies: int,
+                            records: list[dict], rng: np.random.Generator,
+                            rel: int | None = None, policy: np.ndarray | None = None,
+                            full_search: bool = True):
+        """Record the searched root, pick a move and play it. Without a
+        search-provided `rel`/`policy`, the policy is the visit-count
+        distribution and the move is sampled from it with temperature.
+        `full_search` is kept in the record: fast-search plies only advance
+        the game and are not written out for training."""
+        if policy is None:
+            policy = tree.child_visits(ROOT).astype(np.float32)
+            if policy.sum() == 0:
+                # Unsearched (forced move): uniform over the legal moves
+                policy = tree.legal[ROOT].astype(np.float32)
+            policy /= policy.sum()
 
+        view = state_view_of(game)
+        records.append({
+            "board": view.board.copy(),
+            "scores": view.scores,
+            "cp": view.current_player,
+            "sm": view.solidarity_mode,
+            "sb": view.solidarity_beneficiary,
+            "policy": policy,
+            "move_mask": tree.legal[ROOT].copy(),
+            "mover": view.current_player,
+            "full_search": full_search,
+        })
+
+        if rel is None:
             temp = (self.cfg.temperature_start
                     if plies < self.cfg.temperature_threshold
                     else self.cfg.temperature_end)
@@ -375,11 +886,13 @@ class SelfPlayEngine:
                 probs /= probs.sum()
                 rel = int(rng.choice(7, p=probs))
 
-            mover_start = 0 if game.current_player == 0 else 7
-            game.execute_move(mover_start + rel)
-            plies += 1
+        mover_start = 0 if game.current_player == 0 else 7
+        game.execute_move(mover_start + rel)
+        self._advance(tree, rel)
 
-        # Fill per-record values from the game outcome
+    @staticmethod
+    def _assign_values(records: list[dict], game: SongoGame):
+        """Fill per-record values from the game outcome."""
         if game.is_terminal:
             winner = game.winner
         else:
@@ -392,8 +905,97 @@ class SelfPlayEngine:
                 rec["value"] = 1.0
             else:
                 rec["value"] = -1.0
+
+    def play_game_batched(self, rng: np.random.Generator) -> list[dict]:
+        """
+        Batched variant of `play_game` — identical semantics but amortises NN
+        inference across `cfg.leaf_batch_size` leaves per forward. Produces
+        training records in the same format.
+        """
+        game = SongoGame()
+        records: list[dict] = []
+        plies = 0
+        tree = self.tree
+        tree.reset()
+        while (search := self._start_search(tree, game, plies, rng)) is not None:
+            sims, full_search = search
+            rel, policy = self._search(tree, game, sims, rng,
+                                       stop_early=self.cfg.early_stop and not full_search)
+            self._play_searched_move(tree, game, plies, records, rng, rel, policy,
+                                     full_search)
+            plies += 1
+        self._assign_values(records, game)
         return records
 
+    def play_games_lockstep(self, rng: np.random.Generator, num_games: int,
+                            parallel: int = 8) -> list[list[dict]]:
+        """
+        Play `num_games` games, `parallel` of them at a time, advancing all
+        running searches in lockstep: each step collects up to
+        `cfg.leaf_batch_size` leaves from every running tree and evaluates
+        them in a single forward pass, so batches stay full even when one
+        tree yields few leaves. Root noise, temperature and records follow
+        `play_game_batched`. Returns each game's records, in start order.
+        """
+        parallel = max(1, min(parallel, num_games))
+        while len(self.trees) < parallel:
+            table = (TranspositionTable(self.cfg.transposition_entries)
+                     if self.cfg.transposition_entries > 0 else None)
+            # A table serves a single tree: `reset` evicts rows freely.
+            self.trees.append(MctsTree(table=table))
+        free = list(reversed(self.trees[:parallel]))
+        results: list[list[dict]] = [[] for _ in range(num_games)]
+        running: list[_GameSlot] = []
+        started = 0
+        while running or started < num_games:
+            # Fill idle trees with new games
+            while free and started < num_games:
+                slot = _GameSlot(started, SongoGame(), free.pop(), results[started])
+                slot.tree.reset()
+                started += 1
+                running.append(slot)
+
+            batch = _LeafBatch()
+            still_running = []
+            for slot in running:
+                # Advance the slot to its next collection step, playing
+                # moves whose search just finished.
+                while True:
+                    if slot.search is None:
+                        search = self._start_search(slot.tree, slot.game, slot.plies, rng)
+                        if search is None:
+                            break
+                        sims, slot.full_search = search
+                        slot.search = self._search_steps(
+                            slot.tree, sims, rng,
+                            stop_early=self.cfg.early_stop and not slot.full_search)
+                    try:
+                        want, root_actions = next(slot.search)
+                    except StopIteration as stop:
+                        slot.search = None
+                        self._play_searched_move(slot.tree, slot.game, slot.plies,
+                                                 slot.records, rng, *stop.value,
+                                                 slot.full_search)
+                        slot.plies += 1
+                        continue
+                    self._collect_leaves(slot.tree, slot.game, want, batch, root_actions)
+                    break
+                if slot.search is None:
+                    self._assign_values(slot.records, slot.game)
+                    free.append(slot.tree)
+                else:
+                    still_running.append(slot)
+            running = still_running
+            self._evaluate_leaves(batch)
+        return results
+
+    def table_stats(self) -> dict | None:
+        """Transposition-table counters summed over the engine's trees."""
+        stats = [t.table.stats() for t in self.trees if t.table is not None]
+        if not stats:
+            return None
+        return {k: sum(st[k] for st in stats) for k in stats[0]}
+
     # ─── Original serial play ────────────────────────────────────────────
 
     def play_game(self, rng: np.random.Generator) -> list[dict]:
@@ -402,85 +1004,122 @@ class SelfPlayEngine:
         (state_view, mcts_policy_rel_7, mover, legal_mask). The final `value`
         field is filled once the game ends.
         """
+        if self.cfg.root_search == "gumbel":
+            # Sequential halving is driven step by step by the batched loop.
+            return self.play_game_batched(rng)
         game = SongoGame()
         records: list[dict] = []
         plies = 0
-        while not game.is_terminal and plies < self.cfg.max_game_plies:
-            root = MctsNode()
-            self._expand(root, game)
-            if root.terminal_value is not None:
-                break
-            self._root_dirichlet(root)
-
-            for _ in range(self.cfg.num_simulations):
-                self._simulate(root, game)
-
-            # Build visit-count policy (cp-relative)
-            policy = np.zeros(7, dtype=np.float32)
-            for rel, child in root.children.items():
-                policy[rel] = child.visits
-            s = policy.sum()
-            if s > 0:
-                policy /= s
-
-            # Record this move's state for training (before applying the chosen move)
-            view = state_view_of(game)
-            records.append({
-                "board": view.board.copy(),
-                "scores": view.scores,
-                "cp": view.current_player,
-                "sm": view.solidarity_mode,
-                "sb": view.solidarity_beneficiary,
-                "policy": policy,
-                "move_mask": root.legal_mask.copy() if root.legal_mask is not None
-                             else np.zeros(7, dtype=bool),
-                "mover": view.current_player,
-            })
-
-            # Sample a move with temperature
-            temp = (self.cfg.temperature_start
-                    if plies < self.cfg.temperature_threshold
-                    else self.cfg.temperature_end)
-            if temp <= 1e-3:
-                rel = int(policy.argmax())
-            else:
-                probs = np.power(policy, 1.0 / temp)
-                probs /= probs.sum()
-                rel = int(rng.choice(7, p=probs))
-
-            mover_start = 0 if game.current_player == 0 else 7
-            game.execute_move(mover_start + rel)
+        tree = self.tree
+        tree.reset()
+        while (search := self._start_search(tree, game, plies, rng)) is not None:
+            sims, full_search = search
+            stop_early = self.cfg.early_stop and not full_search
+            for want, _ in self._puct_steps(tree, sims, stop_early):
+                for _ in range(want):
+                    self._simulate(tree, game)
+            self._play_searched_move(tree, game, plies, records, rng,
+                                     full_search=full_search)
             plies += 1
+        self._assign_values(records, game)
+        return records
 
-        # Assign final value (mover's perspective) retroactively
-        if game.is_terminal:
-            winner = game.winner  # 0 / 1 / -1 (draw) / None
-        else:
-            winner = -1  # timeout → draw
 
-        for rec in records:
-            mover = rec["mover"]
-            if winner is None or winner == -1:
-                rec["value"] = 0.0
-            elif winner == mover:
-                rec["value"] = 1.0
-            else:
-                rec["value"] = -1.0
+# ─── Multi-process self-play ──────────────────────────────────────────────────
 
-        return records
+def _worker_play_games(client: InferenceClient, cfg: MctsConfig, num_games: int,
+                       parallel_games: int, seed: int, results):
+    """Worker process: play `num_games` with forward passes served by `client`."""
+    torch.set_num_threads(1)
+    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
+    engine = SelfPlayEngine(None, "cpu", cfg, inference=client)
+    try:
+        if parallel_games > 1:
+            games = engine.play_games_lockstep(rng, num_games, parallel_games)
+        else:
+            games = [engine.play_game_batched(rng) for _ in range(num_games)]
+        results.put((client.index, games, engine.stats))
+    finally:
+        client.close()
+
+
+def generate_parallel(model: SongoNetV3, cfg: MctsConfig, num_games: int, num_workers: int,
+                      device: str = "cpu", seed: int = 0, parallel_games: int = 1,
+                      max_wait_ms: float = 2.0) -> tuple[list[list[dict]], dict]:
+    """
+    Play `num_games` in `num_workers` search processes that share one
+    `InferenceServer` owning `model` on `device`. Each worker runs
+    `parallel_games` games in lockstep (1 = one at a time). Returns the
+    games' records (grouped by worker) and summed stats, including the
+    server's forward count and mean batch size.
+    """
+    per_worker = [num_games // num_workers + (k < num_games % num_workers)
+                  for k in range(num_workers)]
+    per_worker = [n for n in per_worker if n > 0]
+    server = InferenceServer(model, input_shape=(16, 2, 7), num_clients=len(per_worker),
+                             device=device,
+                             max_leaves=cfg.leaf_batch_size * max(1, parallel_games),
+                             max_wait_ms=max_wait_ms)
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    clients = server.start()
+    workers = [ctx.Process(target=_worker_play_games,
+                           args=(client, cfg, n, parallel_games, seed + k, results))
+               for k, (client, n) in enumerate(zip(clients, per_worker))]
+    for w in workers:
+        w.start()
+    by_worker: dict[int, list[list[dict]]] = {}
+    stats = {"sims": 0, "sims_reused": 0, "sims_saved": 0}
+    try:
+        while len(by_worker) < len(workers):
+            try:
+                k, games, worker_stats = results.get(timeout=1.0)
+            except queue.Empty:
+                server.check()
+                failed = [w for w in workers if w.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"self-play worker exited with code {failed[0].exitcode}")
+                continue
+            by_worker[k] = games
+            for key in stats:
+                stats[key] += worker_stats[key]
+        for w in workers:
+            w.join()
+    finally:
+        for w in workers:
+            if w.is_alive():
+                w.terminate()
+        server.stop()
+    stats.update(server.stats)
+    return [g for k in sorted(by_worker) for g in by_worker[k]], stats
 
 
 # ─── IO ───────────────────────────────────────────────────────────────────────
 
-def records_to_npz(records: list[dict], out_path: str | Path):
-    """Save as npz compatible with distillation.EgtbDataset."""
-    xs, policies, values, wdls, masks = [], [], [], [], []
-    for r in records:
-        view = StateView(
-            board=r["board"], scores=r["scores"], current_player=r["cp"],
-            solidarity_mode=r["sm"], solidarity_beneficiary=r["sb"],
+def records_to_npz(records: list[dict], out_path: str | Path) -> int:
+    """Save as npz compatible with distillation.EgtbDataset. Fast-search
+    records (playout-cap randomization) are skipped; returns the number of
+    samples written."""
+    records = [r for r in records if r.get("full_search", True)]
+    if not records:
+        np.savez_compressed(
+            out_path,
+            x=np.zeros((0, 16, 2, 7), dtype=np.float32),
+            policy=np.zeros((0, 7), dtype=np.float32),
+            value=np.zeros(0, dtype=np.float32),
+            wdl_class=np.zeros(0, dtype=np.int64),
+            move_mask=np.zeros((0, 7), dtype=bool),
         )
-        xs.append(encode(view))
+        return 0
+    policies, values, wdls, masks = [], [], [], []
+    x = encode_arrays(
+        np.stack([r["board"] for r in records]),
+        np.array([r["scores"] for r in records]),
+        np.array([r["cp"] for r in records]),
+        np.array([r["sm"] for r in records]),
+    )
+    for r in records:
         policies.append(r["policy"])
         values.append(float(r["value"]))
         v = r["value"]
@@ -488,12 +1127,13 @@ def records_to_npz(records: list[dict], out_path: str | Path):
         masks.append(r["move_mask"])
     np.savez_compressed(
         out_path,
-        x=np.stack(xs, axis=0),
+        x=x,
         policy=np.stack(policies, axis=0),
         value=np.asarray(values, dtype=np.float32),
         wdl_class=np.asarray(wdls, dtype=np.int64),
         move_mask=np.stack(masks, axis=0),
     )
+    return len(records)
 
 
 def main():
@@ -510,6 +1150,30 @@ def main():
     p.add_argument("--out", default="data/selfplay-v3.npz")
     p.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
     p.add_argument("--seed", type=int, default=1234)
+    p.add_argument("--no-reuse-tree", action="store_true",
+                   help="search every move from a fresh root")
+    p.add_argument("--tt-entries", type=int, default=0,
+                   help="transposition table size in positions (0 = off)")
+    p.add_argument("--eval-cache", type=int, default=0,
+                   help="network evaluation cache size in positions (0 = off)")
+    p.add_argument("--parallel-games", type=int, default=1,
+                   help="games searched in lockstep, sharing forward passes "
+                        "(1 = serial play_game)")
+    p.add_argument("--leaf-batch", type=int, default=32,
+                   help="leaves selected per game before each forward pass, in every "
+                        "search mode (also the Gumbel root-candidate chunk and, times "
+                        "--parallel-games, the inference server's per-request cap)")
+    p.add_argument("--workers", type=int, default=1,
+                   help="search processes sharing one inference server (1 = in-process)")
+    p.add_argument("--root-search", choices=("puct", "gumbel"), default="puct",
+                   help="root selection: PUCT + Dirichlet, or Gumbel sequential halving")
+    p.add_argument("--full-search-prob", type=float, default=1.0,
+                   help="fraction of plies searched fully and recorded (playout-cap "
+                        "randomization; 1 = every ply)")
+    p.add_argument("--fast-sims", type=int, default=25,
+                   help="simulations of the fast, unrecorded plies")
+    p.add_argument("--egtb-dir", default=None,
+                   help="directory of uncompressed egtb-n*.bin layers probed at leaves")
     args = p.parse_args()
 
     torch.manual_seed(args.seed)
@@ -532,6 +1196,14 @@ def main():
         temperature_start=args.temp_start,
         temperature_end=args.temp_end,
         temperature_threshold=args.temp_threshold,
+        reuse_tree=not args.no_reuse_tree,
+        transposition_entries=args.tt_entries,
+        eval_cache_entries=args.eval_cache,
+        leaf_batch_size=args.leaf_batch,
+        root_search=args.root_search,
+        full_search_prob=args.full_search_prob,
+        fast_simulations=args.fast_sims,
+        egtb_dir=args.egtb_dir,
     )
     engine = SelfPlayEngine(model, args.device, cfg)
 
@@ -539,8 +1211,18 @@ def main():
     t0 = time.time()
     wins_by = {0: 0, 1: 0, -1: 0}
     plies_per_game: list[int] = []
-    for g in range(args.games):
-        recs = engine.play_game(rng)
+    server_stats = None
+    if args.workers > 1:
+        played, server_stats = generate_parallel(
+            model, cfg, args.games, args.workers, device=args.device,
+            seed=args.seed, parallel_games=args.parallel_games)
+        games = iter(played)
+        engine.stats.update({k: server_stats[k] for k in engine.stats})
+    elif args.parallel_games > 1:
+        games = iter(engine.play_games_lockstep(rng, args.games, args.parallel_games))
+    else:
+        games = (engine.play_game(rng) for _ in range(args.games))
+    for g, recs in enumerate(games):
         all_records.extend(recs)
         # Determine game outcome from first record's final value
         if recs:
@@ -558,18 +1240,40 @@ def main():
         if (g + 1) % max(1, args.games // 10) == 0:
             elapsed = time.time() - t0
             print(f"  game {g+1:>4}/{args.games}  elapsed={elapsed:.1f}s  "
-                  f"samples={len(all_records)}  wins P1/P2/Draw = "
+                  f"plies={len(all_records)}  wins P1/P2/Draw = "
                   f"{wins_by[0]}/{wins_by[1]}/{wins_by[-1]}")
 
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    records_to_npz(all_records, out_path)
+    saved = records_to_npz(all_records, out_path)
     elapsed = time.time() - t0
     avg_plies = float(np.mean(plies_per_game)) if plies_per_game else 0
     print()
-    print(f"[DONE] {args.games} games, {len(all_records)} samples, {elapsed:.1f}s wall")
+    print(f"[DONE] {args.games} games, {saved} samples ({len(all_records)} plies), "
+          f"{elapsed:.1f}s wall")
     print(f"       avg plies/game = {avg_plies:.1f}")
     print(f"       outcomes P1/P2/Draw = {wins_by[0]}/{wins_by[1]}/{wins_by[-1]}")
+    total = engine.stats["sims"] + engine.stats["sims_reused"]
+    print(f"       sims run/reused = {engine.stats['sims']}/{engine.stats['sims_reused']}"
+          f" ({engine.stats['sims_reused'] / max(total, 1):.1%} reused)")
+    print(f"       sims saved by early stop = {engine.stats['sims_saved']} "
+          f"({engine.stats['sims_saved'] / max(args.games, 1):.0f}/game)")
+    if server_stats is not None:
+        print(f"       inference server: {server_stats['forwards']} forwards, "
+              f"mean batch {server_stats['mean_batch']:.1f}")
+    tt = engine.table_stats()
+    if tt is not None:
+        print(f"       transpositions: {tt['tt_hits']} evals shared, "
+              f"{tt['tt_misses']} missed, {tt['tt_entries']} entries, "
+              f"{tt['tt_evictions']} evicted")
+    if engine.eval_cache is not None:
+        st = engine.eval_cache.stats()
+        print(f"       eval cache: {st['cache_hits']} hits / {st['cache_misses']} misses "
+              f"({st['cache_hit_rate']:.1%}), {st['cache_entries']} entries")
+    if engine.egtb is not None and args.workers <= 1:
+        st = engine.egtb.stats()
+        print(f"       tablebase: {st['egtb_hits']} leaves solved, {st['egtb_misses']} unset "
+              f"(layers {st['egtb_layers']})")
     print(f"       saved → {out_path}")
 
 
@@ -0,0 +1,323 @@
+"""
+AlphaZero for Songo — Vectorized batch rules engine.
+
+`SongoBatch` holds N independent games as struct-of-arrays and steps all of
+them with a handful of numpy ops per ply. Rules are bit-exact with
+`songo_game.SongoGame` (sowing, ≥14-seed laps with auto-capture, chained
+capture, Grand Slam protection, solidarity, last-pit rule, stalemate and
+max-length resolution) — see `tests/test_songo_batch.py` for the randomized
+parity test.
+
+Array layout (absolute coordinates, same as SongoGame):
+    board                  : (N, 14) int32
+    scores                 : (N, 2)  int32
+    current_player         : (N,)    int8   0 | 1
+    is_terminal            : (N,)    bool
+    winner                 : (N,)    int8   0 | 1 | -1 (draw) | NO_WINNER
+    solidarity_mode        : (N,)    bool
+    solidarity_beneficiary : (N,)    int8   0 | 1 | NO_BENEFICIARY
+    move_count             : (N,)    int32
+
+Actions are relative to the current player (0-6), like `SongoGame.step`.
+
+Usage:
+    batch = SongoBatch.initial(4096)
+    rng = np.random.default_rng(0)
+    batch.play_random(rng)
+    print((batch.winner == 0).mean())
+"""
+from __future__ import annotations
+from typing import Optional, Sequence
+
+import numpy as np
+
+from config import GameConfig
+from songo_game import (
+    SongoGame, SOW_DELTA, SOW_LANDING, SOW_AUTO_CAPTURE,
+    NO_WINNER, NO_BENEFICIARY,
+)
+
+_TOTAL_PITS = SongoGame.TOTAL_PITS
+_WIN_THRESHOLD = SongoGame.WINNING_SCORE - 1  # score must be > 35
+
+_COLS = np.arange(_TOTAL_PITS, dtype=np.int64)   # absolute pit indices
+_REL = np.arange(7, dtype=np.int64)              # relative pit indices
+_OWNER = (_COLS >= 7).astype(np.int64)           # pit owner per absolute index
+
+
+class SongoBatch:
+    """N Songo games stepped in lockstep with vectorized rules."""
+
+    def __init__(self, n: int, config: Optional[GameConfig] = None):
+        self.config = config or GameConfig()
+        self.board = np.full((n, _TOTAL_PITS), SongoGame.INITIAL_SEEDS, dtype=np.int32)
+        self.scores = np.zeros((n, 2), dtype=np.int32)
+        self.current_player = np.zeros(n, dtype=np.int8)
+        self.is_terminal = np.zeros(n, dtype=bool)
+        self.winner = np.full(n, NO_WINNER, dtype=np.int8)
+        self.solidarity_mode = np.zeros(n, dtype=bool)
+        self.solidarity_beneficiary = np.full(n, NO_BENEFICIARY, dtype=np.int8)
+        self.move_count = np.zeros(n, dtype=np.int32)
+
+    # ─── Construction / conversion ────────────────────────────────────────
+
+    @classmethod
+    def initial(cls, n: int, config: Optional[GameConfig] = None) -> "SongoBatch":
+        """N games at the standard starting position."""
+        return cls(n, config)
+
+    @classmethod
+    def from_games(cls, games: Sequence[SongoGame]) -> "SongoBatch":
+        """Stack existing SongoGame states (config taken from the first game)."""
+        batch = cls(len(games), games[0].config if games else None)
+        for i, g in enumerate(games):
+            batch.board[i] = g.board
+            batch.scores[i] = g.scores
+            batch.current_player[i] = g.current_player
+            batch.is_terminal[i] = g.is_terminal
+            batch.winner[i] = NO_WINNER if g.winner is None else g.winner
+            batch.solidarity_mode[i] = g.solidarity_mode
+            batch.solidarity_beneficiary[i] = (NO_BENEFICIARY if g.solidarity_beneficiary is None
+                                               else g.solidarity_beneficiary)
+            batch.move_count[i] = g.move_count
+        return batch
+
+    def to_game(self, i: int) -> SongoGame:
+        """Materialize game `i` as a standalone SongoGame."""
+        game = SongoGame(self.config)
+        game.board = self.board[i].copy()
+        game.scores = self.scores[i].copy()
+        game.current_player = int(self.current_player[i])
+        game.is_terminal = bool(self.is_terminal[i])
+        w = int(self.winner[i])
+        game.winner = None if w == NO_WINNER else w
+        game.solidarity_mode = bool(self.solidarity_mode[i])
+        b = int(self.solidarity_beneficiary[i])
+        game.solidarity_beneficiary = None if b == NO_BENEFICIARY else b
+        game.move_count = int(self.move_count[i])
+        return game
+
+    def take(self, rows: np.ndarray) -> "SongoBatch":
+        """New batch holding copies of the selected rows (fancy indexing)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        out = SongoBatch.__new__(SongoBatch)
+        out.config = self.config
+        out.board = self.board[rows]
+        out.scores = self.scores[rows]
+        out.current_player = self.current_player[rows]
+        out.is_terminal = self.is_terminal[rows]
+        out.winner = self.winner[rows]
+        out.solidarity_mode = self.solidarity_mode[rows]
+        out.solidarity_beneficiary = self.solidarity_beneficiary[rows]
+        out.move_count = self.move_count[rows]
+        return out
+
+    def copy(self) -> "SongoBatch":
+        return self.take(np.arange(len(self)))
+
+    def __len__(self) -> int:
+        return int(self.board.shape[0])
+
+    # ─── Move generation ──────────────────────────────────────────────────
+
+    def valid_moves_mask(self) -> np.ndarray:
+        """(N, 7) bool — legal relative actions for every game's current player."""
+        return self._legal_mask(np.arange(len(self)))
+
+    def _legal_mask(self, rows: np.ndarray) -> np.ndarray:
+        board = self.board[rows]
+        cp = self.current_player[rows].astype(np.int64)
+        start = cp * 7
+        my = np.take_along_axis(board, start[:, None] + _REL, axis=1)
+        opp = np.take_along_axis(board, (7 - start)[:, None] + _REL, axis=1)
+
+        # Last pit restriction: a single seed in pit 6/13 is forbidden unless
+        # it is the mover's very last seed (desperate auto-capture).
+        playable = my > 0
+        playable[:, 6] &= ~((my[:, 6] == 1) & (my.sum(axis=1) > 1))
+
+        sol = self.solidarity_mode[rows] & (self.solidarity_beneficiary[rows] != NO_BENEFICIARY)
+        enforce = sol | (opp.sum(axis=1) == 0)
+        target = np.where(sol, self.solidarity_beneficiary[rows], 1 - cp)
+
+        # Feeding test in closed form: from relative pit i the first opponent
+        # pit is 7-i steps away, and the mover's own pits come back after a
+        # full lap of the opponent side. ≥14 seeds always feed.
+        reaches_opp = my >= (7 - _REL)
+        reaches_own = ((_REL < 6) & (my >= 1)) | (my >= 14 - _REL)
+        feeds = np.where((target == cp)[:, None], reaches_own, reaches_opp) | (my >= 14)
+
+        legal = playable & (~enforce[:, None] | feeds)
+        # Feeding enforced but impossible → every playable pit is allowed.
+        fallback = enforce & ~legal.any(axis=1)
+        legal[fallback] = playable[fallback]
+        legal[self.is_terminal[rows]] = False
+        return legal
+
+    # ─── Move execution ───────────────────────────────────────────────────
+
+    def execute_moves(self, actions: np.ndarray) -> None:
+        """
+        Play one relative action (0-6) in every game, in-place.
+        Rows whose action is negative, or whose game is over, are left untouched.
+        Actions are assumed legal (see `valid_moves_mask`).
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        rows = np.flatnonzero((actions >= 0) & ~self.is_terminal)
+        if rows.size == 0:
+            return
+
+        board = self.board
+        scores = self.scores
+        cp = self.current_player[rows].astype(np.int64)
+        op = 1 - cp
+        start = cp * 7
+        pit = start + actions[rows]
+
+        side_total = np.take_along_axis(board[rows], start[:, None] + _REL, axis=1).sum(axis=1)
+        seeds = board[rows, pit].astype(np.int64)
+        board[rows, pit] = 0
+        self.move_count[rows] += 1
+
+        # --- Desperate auto-capture: last seed of the side sitting in the last pit
+        desperate = (side_total == 1) & (actions[rows] == 6)
+        if desperate.any():
+            d_rows = rows[desperate]
+            d_cp = cp[desperate]
+            scores[d_rows, d_cp] += 1
+            self.solidarity_mode[d_rows] = True
+            self.solidarity_beneficiary[d_rows] = d_cp
+            self.current_player[d_rows] = 1 - d_cp
+            self._check_win(d_rows, force_end=False)
+
+        keep = ~desperate
+        rows, cp, op, pit, seeds = rows[keep], cp[keep], op[keep], pit[keep], seeds[keep]
+        if rows.size == 0:
+            return
+        opp_start = op * 7
+
+        # --- Distribution: one table lookup per game (see songo_game tables)
+        sub = board[rows] + SOW_DELTA[pit, seeds]
+        landing = SOW_LANDING[pit, seeds].astype(np.int64)
+        auto = SOW_AUTO_CAPTURE[pit, seeds]
+
+        # --- Auto-capture (≥14 seeds, remainder ≡ 1 mod 7): last seed scores
+        if auto.any():
+            scores[rows[auto], cp[auto]] += 1
+
+        # --- Capture ("La Prise"): chain backwards from the landing pit
+        ar = np.arange(rows.size)
+        land_count = sub[ar, landing]
+        can_capture = (~auto & (_OWNER[landing] == op)
+                       & (land_count >= 2) & (land_count <= 4)
+                       & (landing != opp_start))
+        opp_idx = opp_start[:, None] + _REL
+        opp_vals = np.take_along_axis(sub, opp_idx, axis=1)
+        if can_capture.any():
+            q = (landing - opp_start)[:, None]
+            capturable = (opp_vals >= 2) & (opp_vals <= 4)
+            upto = _REL[None, :] <= q
+            last_break = np.where(upto & ~capturable, _REL[None, :], -1).max(axis=1)
+            chain = upto & (_REL[None, :] > last_break[:, None]) & can_capture[:, None]
+            grand_slam = (opp_vals > 0).all(axis=1) & (chain.sum(axis=1) == 7)
+            chain &= ~grand_slam[:, None]
+            captured = (opp_vals * chain).sum(axis=1)
+            opp_vals = np.where(chain, 0, opp_vals)
+            np.put_along_axis(sub, opp_idx, opp_vals, axis=1)
+            scores[rows, cp] += captured.astype(np.int32)
+
+        board[rows] = sub
+
+        # --- End of turn
+        self._post_move_checks(rows, cp, op, opp_vals.sum(axis=1))
+
+    def _post_move_checks(self, rows, cp, op, opp_seeds):
+        """Vectorized `SongoGame._post_move_checks` on the given rows."""
+        # Solidarity: an active request (or a starving opponent) must be met.
+        pending = self.solidarity_mode[rows] | (opp_seeds == 0)
+        fed = pending & (opp_seeds > 0)
+        self.solidarity_mode[rows[fed]] = False
+        self.solidarity_beneficiary[rows[fed]] = NO_BENEFICIARY
+
+        starved = pending & ~fed
+        if starved.any():
+            # Opponent still empty → mover collects their own side, game ends.
+            s_rows, s_cp = rows[starved], cp[starved]
+            side = np.take_along_axis(self.board[s_rows], (s_cp * 7)[:, None] + _REL, axis=1)
+            self.scores[s_rows, s_cp] += side.sum(axis=1).astype(np.int32)
+            self.board[s_rows[:, None], (s_cp * 7)[:, None] + _REL] = 0
+            self._check_win(s_rows, force_end=True)
+
+        rows, op = rows[~starved], op[~starved]
+        if rows.size == 0:
+            return
+        self.current_player[rows] = op
+        stuck = ~self._legal_mask(rows).any(axis=1)
+        self._resolve_stalemate(rows[stuck])
+
+        rows = rows[~stuck]
+        self._check_win(rows, force_end=False)
+        self._resolve_stalemate(rows[self.move_count[rows] >= self.config.max_game_length])
+
+    def _resolve_stalemate(self, rows: np.ndarray) -> None:
+        """No valid moves (or length cap): each side collects its own seeds."""
+        if rows.size == 0:
+            return
+        board = self.board[rows]
+        self.scores[rows, 0] += board[:, :7].sum(axis=1)
+        self.scores[rows, 1] += board[:, 7:].sum(axis=1)
+        self.board[rows] = 0
+        self.is_terminal[rows] = True
+        s0, s1 = self.scores[rows, 0], self.scores[rows, 1]
+        self.winner[rows] = np.where(s0 > _WIN_THRESHOLD, 0,
+                                     np.where(s1 > _WIN_THRESHOLD, 1, -1))
+
+    def _check_win(self, rows: np.ndarray, force_end: bool) -> None:
+        if rows.size == 0:
+            return
+        s0, s1 = self.scores[rows, 0], self.scores[rows, 1]
+        p0 = s0 > _WIN_THRESHOLD
+        p1 = ~p0 & (s1 > _WIN_THRESHOLD)
+        if force_end:
+            ended = np.ones(rows.size, dtype=bool)
+            winner = np.where(p0 | (~p1 & (s0 > s1)), 0,
+                              np.where(p1 | (s1 > s0), 1, -1))
+        else:
+            ended = p0 | p1
+            winner = np.where(p0, 0, 1)
+        self.is_terminal[rows[ended]] = True
+        self.winner[rows[ended]] = winner[ended]
+
+    # ─── Results / playouts ───────────────────────────────────────────────
+
+    def get_results(self, player: int) -> np.ndarray:
+        """(N,) float32 — +1 win / -1 loss / 0 draw or unfinished, from `player`'s view."""
+        out = np.zeros(len(self), dtype=np.float32)
+        decided = self.is_terminal & (self.winner >= 0)
+        out[decided] = np.where(self.winner[decided] == player, 1.0, -1.0)
+        return out
+
+    def sample_actions(self, rng: np.random.Generator,
+                       mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Uniformly random legal action per game; -1 where none exists."""
+        if mask is None:
+            mask = self.valid_moves_mask()
+        keys = np.where(mask, rng.random(mask.shape), -1.0)
+        actions = keys.argmax(axis=1)
+        actions[~mask.any(axis=1)] = -1
+        return actions
+
+    def play_random(self, rng: np.random.Generator, max_plies: Optional[int] = None) -> None:
+        """
+        Play uniformly random legal moves until every game is over. Games left
+        without a legal move are settled like `SongoGame._resolve_stalemate`.
+        """
+        max_plies = max_plies or self.config.max_game_length
+        for _ in range(max_plies):
+            mask = self.valid_moves_mask()
+            stuck = ~self.is_terminal & ~mask.any(axis=1)
+            self._resolve_stalemate(np.flatnonzero(stuck))
+            if self.is_terminal.all():
+                break
+            self.execute_moves(self.sample_actions(rng, mask))
+        self._resolve_stalemate(np.flatnonzero(~self.is_terminal))
@@ -7,10 +7,163 @@ This is a faithful port of the Songo game rules:
 - Last pit restriction, desperate auto-capture
 """
 import numpy as np
-from typing import Optional, List, Tuple
+from typing import NamedTuple, Optional, List, Tuple
 from config import GameConfig
 
 
+MAX_SEEDS = 70  # every seed of the game in one pit
+
+
+def _build_sowing_tables():
+    """
+    Precompute the outcome of sowing `seeds` from `pit`, for every
+    (pit, seeds) pair, so that a move is a single vector add:
+
+        SOW_DELTA[pit, seeds]        : (14,) int32 — seeds added to each pit
+                                       (the emptied pit itself stays 0)
+        SOW_LANDING[pit, seeds]      : pit receiving the last seed, or -1
+                                       (no seeds, or auto-capture)
+        SOW_AUTO_CAPTURE[pit, seeds] : ≥14 seeds whose last seed is scored
+        SOW_FEEDS[pit, seeds, side]  : at least one seed reaches `side`
+
+    Per-side seed counts and the bitmask of pits receiving seeds are also
+    returned as nested lists, for the incremental totals kept by SongoGame.
+    """
+    n = SongoGame.TOTAL_PITS
+    delta = np.zeros((n, MAX_SEEDS + 1, n), dtype=np.int32)
+    landing = np.full((n, MAX_SEEDS + 1), -1, dtype=np.int8)
+    auto = np.zeros((n, MAX_SEEDS + 1), dtype=bool)
+
+    for pit in range(n):
+        opp_start = 7 if pit < 7 else 0
+        for seeds in range(1, MAX_SEEDS + 1):
+            row = delta[pit, seeds]
+            if seeds >= 14:
+                # First 13 seeds cover every other pit once, the remainder
+                # laps the opponent side; remainder ≡ 1 (mod 7) → auto-capture.
+                for k in range(1, 14):
+                    row[(pit + k) % n] += 1
+                remaining = seeds - 13
+                if remaining % 7 == 1:
+                    auto[pit, seeds] = True
+                    remaining -= 1
+                for k in range(remaining):
+                    row[opp_start + k % 7] += 1
+                if not auto[pit, seeds]:
+                    landing[pit, seeds] = opp_start + (remaining - 1) % 7
+            else:
+                for k in range(1, seeds + 1):
+                    row[(pit + k) % n] += 1
+                landing[pit, seeds] = (pit + seeds) % n
+
+    side_seeds = np.stack([delta[:, :, :7].sum(axis=2),
+                           delta[:, :, 7:].sum(axis=2)], axis=2)
+    feeds = side_seeds > 0
+    touched = ((delta > 0) << np.arange(n)).sum(axis=2)
+    for table in (delta, landing, auto, feeds):
+        table.setflags(write=False)
+    return delta, landing, auto, feeds, side_seeds.tolist(), touched.tolist()
+
+
+# Bitmasks over the 14 pits (bit i = pit i), see `SongoGame.nonempty_pits`
+SIDE_BITS = (0x7F, 0x7F << 7)
+
+_NO_MOVES = np.array([], dtype=np.int32)
+_NO_MOVES.setflags(write=False)
+
+
+# =============================================================================
+# Position keys
+# =============================================================================
+#
+# `SongoGame.key()` is a Zobrist-style 64-bit key: the board part is additive
+# (Σ seeds[i] · PIT_KEY[i] mod 2^64) so a whole sowing is one precomputed
+# addend, while scores, side to move and solidarity state index random
+# tables. The fixed seed keeps keys identical across processes and runs.
+#
+# `SongoGame.packed_key()` is the 20-byte layout of engine-rs
+# `book/hash.rs`; `book_hash()` is its FNV-1a StateHash (AKBOK01 book key).
+
+KEY_MASK = (1 << 64) - 1
+PACKED_KEY_LEN = 20
+_FNV_OFFSET = 0xCBF29CE484222325
+_FNV_PRIME = 0x100000001B3
+
+# Solidarity byte of the packed layout: bit 0 = mode, bits 1-2 = beneficiary
+SOLIDARITY_CODE = {None: 0b001, 0: 0b011, 1: 0b101}
+SOLIDARITY_FROM_CODE = {0b000: (False, None), 0b001: (True, None),
+                         0b011: (True, 0), 0b101: (True, 1)}
+
+
+def fnv1a_64(data: bytes) -> int:
+    """64-bit FNV-1a, as in engine-rs `book/hash.rs`."""
+    h = _FNV_OFFSET
+    for byte in data:
+        h = ((h ^ byte) * _FNV_PRIME) & KEY_MASK
+    return h
+
+
+def _build_key_tables():
+    rng = np.random.default_rng(0x50_4E47_534F)
+    draw = lambda *shape: rng.integers(0, 1 << 64, size=shape, dtype=np.uint64,
+                                       endpoint=False)
+    pit = draw(SongoGame.TOTAL_PITS)
+    # uint64 arithmetic wraps, i.e. works mod 2^64
+    sow = (SOW_DELTA.astype(np.uint64) * pit).sum(axis=2, dtype=np.uint64)
+    score = draw(2, MAX_SEEDS + 1)
+    side = draw(2)
+    solidarity = draw(6)
+    return (pit, [[int(k) for k in row] for row in sow],
+            [[int(k) for k in row] for row in score],
+            [int(k) for k in side], [int(k) for k in solidarity])
+
+
+# Array sentinels for "no winner yet" / "no beneficiary" (SongoGame: None)
+NO_WINNER = -2
+NO_BENEFICIARY = -1
+
+
+class Successors(NamedTuple):
+    """
+    Every child of a position, as returned by `SongoGame.all_successors`.
+    Row `a` holds the position after relative action `a`; rows of illegal
+    actions are left zeroed with `mask[a] == False`.
+    """
+    mask: np.ndarray                    # (7,)    bool
+    board: np.ndarray                   # (7, 14) int32
+    scores: np.ndarray                  # (7, 2)  int32
+    current_player: np.ndarray          # (7,)    int8
+    solidarity_mode: np.ndarray         # (7,)    bool
+    solidarity_beneficiary: np.ndarray  # (7,)    int8, NO_BENEFICIARY if None
+    is_terminal: np.ndarray             # (7,)    bool
+    winner: np.ndarray                  # (7,)    int8, NO_WINNER if not over
+    keys: np.ndarray                    # (7,)    uint64, `SongoGame.key()`
+
+
+class UndoRecord(NamedTuple):
+    """
+    Compact record returned by `SongoGame.execute_move_undoable`.
+    Holds exactly what `undo_move` needs to restore the position: the sown
+    pit, the pits zeroed by captures / end-of-game sweeps, and the scalar
+    state (scores, flags, terminal state) from before the move.
+    """
+    pit: int
+    seeds: int
+    sown: bool                       # False for a desperate auto-capture
+    cleared: Tuple[Tuple[int, int], ...]  # (pit, seeds) zeroed after sowing
+    scores: Tuple[int, int]
+    current_player: int
+    solidarity_mode: bool
+    solidarity_beneficiary: Optional[int]
+    is_terminal: bool
+    winner: Optional[int]
+    move_count: int
+    side_totals: Tuple[int, int]
+    nonempty: int
+    board_key: int
+    legal: Optional[tuple]               # cached legal moves before the move
+
+
 class SongoGame:
     """
     Complete Songo game implementation.
@@ -47,16 +200,152 @@ class SongoGame:
         """Create a deep copy of the game state."""
         game = SongoGame.__new__(SongoGame)
         game.config = self.config
-        game.board = self.board.copy()
+        game._board = self._board.copy()
         game.scores = self.scores.copy()
-        game.current_player = self.current_player
+        game._current_player = self._current_player
         game.is_terminal = self.is_terminal
         game.winner = self.winner
-        game.solidarity_mode = self.solidarity_mode
-        game.solidarity_beneficiary = self.solidarity_beneficiary
+        game._solidarity_mode = self._solidarity_mode
+        game._solidarity_beneficiary = self._solidarity_beneficiary
         game.move_count = self.move_count
+        game._side_totals = None if self._side_totals is None else list(self._side_totals)
+        game._nonempty = self._nonempty
+        game._board_key = self._board_key
+        game._legal = self._legal  # read-only arrays, safe to share
         return game
 
+    # =========================================================================
+    # Cached position data
+    # =========================================================================
+    #
+    # Side totals and the non-empty-pit bitmask are kept up to date by moves;
+    # the legal moves are computed once per position. Assigning `board`,
+    # `current_player` or the solidarity fields drops the caches; code that
+    # edits `board` in place after querying the game must call
+    # `invalidate_caches()`.
+
+    @property
+    def board(self) -> np.ndarray:
+        return self._board
+
+    @board.setter
+    def board(self, value: np.ndarray):
+        self._board = value
+        self.invalidate_caches()
+
+    @property
+    def current_player(self) -> int:
+        return self._current_player
+
+    @current_player.setter
+    def current_player(self, value: int):
+        self._current_player = value
+        self._legal = None
+
+    @property
+    def solidarity_mode(self) -> bool:
+        return self._solidarity_mode
+
+    @solidarity_mode.setter
+    def solidarity_mode(self, value: bool):
+        self._solidarity_mode = value
+        self._legal = None
+
+    @property
+    def solidarity_beneficiary(self) -> Optional[int]:
+        return self._solidarity_beneficiary
+
+    @solidarity_beneficiary.setter
+    def solidarity_beneficiary(self, value: Optional[int]):
+        self._solidarity_beneficiary = value
+        self._legal = None
+
+    def invalidate_caches(self):
+        """Forget cached totals and legal moves (recomputed on next use)."""
+        self._side_totals = None
+        self._nonempty = 0
+        self._board_key = 0
+        self._legal = None
+
+    def _totals(self) -> List[int]:
+        """
+        Per-side seed totals [P1, P2]; also (re)builds the non-empty bitmask
+        and the board part of `key()`.
+        """
+        if self._side_totals is None:
+            board = self._board
+            self._side_totals = [int(board[:7].sum()), int(board[7:].sum())]
+            nonempty = 0
+            for i in np.flatnonzero(board):
+                nonempty |= 1 << int(i)
+            self._nonempty = nonempty
+            self._board_key = int((board.astype(np.uint64) * _PIT_KEY_ARRAY)
+                                  .sum(dtype=np.uint64))
+        return self._side_totals
+
+    def side_seeds(self, player: int) -> int:
+        """Seeds currently on `player`'s side of the board."""
+        return self._totals()[player]
+
+    @property
+    def nonempty_pits(self) -> int:
+        """Bitmask of non-empty pits (bit i set ⇔ board[i] > 0)."""
+        self._totals()
+        return self._nonempty
+
+    # =========================================================================
+    # Position keys
+    # =========================================================================
+
+    def key(self) -> int:
+        """
+        64-bit position key over board, scores, side to move and solidarity
+        state, maintained incrementally by moves. Stable across processes.
+        """
+        self._totals()
+        return (self._board_key
+                + _SCORE_KEY[0][int(self.scores[0])]
+                + _SCORE_KEY[1][int(self.scores[1])]
+                + _SIDE_KEY[self._current_player]
+                + _SOLIDARITY_KEY[self._solidarity_code()]) & KEY_MASK
+
+    def _solidarity_code(self) -> int:
+        if not self._solidarity_mode:
+            return 0
+        return SOLIDARITY_CODE[self._solidarity_beneficiary]
+
+    def packed_key(self) -> bytes:
+        """
+        Lossless 20-byte form of the position (engine-rs `book/hash.rs`
+        layout): pits 0..13, score P1, score P2, current player, variant
+        (0 = Gabon), solidarity flags, reserved. Inverse of `from_key`.
+        """
+        return bytes(self._board.astype(np.uint8)) + bytes((
+            int(self.scores[0]), int(self.scores[1]), self._current_player,
+            0, self._solidarity_code(), 0))
+
+    @classmethod
+    def from_key(cls, packed: bytes, config: Optional[GameConfig] = None) -> 'SongoGame':
+        """
+        Rebuild a game from `packed_key()`. The move count restarts at 0; a
+        position already won on score comes back terminal.
+        """
+        if len(packed) != PACKED_KEY_LEN:
+            raise ValueError(f"packed key must be {PACKED_KEY_LEN} bytes, got {len(packed)}")
+        if packed[17] != 0:
+            raise ValueError(f"unsupported variant marker {packed[17]} (only Gabon = 0)")
+        game = cls(config)
+        game.board = np.frombuffer(packed, dtype=np.uint8, count=14).astype(np.int32)
+        game.scores = np.array([packed[14], packed[15]], dtype=np.int32)
+        game.current_player = packed[16]
+        game.solidarity_mode, game.solidarity_beneficiary = SOLIDARITY_FROM_CODE[packed[18]]
+        game._check_win_condition()
+        return game
+
+    def book_hash(self) -> int:
+        """FNV-1a `StateHash` of `packed_key()`, as used by the AKBOK01 opening book."""
+        return fnv1a_64(self.packed_key())
+
     @staticmethod
     def get_pit_owner(index: int) -> int:
         """Returns 0 for Player One (pits 0-6), 1 for Player Two (pits 7-13)."""
@@ -79,109 +368,192 @@ class SongoGame:
         """
         Returns array of valid pit indices for current player.
         Handles solidarity/feeding rules and last pit restriction.
+        The result is cached until the position changes (read-only array).
         """
         if self.is_terminal:
-            return np.array([], dtype=np.int32)
+            return _NO_MOVES
+        if self._legal is None:
+            self._legal = self._compute_legal()
+        return self._legal[0]
 
-        my_indices = self.get_player_indices(self.current_player)
-        opp_indices = self.get_opponent_indices(self.current_player)
-
-        # Check if opponent is starving
-        opp_seeds = sum(self.board[i] for i in opp_indices)
-        
-        # Determine if feeding is enforced
+    def get_valid_moves_mask(self) -> np.ndarray:
+        """Returns a binary mask of size 7 for valid moves (relative to current player)."""
+        if self.is_terminal:
+            return np.zeros(7, dtype=np.float32)
+        if self._legal is None:
+            self._legal = self._compute_legal()
+        return self._legal[1].copy()
+
+    def _compute_legal(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(valid pit indices, relative float mask) for the current position."""
+        board = self._board
+        totals = self._totals()
+        nonempty = self._nonempty
+        current_player = self._current_player
+        my_start = self.get_player_start(current_player)
+
+        # Determine if feeding is enforced (solidarity, or opponent starving)
         enforce_feeding = (
-            (self.solidarity_mode and self.solidarity_beneficiary is not None)
-            or opp_seeds == 0
+            (self._solidarity_mode and self._solidarity_beneficiary is not None)
+            or totals[1 - current_player] == 0
         )
 
         if enforce_feeding:
-            target_indices = (
-                self.get_player_indices(self.solidarity_beneficiary)
-                if self.solidarity_mode and self.solidarity_beneficiary is not None
-                else opp_indices
+            target_side = (
+                self._solidarity_beneficiary
+                if self._solidarity_mode and self._solidarity_beneficiary is not None
+                else 1 - current_player
             )
-        
+
         valid = []
-        total_seeds = sum(self.board[i] for i in my_indices)
+        playable = []
+        total_seeds = totals[current_player]
+        last_pit = my_start + 6
 
-        for idx in my_indices:
-            seeds = self.board[idx]
-            if seeds == 0:
+        for idx in range(my_start, my_start + 7):
+            if not (nonempty >> idx) & 1:
                 continue
+            seeds = int(board[idx])
 
             # Last pit restriction: can't play 1 seed from last pit (6 or 13)
             # unless it's the absolute last seed (desperate auto-capture)
-            is_last_pit = (self.current_player == 0 and idx == 6) or \
-                          (self.current_player == 1 and idx == 13)
-            if is_last_pit and seeds == 1:
-                if total_seeds > 1:
-                    continue  # Forbidden
-                # total_seeds == 1: allowed (desperate auto-capture)
-
-            if enforce_feeding:
-                # Check if this move feeds the target
-                feeds = False
-                if seeds >= 14:
-                    feeds = True
-                else:
-                    for s in range(1, seeds + 1):
-                        target = (idx + s) % self.TOTAL_PITS
-                        if target in target_indices:
-                            feeds = True
-                            break
-                
-                if not feeds:
-                    continue  # Skip, will check below if ANY move can feed
+            if idx == last_pit and seeds == 1 and total_seeds > 1:
+                continue  # Forbidden
+
+            playable.append(idx)
+            # Skip moves that don't feed the target; checked below if ANY can
+            if enforce_feeding and not SOW_FEEDS[idx, seeds, target_side]:
+                continue
 
             valid.append(idx)
 
         # If feeding is enforced but no move feeds, allow all non-empty moves
         if enforce_feeding and len(valid) == 0:
-            for idx in my_indices:
-                seeds = self.board[idx]
-                if seeds == 0:
-                    continue
-                is_last_pit = (self.current_player == 0 and idx == 6) or \
-                              (self.current_player == 1 and idx == 13)
-                if is_last_pit and seeds == 1 and total_seeds > 1:
-                    continue
-                valid.append(idx)
-
-        return np.array(valid, dtype=np.int32)
+            valid = playable
 
-    def get_valid_moves_mask(self) -> np.ndarray:
-        """Returns a binary mask of size 7 for valid moves (relative to current player)."""
+        moves = np.array(valid, dtype=np.int32)
         mask = np.zeros(7, dtype=np.float32)
-        valid = self.get_valid_moves()
-        start = self.get_player_start(self.current_player)
-        for idx in valid:
-            mask[idx - start] = 1.0
-        return mask
+        mask[moves - my_start] = 1.0
+        moves.setflags(write=False)
+        mask.setflags(write=False)
+        return moves, mask
+
+    def all_successors(self) -> Successors:
+        """
+        Play every legal move once (make/unmake on this game, so the sowing
+        tables, side totals and keys are shared) and return all children as
+        arrays ready for batched encoding / evaluation.
+        """
+        out = Successors(
+            mask=np.zeros(7, dtype=bool),
+            board=np.zeros((7, self.TOTAL_PITS), dtype=np.int32),
+            scores=np.zeros((7, 2), dtype=np.int32),
+            current_player=np.zeros(7, dtype=np.int8),
+            solidarity_mode=np.zeros(7, dtype=bool),
+            solidarity_beneficiary=np.full(7, NO_BENEFICIARY, dtype=np.int8),
+            is_terminal=np.zeros(7, dtype=bool),
+            winner=np.full(7, NO_WINNER, dtype=np.int8),
+            keys=np.zeros(7, dtype=np.uint64),
+        )
+        start = self.get_player_start(self._current_player)
+        for pit in self.get_valid_moves():
+            a = int(pit) - start
+            record = self.execute_move_undoable(int(pit))
+            out.mask[a] = True
+            out.board[a] = self._board
+            out.scores[a] = self.scores
+            out.current_player[a] = self._current_player
+            out.solidarity_mode[a] = self._solidarity_mode
+            if self._solidarity_beneficiary is not None:
+                out.solidarity_beneficiary[a] = self._solidarity_beneficiary
+            out.is_terminal[a] = self.is_terminal
+            if self.winner is not None:
+                out.winner[a] = self.winner
+            out.keys[a] = self.key()
+            self.undo_move(record)
+        return out
 
     def execute_move(self, pit_index: int) -> None:
         """
         Execute a move in-place. Modifies the game state.
         pit_index is an absolute index (0-13).
         """
+        self._apply_move(pit_index, [])
+
+    def execute_move_undoable(self, pit_index: int) -> UndoRecord:
+        """
+        Same as `execute_move`, but returns an `UndoRecord` so the move can be
+        taken back with `undo_move`. Lets tree search walk a single mutable
+        game down and back up instead of cloning at every node.
+        """
+        scores = (int(self.scores[0]), int(self.scores[1]))
+        current_player = self.current_player
+        solidarity_mode = self.solidarity_mode
+        solidarity_beneficiary = self.solidarity_beneficiary
+        is_terminal = self.is_terminal
+        winner = self.winner
+        move_count = self.move_count
+        totals = self._totals()
+        side_totals = (totals[0], totals[1])
+        nonempty = self._nonempty
+        board_key = self._board_key
+        legal = self._legal
+        seeds = int(self._board[pit_index])
+        cleared: List[Tuple[int, int]] = []
+        sown = self._apply_move(pit_index, cleared)
+        return UndoRecord(pit_index, seeds, sown, tuple(cleared), scores,
+                          current_player, solidarity_mode, solidarity_beneficiary,
+                          is_terminal, winner, move_count,
+                          side_totals, nonempty, board_key, legal)
+
+    def undo_move(self, record: UndoRecord) -> None:
+        """Restore the position from before `execute_move_undoable(...)`."""
+        board = self._board
+        for idx, count in reversed(record.cleared):
+            board[idx] = count
+
+        if record.sown:
+            board -= SOW_DELTA[record.pit, record.seeds]
+        board[record.pit] = record.seeds
+
+        self.scores[0], self.scores[1] = record.scores
+        self.current_player = record.current_player
+        self.solidarity_mode = record.solidarity_mode
+        self.solidarity_beneficiary = record.solidarity_beneficiary
+        self.is_terminal = record.is_terminal
+        self.winner = record.winner
+        self.move_count = record.move_count
+        self._side_totals = list(record.side_totals)
+        self._nonempty = record.nonempty
+        self._board_key = record.board_key
+        self._legal = record.legal
+
+    def _apply_move(self, pit_index: int, cleared: List[Tuple[int, int]]) -> bool:
+        """
+        Move implementation shared by `execute_move` and `execute_move_undoable`.
+        Every pit zeroed after sowing is logged to `cleared` as (pit, seeds).
+        Returns False for a desperate auto-capture (nothing sown), else True.
+        """
         assert not self.is_terminal, "Game is already over"
         
-        board = self.board
+        board = self._board
         scores = self.scores
-        current_player = self.current_player
+        totals = self._totals()
+        current_player = self._current_player
         opponent = 1 - current_player
-
-        my_indices = self.get_player_indices(current_player)
-        opp_indices = self.get_opponent_indices(current_player)
         opp_start = self.get_player_start(opponent)
 
         # Calculate total seeds BEFORE picking up
-        total_seeds_on_side = sum(board[i] for i in my_indices)
+        total_seeds_on_side = totals[current_player]
         is_last_pit = (current_player == 0 and pit_index == 6) or \
                       (current_player == 1 and pit_index == 13)
 
-        seeds = board[pit_index]
+        seeds = int(board[pit_index])
         board[pit_index] = 0  # Pick up
+        totals[current_player] -= seeds
+        self._nonempty &= ~(1 << pit_index)
+        self._board_key = (self._board_key - seeds * _PIT_KEY[pit_index]) & KEY_MASK
+        self._legal = None
 
         self.move_count += 1
 
@@ -192,131 +564,95 @@ class SongoGame:
             self.solidarity_beneficiary = current_player
             self.current_player = opponent
             self._check_win_condition()
-            return
-
-        # --- Distribution ---
-        current_idx = pit_index
-        original_seeds = seeds
-
-        if seeds >= 14:
-            remaining_after_13 = seeds - 13
-            is_auto_capture = remaining_after_13 % 7 == 1
-
-            # First 13 seeds
-            for _ in range(13):
-                current_idx = (current_idx + 1) % self.TOTAL_PITS
-                board[current_idx] += 1
-                seeds -= 1
-
-            if is_auto_capture:
-                # Distribute remaining to opponent except last seed
-                seeds_to_distribute = seeds - 1
-                op_offset = 0
-                for _ in range(seeds_to_distribute):
-                    target = opp_start + (op_offset % 7)
-                    board[target] += 1
-                    current_idx = target
-                    op_offset += 1
-
-                # Auto-capture the last seed
-                scores[current_player] += 1
-                board[pit_index] = 0  # Ensure start pit stays 0
-
-                self.current_player = opponent
-                self._post_move_checks(current_player, opponent)
-                return
-            else:
-                # Standard: distribute remainder in opponent side
-                op_offset = 0
-                while seeds > 0:
-                    target = opp_start + (op_offset % 7)
-                    board[target] += 1
-                    current_idx = target
-                    op_offset += 1
-                    seeds -= 1
-        else:
-            # Standard simple distribution (< 14)
-            while seeds > 0:
-                current_idx = (current_idx + 1) % self.TOTAL_PITS
-                board[current_idx] += 1
-                seeds -= 1
+            return False
+
+        # --- Distribution (precomputed, see `_build_sowing_tables`) ---
+        board += SOW_DELTA[pit_index, seeds]
+        p1_seeds, p2_seeds = _SOW_SIDE_SEEDS[pit_index][seeds]
+        totals[0] += p1_seeds
+        totals[1] += p2_seeds
+        self._nonempty |= _SOW_TOUCHED[pit_index][seeds]
+        self._board_key = (self._board_key + _SOW_KEY[pit_index][seeds]) & KEY_MASK
+
+        if SOW_AUTO_CAPTURE[pit_index, seeds]:
+            # ≥14 seeds: the last seed is captured straight into the score
+            scores[current_player] += 1
+            self.current_player = opponent
+            self._post_move_checks(current_player, opponent, cleared)
+            return True
 
         # --- Capture Logic ("La Prise") ---
-        was_auto_capture = original_seeds >= 14 and (original_seeds - 13) % 7 == 1
-        
-        if not was_auto_capture:
-            owner_of_last = self.get_pit_owner(current_idx)
-
-            if owner_of_last != current_player and 2 <= board[current_idx] <= 4:
-                # Check it's not opponent's starting pit
-                is_opp_start = (current_player == 0 and current_idx == 7) or \
-                               (current_player == 1 and current_idx == 0)
-
-                if not is_opp_start:
-                    # Build capture chain going backwards
-                    capture_indices = []
-                    check_idx = current_idx
-
-                    while True:
-                        if self.get_pit_owner(check_idx) == current_player:
-                            break
-                        count = board[check_idx]
-                        if 2 <= count <= 4:
-                            capture_indices.append(check_idx)
-                        else:
-                            break
-                        check_idx = (check_idx - 1 + self.TOTAL_PITS) % self.TOTAL_PITS
-
-                    if capture_indices:
-                        # Check starvation protection (Grand Slam)
-                        opp_pits_with_seeds = sum(1 for i in opp_indices if board[i] > 0)
-                        is_grand_slam = (opp_pits_with_seeds == 7 and len(capture_indices) == 7)
-
-                        if not is_grand_slam:
-                            captured = sum(board[i] for i in capture_indices)
-                            for i in capture_indices:
-                                board[i] = 0
-                            scores[current_player] += captured
+        current_idx = int(SOW_LANDING[pit_index, seeds])
+        owner_of_last = self.get_pit_owner(current_idx)
+
+        if owner_of_last != current_player and 2 <= board[current_idx] <= 4:
+            # Check it's not opponent's starting pit
+            if current_idx != opp_start:
+                # Build capture chain going backwards
+                capture_indices = []
+                check_idx = current_idx
+
+                while True:
+                    if self.get_pit_owner(check_idx) == current_player:
+                        break
+                    count = board[check_idx]
+                    if 2 <= count <= 4:
+                        capture_indices.append(check_idx)
+                    else:
+                        break
+                    check_idx = (check_idx - 1 + self.TOTAL_PITS) % self.TOTAL_PITS
+
+                if capture_indices:
+                    # Check starvation protection (Grand Slam)
+                    opp_bits = SIDE_BITS[opponent]
+                    all_opp_pits_filled = (self._nonempty & opp_bits) == opp_bits
+                    is_grand_slam = (all_opp_pits_filled and len(capture_indices) == 7)
+
+                    if not is_grand_slam:
+                        captured = 0
+                        for i in capture_indices:
+                            count = int(board[i])
+                            cleared.append((i, count))
+                            captured += count
+                            board[i] = 0
+                            self._nonempty &= ~(1 << i)
+                            self._board_key -= count * _PIT_KEY[i]
+                        self._board_key &= KEY_MASK
+                        totals[opponent] -= captured
+                        scores[current_player] += captured
 
         # --- End Turn ---
-        self._post_move_checks(current_player, opponent)
+        self._post_move_checks(current_player, opponent, cleared)
+        return True
 
-    def _post_move_checks(self, current_player: int, opponent: int):
-        """Post-move checks: solidarity, starvation, win condition."""
-        board = self.board
-        scores = self.scores
-
-        opp_indices = self.get_player_indices(opponent)
-        opp_seeds = sum(board[i] for i in opp_indices)
+    def _post_move_checks(self, current_player: int, opponent: int,
+                          cleared: Optional[List[Tuple[int, int]]] = None):
+        """
+        Post-move checks: solidarity, starvation, win condition.
+        Pits emptied by end-of-game sweeps are logged to `cleared` if given.
+        """
+        totals = self._totals()
+        opp_seeds = totals[opponent]
 
         # Solidarity check
         if self.solidarity_mode or opp_seeds == 0:
-            fed = any(board[i] > 0 for i in opp_indices)
+            fed = opp_seeds > 0
             if fed:
                 self.solidarity_mode = False
                 self.solidarity_beneficiary = None
             else:
                 # Opponent still empty → game ends, current player collects all
-                my_indices = self.get_player_indices(current_player)
-                remaining = sum(board[i] for i in my_indices)
-                for i in my_indices:
-                    board[i] = 0
-                scores[current_player] += remaining
+                self._sweep_side(current_player, cleared)
                 self._check_win_condition(force_end=True)
                 return
 
         # Check if next player can play
         next_player = opponent
-        next_indices = self.get_player_indices(next_player)
-        next_seeds = sum(board[i] for i in next_indices)
+        next_seeds = totals[next_player]
 
         if next_seeds == 0:
             # Next player has no seeds → game ends
-            my_indices = self.get_player_indices(current_player)
-            remaining = sum(board[i] for i in my_indices)
-            for i in my_indices:
-                board[i] = 0
-            scores[current_player] += remaining
+            self._sweep_side(current_player, cleared)
             self._check_win_condition(force_end=True)
             return
 
@@ -325,22 +661,48 @@ class SongoGame:
         valid = self.get_valid_moves()
         if len(valid) == 0:
             # Stalemate → each player collects their remaining seeds
-            self._resolve_stalemate()
+            self._resolve_stalemate(cleared)
             return
 
         self._check_win_condition()
 
         # Safety: max game length
         if self.move_count >= self.config.max_game_length:
-            self._resolve_stalemate()
-
-    def _resolve_stalemate(self):
+            self._resolve_stalemate(cleared)
+
+    def _sweep_side(self, player: int, cleared: Optional[List[Tuple[int, int]]]):
+        """Move every seed on `player`'s side into their score."""
+        board = self._board
+        start = self.get_player_start(player)
+        totals = self._totals()
+        board_key = self._board_key
+        for i in range(start, start + 7):
+            count = int(board[i])
+            if count > 0:
+                if cleared is not None:
+                    cleared.append((i, count))
+                board_key -= count * _PIT_KEY[i]
+            board[i] = 0
+        self._board_key = board_key & KEY_MASK
+        self.scores[player] += totals[player]
+        totals[player] = 0
+        self._nonempty &= ~SIDE_BITS[player]
+        self._legal = None
+
+    def _resolve_stalemate(self, cleared: Optional[List[Tuple[int, int]]] = None):
         """Resolve when no valid moves: each player collects their remaining seeds."""
+        board = self._board
         for i in range(self.TOTAL_PITS):
-            if self.board[i] > 0:
+            if board[i] > 0:
+                if cleared is not None:
+                    cleared.append((i, int(board[i])))
                 owner = self.get_pit_owner(i)
-                self.scores[owner] += self.board[i]
-                self.board[i] = 0
+                self.scores[owner] += board[i]
+                board[i] = 0
+        self._side_totals = [0, 0]
+        self._nonempty = 0
+        self._board_key = 0
+        self._legal = None
         
         self.is_terminal = True
         if self.scores[0] > 35:
@@ -482,21 +844,21 @@ class SongoGame:
         state[16] = 1.0 if (self.solidarity_mode and self.solidarity_beneficiary == op) else 0.0
         state[17] = (self.scores[cp] - self.scores[op]) / 70.0
 
-        cp_seeds = sum(board[cp_start + i] for i in range(7))
-        op_seeds = sum(board[op_start + i] for i in range(7))
+        totals = self._totals()
+        cp_seeds = totals[cp]
+        op_seeds = totals[op]
         state[18] = cp_seeds / 70.0
         state[19] = op_seeds / 70.0
         state[20] = (cp_seeds + op_seeds) / 70.0
-        state[21] = sum(1 for i in range(7) if board[cp_start + i] > 0) / 7.0
-        state[22] = sum(1 for i in range(7) if board[op_start + i] > 0) / 7.0
+        state[21] = bin(self._nonempty & SIDE_BITS[cp]).count("1") / 7.0
+        state[22] = bin(self._nonempty & SIDE_BITS[op]).count("1") / 7.0
 
         reach_seeds = 0
         for i in range(7):
             idx = cp_start + i
             s = board[idx]
             if s > 0:
-                last_drop = (idx + s) % 14
-                if self.get_pit_owner(last_drop) != cp or s >= 14:
+                if s >= 14 or self.get_pit_owner(SOW_LANDING[idx, s]) != cp:
                     reach_seeds += s
         state[23] = reach_seeds / 70.0
 
@@ -523,7 +885,7 @@ class SongoGame:
                     my_bidoua += s  # Grenier = liberté maximale
                     my_threat_count += 1
                 else:
-                    last_pos = (cp_start + i + s) % 14
+                    last_pos = int(SOW_LANDING[cp_start + i, s])
                     if self.get_pit_owner(last_pos) == op:
                         post = board[last_pos] + 1
                         if 2 <= post <= 4:
@@ -540,7 +902,7 @@ class SongoGame:
                     op_bidoua += t
                     op_threat_count += 1
                 else:
-                    last_pos = (op_start + i + t) % 14
+                    last_pos = int(SOW_LANDING[op_start + i, t])
                     if self.get_pit_owner(last_pos) == cp:
                         post = board[last_pos] + 1
                         if 2 <= post <= 4:
@@ -582,7 +944,7 @@ class SongoGame:
             idx = cp_start + i
             s = board[idx]
             if 0 < s < 14:
-                last_pos = (idx + s) % 14
+                last_pos = int(SOW_LANDING[idx, s])
                 if self.get_pit_owner(last_pos) == op:
                     post_count = board[last_pos] + 1
                     if 2 <= post_count <= 4:
@@ -621,6 +983,8 @@ class SongoGame:
         # Landing positions [64-70] — direct answer to the book's affine equations.
         # For each of my 7 pits, where does the last seed land? Normalized to [0, 1].
         # 0 means empty pit (no move possible from there).
+        # Kept as the book's (pit + seeds) % 14 rather than SOW_LANDING: for
+        # ≥14 seeds the two differ, and trained v2 networks expect this form.
         for i in range(7):
             s = board[cp_start + i]
             if s > 0:
@@ -683,3 +1047,149 @@ class SongoGame:
             f"Move: {self.move_count} | "
             f"Terminal: {self.is_terminal}"
         )
+
+
+(SOW_DELTA, SOW_LANDING, SOW_AUTO_CAPTURE, SOW_FEEDS,
+ _SOW_SIDE_SEEDS, _SOW_TOUCHED) = _build_sowing_tables()
+(_PIT_KEY_ARRAY, _SOW_KEY, _SCORE_KEY,
+ _SIDE_KEY, _SOLIDARITY_KEY) = _build_key_tables()
+_PIT_KEY = [int(k) for k in _PIT_KEY_ARRAY]
+
+
+# =============================================================================
+# Batched state encoding
+# =============================================================================
+
+def encode_states_batch(boards: np.ndarray, scores: np.ndarray, cp: np.ndarray,
+                        sm: np.ndarray, sb: np.ndarray) -> np.ndarray:
+    """
+    Vectorized `SongoGame.encode_state` for N positions → (N, 80) float32.
+
+    Args (absolute coordinates, like SongoBatch):
+        boards : (N, 14) pits
+        scores : (N, 2)
+        cp     : (N,) side to move
+        sm     : (N,) solidarity mode
+        sb     : (N,) solidarity beneficiary, NO_BENEFICIARY (or any value
+                 other than 0/1) for None
+    """
+    boards = np.asarray(boards, dtype=np.int64).reshape(-1, SongoGame.TOTAL_PITS)
+    scores = np.asarray(scores, dtype=np.int64).reshape(-1, 2)
+    cp = np.asarray(cp, dtype=np.int64).reshape(-1)
+    sm = np.asarray(sm, dtype=bool).reshape(-1)
+    sb = np.asarray(sb, dtype=np.int64).reshape(-1)
+    n = boards.shape[0]
+    rows = np.arange(n)[:, None]
+    rel = np.arange(7)
+    op = 1 - cp
+
+    # Features are computed in float64 (like the scalar encoder's Python
+    # floats) and rounded to float32 once at the end.
+    state = np.zeros((n, 80), dtype=np.float64)
+
+    my_idx = cp[:, None] * 7 + rel            # absolute pits, canonical order
+    op_idx = op[:, None] * 7 + rel
+    my = boards[rows, my_idx]
+    opp = boards[rows, op_idx]
+    my_score = scores[np.arange(n), cp]
+    op_score = scores[np.arange(n), op]
+
+    # ── Base features [0-27] ─────────────────────────────────────────────────
+    state[:, 0:7] = my / 70.0
+    state[:, 7:14] = opp / 70.0
+    state[:, 14] = my_score / 70.0
+    state[:, 15] = op_score / 70.0
+    state[:, 16] = sm & (sb == op)
+    state[:, 17] = (my_score - op_score) / 70.0
+    my_total = my.sum(axis=1)
+    op_total = opp.sum(axis=1)
+    state[:, 18] = my_total / 70.0
+    state[:, 19] = op_total / 70.0
+    state[:, 20] = (my_total + op_total) / 70.0
+    state[:, 21] = (my > 0).sum(axis=1) / 7.0
+    state[:, 22] = (opp > 0).sum(axis=1) / 7.0
+
+    # Landing pits from the sowing table (-1 for empty pits)
+    seeds_cap = np.minimum(boards, MAX_SEEDS)
+    my_land = SOW_LANDING[my_idx, seeds_cap[rows, my_idx]].astype(np.int64)
+    op_land = SOW_LANDING[op_idx, seeds_cap[rows, op_idx]].astype(np.int64)
+    my_land_owner = (my_land >= 7).astype(np.int64)
+    op_land_owner = (op_land >= 7).astype(np.int64)
+
+    reach = (my > 0) & ((my >= 14) | (my_land_owner != cp[:, None]))
+    state[:, 23] = (my * reach).sum(axis=1) / 70.0
+    state[:, 24] = sm & (sb == cp)
+    state[:, 25] = (scores[:, 0] + scores[:, 1]) / 70.0
+    state[:, 26] = boards.max(axis=1) / 70.0
+    state[:, 27] = (my >= 14).any(axis=1)
+
+    # ── Bidoua + menace double [28-31] ───────────────────────────────────────
+    def bidoua_and_threats(seeds, land, land_owner, target):
+        small = (seeds > 0) & (seeds < 14)
+        post = boards[rows, np.maximum(land, 0)] + 1
+        small_threat = small & (land_owner == target[:, None]) & (post >= 2) & (post <= 4)
+        threats = (seeds >= 14) | small_threat
+        bidoua = (seeds * ((seeds > 0) & ~small_threat)).sum(axis=1)
+        return bidoua, threats.sum(axis=1), small_threat, post
+
+    my_bidoua, my_threats, my_small_threat, my_post = bidoua_and_threats(
+        my, my_land, my_land_owner, op)
+    op_bidoua, op_threats, _, _ = bidoua_and_threats(
+        opp, op_land, op_land_owner, cp)
+    state[:, 28] = my_bidoua / 70.0
+    state[:, 29] = my_threats >= 2
+    state[:, 30] = op_bidoua / 70.0
+    state[:, 31] = op_threats >= 2
+
+    # ── Zone features [32-37] ────────────────────────────────────────────────
+    my_tete, my_pivot, my_membres = my[:, 0:3].sum(axis=1), my[:, 3], my[:, 4:7].sum(axis=1)
+    op_tete, op_pivot, op_membres = opp[:, 0:3].sum(axis=1), opp[:, 3], opp[:, 4:7].sum(axis=1)
+    state[:, 32] = my_tete / 21.0
+    state[:, 33] = my_pivot / 14.0
+    state[:, 34] = my_membres / 21.0
+    state[:, 35] = op_tete / 21.0
+    state[:, 36] = op_pivot / 14.0
+    state[:, 37] = op_membres / 21.0
+
+    # ── Maison proximity [38-44] ─────────────────────────────────────────────
+    state[:, 38:45] = np.minimum(my, 14) / 14.0
+
+    # ── Capture potential [45-51] ────────────────────────────────────────────
+    # chain_before[:, q] = seeds in the run of capturable (2-4) opponent pits
+    # ending just before relative opponent pit q (0 when pit q-1 breaks it).
+    capturable = (opp >= 2) & (opp <= 4)
+    chain_before = np.zeros((n, 8), dtype=np.int64)
+    for q in range(7):
+        chain_before[:, q + 1] = np.where(capturable[:, q], chain_before[:, q] + opp[:, q], 0)
+    land_rel = np.clip(my_land - op[:, None] * 7, 0, 6)
+    total_cap = my_post + chain_before[rows, land_rel]
+    state[:, 45:52] = np.where(my_small_threat, np.minimum(total_cap, 14) / 14.0, 0.0)
+    state[:, 45:52][my >= 14] = 1.0
+
+    # ── Vulnerability [52-57] ────────────────────────────────────────────────
+    my_exposed = (my >= 2) & (my <= 4)
+    state[:, 52] = my_exposed[:, 0:3].sum(axis=1) / 3.0
+    state[:, 53] = my_exposed[:, 3]
+    state[:, 54] = my_exposed[:, 4:7].sum(axis=1) / 3.0
+    state[:, 55] = capturable[:, 0:3].sum(axis=1) / 3.0
+    state[:, 56] = capturable[:, 3]
+    state[:, 57] = capturable[:, 4:7].sum(axis=1) / 3.0
+
+    # ── Strategic balance [58-62] ────────────────────────────────────────────
+    state[:, 58] = (opp >= 14).sum(axis=1) / 7.0
+    state[:, 59] = np.minimum(my, 14).max(axis=1) / 14.0
+    state[:, 60] = np.minimum(opp, 14).max(axis=1) / 14.0
+    state[:, 61] = (my_tete - op_tete) / 21.0
+    state[:, 62] = (my_membres - op_membres) / 21.0
+
+    # ── v2 book features [64-76] ─────────────────────────────────────────────
+    # Landing [64-70] keeps the book's (pit + seeds) % 14 form, see encode_state
+    state[:, 64:71] = np.where(my > 0, ((my_idx + my) % 14 + 1) / 14.0, 0.0)
+    state[:, 71] = (my == 5).sum(axis=1) / 7.0
+    state[:, 72] = (opp == 5).sum(axis=1) / 7.0
+    state[:, 73] = (my == 14).sum(axis=1) / 7.0
+    state[:, 74] = (opp == 14).sum(axis=1) / 7.0
+    state[:, 75] = (my >= 19).sum(axis=1) / 7.0
+    state[:, 76] = (opp >= 19).sum(axis=1) / 7.0
+
+    return state.astype(np.float32)
@@ -26,7 +26,8 @@ def _make_tiny_model(device: str):
 
 
 @pytest.mark.skipif(not TORCH_OK, reason="torch unavailable")
-def test_arena_identical_models_roughly_balanced():
+@pytest.mark.parametrize("root_search", ["puct", "gumbel"])
+def test_arena_identical_models_roughly_balanced(root_search):
     """Two copies of the same network should produce near-50% results."""
     import torch
     from arena_v3 import ArenaConfig, pit
@@ -39,7 +40,8 @@ def test_arena_identical_models_roughly_balanced():
     model_b.eval()
 
     cfg = ArenaConfig(num_games=6, num_simulations=8, verbose=False,
-                      max_game_plies=50, win_threshold=0.55)
+                      max_game_plies=50, win_threshold=0.55,
+                      root_search=root_search)
     res = pit(model, model_b, device, cfg)
     assert res.games == 6
     assert res.wins_a + res.wins_b + res.draws == 6
@@ -0,0 +1,121 @@
+"""
+Endgame tablebase probing: rank.rs ranking, AKGTB01 layer files, and
+tablebase-solved leaves in v3 self-play search.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from egtb_probe import (EgtbProbe, MAGIC, board_count, position_count,
+                        rank_boards, rank_positions)
+from songo_game import SongoGame
+
+
+def _compositions(n: int, parts: int):
+    """Compositions of n into `parts` parts, in lex order."""
+    if parts == 1:
+        yield (n,)
+        return
+    for first in range(n + 1):
+        for rest in _compositions(n - first, parts - 1):
+            yield (first,) + rest
+
+
+def _write_layer(directory, n: int, payload: np.ndarray):
+    header = MAGIC + bytes([n, 0]) + bytes(6) + len(payload).to_bytes(8, "little")
+    (directory / f"egtb-n{n}.bin").write_bytes(header + payload.astype(np.uint8).tobytes())
+
+
+def _layer_payload(n: int) -> np.ndarray:
+    """Win / loss / draw cycling over the ranks, with some unset cells."""
+    payload = np.arange(position_count(n)) % 4
+    return payload.astype(np.uint8)
+
+
+def _endgame() -> SongoGame:
+    game = SongoGame()
+    game.board = np.array([1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1], dtype=np.int32)
+    game.scores = np.array([34, 32], dtype=np.int32)
+    game.invalidate_caches()
+    return game
+
+
+def test_rank_matches_lex_order():
+    assert board_count(5) == 8568
+    for n in (0, 1, 3):
+        boards = np.array(list(_compositions(n, 14)))
+        assert len(boards) == board_count(n)
+        assert np.array_equal(rank_boards(boards), np.arange(len(boards)))
+    # Position rank: board, then P1 score, player, solidarity (rank.rs)
+    board = np.array(list(_compositions(2, 14))[7])
+    idx = rank_positions(board, [40, 28], 1, True, 1)
+    assert idx[0] == ((7 * 69 + 40) * 2 + 1) * 3 + 2
+    assert rank_positions(board, [40, 28], 1, True, -1)[0] == ((7 * 69 + 40) * 2 + 1) * 3
+
+
+def test_probe_reads_memory_mapped_layers(tmp_path):
+    for n in (2, 4):
+        _write_layer(tmp_path, n, _layer_payload(n))
+    (tmp_path / "egtb-n9.bin").write_bytes(b"not a layer")
+    egtb = EgtbProbe(tmp_path, max_n=4)
+    assert sorted(egtb.layers) == [2, 4] and egtb.max_n == 4
+    assert isinstance(egtb.layers[4], np.memmap)
+
+    game = _endgame()
+    idx = rank_positions(game.board, game.scores, 0, False, -1)[0]
+    expected = [None, 1.0, -1.0, 0.0][idx % 4]
+    assert egtb.probe(game) == expected
+    assert egtb.probe(SongoGame()) is None          # 70 seeds: no layer
+
+    boards = np.stack([game.board, game.board, SongoGame().board])
+    values = egtb.probe_arrays(boards, [game.scores, game.scores, [0, 0]],
+                               [0, 1, 0], [False] * 3, [-1] * 3)
+    idx1 = rank_positions(game.board, game.scores, 1, False, -1)[0]
+    expected1 = [np.nan, 1.0, -1.0, 0.0][idx1 % 4]
+    assert np.allclose(values, [np.nan if expected is None else expected, expected1, np.nan],
+                       equal_nan=True)
+
+    with pytest.raises(ValueError, match="magic"):
+        EgtbProbe(tmp_path)
+    (tmp_path / "egtb-n9.bin").unlink()
+    _write_layer(tmp_path, 3, np.zeros(10))
+    with pytest.raises(ValueError, match="expected"):
+        EgtbProbe(tmp_path)
+
+
+def test_search_backs_up_tablebase_values(tmp_path):
+    torch = pytest.importorskip("torch")
+    from network_v3 import SongoNetV3, NetworkV3Config
+    from self_play_v3 import SelfPlayEngine, MctsConfig, ROOT
+
+    for n in range(5):
+        _write_layer(tmp_path, n, np.ones(position_count(n)))    # mover wins
+    torch.manual_seed(0)
+    model = SongoNetV3(NetworkV3Config(num_blocks=1, filters=16))
+    cfg = MctsConfig(num_simulations=32, leaf_batch_size=8, egtb_dir=str(tmp_path))
+    engine = SelfPlayEngine(model, "cpu", cfg)
+    forwards = []
+    nn_eval_batch = engine._nn_eval_batch
+    engine._nn_eval_batch = lambda xs: forwards.append(len(xs)) or nn_eval_batch(xs)
+
+    game = _endgame()
+    tree = engine.tree
+    engine._expand(tree, ROOT, game)       # the root itself is always searched
+    assert not tree.is_terminal(ROOT)
+    engine._run_batched_sims(tree, game, cfg.num_simulations)
+    assert forwards == []
+    children = tree.first_child[ROOT] + np.flatnonzero(tree.legal[ROOT])
+    for child in children:
+        # Every reply is a win for the opponent: exact values, no expansion
+        assert tree.is_terminal(child) and tree.terminal_value[child] == 1.0
+    assert tree.q(ROOT) == pytest.approx(-1.0, abs=0.05)
+
+    # A solved leaf that becomes the root is searched, not played as over
+    rel = int(np.flatnonzero(tree.legal[ROOT])[0])
+    tree.reroot(tree.child(ROOT, rel))
+    game.execute_move(rel)
+    assert engine._start_search(tree, game, 1, np.random.default_rng(0)) is not None
+    assert tree.is_expanded(ROOT) and not tree.is_terminal(ROOT)
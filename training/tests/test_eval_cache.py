@@ -0,0 +1,61 @@
+"""
+Evaluation cache: LRU order, model versions, and cache-only-misses
+batching in v3 self-play search.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from eval_cache import EvalCache
+
+
+def test_lru_eviction_and_versions():
+    cache = EvalCache(max_entries=3)
+    p = np.full(7, 1 / 7)
+    for key in (1, 2, 3):
+        cache.put(0, key, p, 0.1 * key)
+    assert cache.get(0, 1)[1] == pytest.approx(0.1)   # 1 becomes most recent
+    cache.put(0, 4, p, 0.4)                              # evicts 2, the LRU
+    assert cache.get(0, 2) is None
+    assert (0, 1) in cache and (0, 3) in cache and (0, 4) in cache
+    assert cache.get(1, 1) is None                       # other model version
+
+    cache.put(1, 1, p, -0.5)
+    cache.retire(0)
+    assert len(cache) == 1 and cache.get(1, 1)[1] == -0.5
+    st = cache.stats()
+    assert st["cache_hits"] == 2 and st["cache_misses"] == 2
+    assert st["cache_evictions"] == 2
+
+
+def test_repeated_search_is_served_from_cache():
+    torch = pytest.importorskip("torch")
+    from network_v3 import SongoNetV3, NetworkV3Config
+    from self_play_v3 import SelfPlayEngine, MctsConfig, ROOT
+    from songo_game import SongoGame
+
+    torch.manual_seed(0)
+    model = SongoNetV3(NetworkV3Config(num_blocks=1, filters=16))
+    cfg = MctsConfig(num_simulations=64, leaf_batch_size=8, eval_cache_entries=10_000)
+    engine = SelfPlayEngine(model, "cpu", cfg)
+    forwards = []
+    nn_eval_batch = engine._nn_eval_batch
+    engine._nn_eval_batch = lambda xs: forwards.append(len(xs)) or nn_eval_batch(xs)
+
+    game = SongoGame()
+    evaluated = []
+    for _ in range(2):
+        forwards.clear()
+        engine.tree.reset()
+        engine._expand(engine.tree, ROOT, game)
+        engine._run_batched_sims(engine.tree, game, cfg.num_simulations)
+        assert engine.tree.child_visits(ROOT).sum() == cfg.num_simulations
+        evaluated.append(sum(forwards))
+    # Cache hits are resolved without the network, so the second search
+    # only evaluates the few positions the first one never reached.
+    assert evaluated[0] > 0
+    assert evaluated[1] < evaluated[0] / 4
+    assert engine.eval_cache.hits >= evaluated[0] - evaluated[1]
@@ -0,0 +1,85 @@
+"""
+Inference server: answers match the model, and multi-process self-play
+runs its workers' leaves through shared batches.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from inference_server import InferenceServer
+from network_v3 import SongoNetV3, NetworkV3Config
+
+
+class _DyingNet(SongoNetV3):
+    """Dies on its third forward pass, by exiting the process outright
+    (as the OOM killer would) or by raising."""
+
+    def __init__(self, how: str):
+        super().__init__(NetworkV3Config(num_blocks=1, filters=16))
+        self.how = how
+        self.forwards = 0
+
+    def forward(self, x):
+        self.forwards += 1
+        if self.forwards == 3:
+            if self.how == "exit":
+                os._exit(1)
+            raise RuntimeError("CUDA error: out of memory")
+        return super().forward(x)
+
+
+def test_server_matches_direct_forward():
+    torch.manual_seed(0)
+    model = SongoNetV3(NetworkV3Config(num_blocks=1, filters=16)).eval()
+    x = np.random.default_rng(0).random((10, 16, 2, 7), dtype=np.float32)
+    with torch.no_grad():
+        out = model(torch.from_numpy(x))
+    expected_p = torch.softmax(out["policy"], dim=1).numpy()
+    expected_v = out["value"].reshape(-1).numpy()
+
+    server = InferenceServer(model, input_shape=(16, 2, 7), num_clients=2, max_leaves=4)
+    a, b = server.start()
+    try:
+        p, v = a.evaluate(x)                  # 3 chunks through a 2-slot ring
+        np.testing.assert_allclose(p, expected_p, atol=1e-5)
+        np.testing.assert_allclose(v, expected_v, atol=1e-5)
+        b.submit(x[:3])
+        b.submit(x[3:5])
+        with pytest.raises(RuntimeError):
+            b.submit(x[:1])                   # ring full
+        np.testing.assert_allclose(b.result(3)[1], expected_v[:3], atol=1e-5)
+        np.testing.assert_allclose(b.result(2)[0], expected_p[3:5], atol=1e-5)
+    finally:
+        a.close()
+        b.close()
+        server.stop()
+    assert server.stats["leaves"] == 15
+
+
+def test_generate_parallel_v3():
+    from self_play_v3 import MctsConfig, generate_parallel
+
+    torch.manual_seed(0)
+    model = SongoNetV3(NetworkV3Config(num_blocks=1, filters=16))
+    cfg = MctsConfig(num_simulations=16, max_game_plies=6, leaf_batch_size=8)
+    games, stats = generate_parallel(model, cfg, num_games=3, num_workers=2,
+                                     parallel_games=2)
+    assert len(games) == 3 and all(len(g) == 6 for g in games)
+    assert all(abs(r["policy"].sum() - 1.0) < 1e-4 for g in games for r in g)
+    assert stats["sims"] + stats["sims_reused"] == 3 * 6 * 16
+    assert stats["forwards"] > 0 and stats["mean_batch"] > 0
+
+
+@pytest.mark.parametrize("how", ["exit", "raise"])
+def test_dead_server_fails_the_run(how):
+    from self_play_v3 import MctsConfig, generate_parallel
+
+    torch.manual_seed(0)
+    cfg = MctsConfig(num_simulations=16, max_game_plies=6, leaf_batch_size=8)
+    with pytest.raises(RuntimeError, match="inference server"):
+        generate_parallel(_DyingNet(how), cfg, num_games=2, num_workers=2)
@@ -0,0 +1,141 @@
+"""
+v2 batched MCTS: virtual loss spreads a leaf batch, colliding selections
+share one evaluation, and every visit is accounted for after backup.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from config import MCTSConfig, NetworkConfig
+from mcts import MCTS, MCTSNode
+from neural_network import SongoNet
+from songo_game import SongoGame
+
+
+def _walk(node):
+    yield node
+    for child in node.children.values():
+        yield from _walk(child)
+
+
+@pytest.mark.parametrize("transpositions", [0, 4096])
+def test_batched_search_backs_up_every_selection(transpositions, monkeypatch):
+    torch.manual_seed(0)
+    np.random.seed(0)
+    config = MCTSConfig(num_simulations=96, transposition_entries=transpositions)
+    engine = MCTS(SongoNet(NetworkConfig(hidden_size=64, num_res_blocks=1)), config,
+                  batch_size=16, use_symmetry=False)
+    # The search tree is local to `search`; keep the first node created
+    nodes = []
+    init = MCTSNode.__init__
+    monkeypatch.setattr(MCTSNode, "__init__",
+                        lambda self, *args, **kw: nodes.append(self) or init(self, *args, **kw))
+    probs = engine.search(SongoGame(), add_noise=False)
+    root = nodes[0]
+
+    assert probs.sum() == pytest.approx(1.0)
+    assert root.visit_count == 1 + config.num_simulations
+    for node in _walk(root):
+        # Virtual loss fully removed: values stay within [-visits, visits]
+        assert abs(node.value_sum) <= node.visit_count + 1e-6
+        if node.children:
+            assert sum(c.visit_count for c in node.children.values()) <= node.visit_count
+    # Virtual loss pushes the batch onto different leaves
+    assert engine.stats["slots"] == config.num_simulations
+    assert engine.wasted_slot_fraction() < 0.25
+    if engine.table is not None:
+        assert engine.table.visits[root.row] == root.visit_count
+
+
+def test_children_are_created_on_first_selection(monkeypatch):
+    node = MCTSNode()
+    node.expand(np.array([0.1, 0.4, 0.1, 0.1, 0.2, 0.05, 0.05]),
+                np.array([1, 1, 0, 1, 1, 0, 0], dtype=np.float32))
+    assert node.is_expanded and node.children == {}
+    assert [a for a, _ in node.edges] == [0, 1, 3, 4]
+    assert sum(p for _, p in node.edges) == pytest.approx(1.0)
+
+    node.visit_count = 1
+    best = node.select_child(c_puct=1.5)
+    assert best.action == 1 and best.parent is node
+    assert list(node.children) == [1]
+    assert node.select_child(c_puct=1.5) is best      # no second node
+    best.visit_count, best.value_sum = 4, 4.0           # now bad for the parent
+    node.visit_count = 5
+    assert node.select_child(c_puct=1.5).action == 4
+    assert sorted(node.children) == [1, 4]
+
+    # A seeded search matches eager expansion (a child per legal move up
+    # front), while creating far fewer nodes.
+    def search(eager):
+        torch.manual_seed(0)
+        np.random.seed(0)
+        engine = MCTS(SongoNet(NetworkConfig(hidden_size=64, num_res_blocks=1)),
+                      MCTSConfig(num_simulations=64), batch_size=8, use_symmetry=False)
+        created = []
+        init, expand = MCTSNode.__init__, MCTSNode.expand
+
+        def eager_expand(self, *args):
+            expand(self, *args)
+            if eager:
+                self.children = {a: MCTSNode(self, a, p) for a, p in self.edges}
+
+        with monkeypatch.context() as m:
+            m.setattr(MCTSNode, "__init__",
+                      lambda self, *a, **kw: created.append(self) or init(self, *a, **kw))
+            m.setattr(MCTSNode, "expand", eager_expand)
+            probs = engine.search(SongoGame(), add_noise=False)
+        root = created[0]
+        visits = sum(c.visit_count for c in root.children.values())
+        return probs, visits, len(created)
+
+    lazy_probs, lazy_visits, lazy_nodes = search(eager=False)
+    eager_probs, eager_visits, eager_nodes = search(eager=True)
+    np.testing.assert_array_equal(lazy_probs, eager_probs)
+    assert lazy_visits == eager_visits == 64
+    assert lazy_nodes < eager_nodes / 2
+
+
+def test_symmetry_modes_cost_and_orientation():
+    from mcts import mirror_encoded_states
+
+    torch.manual_seed(0)
+    np.random.seed(0)
+    model = SongoNet(NetworkConfig(hidden_size=64, num_res_blocks=1)).eval()
+    evaluated = []
+    model.register_forward_hook(lambda m, inp, out: evaluated.append(len(inp[0])))
+
+    def cost(mode):
+        engine = MCTS(model, MCTSConfig(num_simulations=48, symmetry=mode), batch_size=16)
+        evaluated.clear()
+        engine.search(SongoGame(), add_noise=False)
+        return evaluated[0], sum(evaluated[1:])      # root, leaves
+
+    root_none, leaves_none = cost("none")
+    assert root_none == 1
+    assert cost("root") == (2, leaves_none)
+    root_all, leaves_all = cost("all")
+    assert root_all == 2 and leaves_all == 2 * leaves_none
+    assert cost("random")[0] == 1
+    with pytest.raises(ValueError):
+        MCTS(model, MCTSConfig(symmetry="both"))
+
+    # A random orientation is un-mirrored: each result matches the plain or
+    # the mirrored evaluation of its state
+    engine = MCTS(model, MCTSConfig(symmetry="random"))
+    states = np.stack([SongoGame().encode_state()] * 32)
+    states[:, :14] *= np.linspace(0.5, 1.5, 32)[:, None]
+    plain = engine._evaluate_batch(states, "none")
+    mirrored = engine._evaluate_batch(mirror_encoded_states(states), "none")
+    flipped = 0
+    for (p, v), (p0, v0), (p1, v1) in zip(engine._evaluate_batch(states), plain, mirrored):
+        if np.allclose(p, p0, atol=1e-5) and v == pytest.approx(v0, abs=1e-5):
+            continue
+        assert np.allclose(p, p1[::-1], atol=1e-5) and v == pytest.approx(v1, abs=1e-5)
+        flipped += 1
+    assert 0 < flipped < 32
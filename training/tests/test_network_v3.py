@@ -21,7 +21,9 @@ except Exception as e:  # pragma: no cover
 
 import numpy as np
 
-from encoding_v3 import StateView, encode, encode_batch, mirror, valid_move_mask, CHANNELS
+from encoding_v3 import (
+    StateView, encode, encode_batch, encode_arrays, mirror, valid_move_mask, CHANNELS,
+)
 
 
 # ─── Encoding tests (numpy-only, no torch) ───────────────────────────────────
@@ -111,6 +113,28 @@ def test_batch_encoding():
     assert t.shape == (3, 16, 2, 7)
 
 
+def test_encode_arrays_matches_per_view_encode():
+    rng = np.random.default_rng(0)
+    views = []
+    for _ in range(64):
+        board = rng.integers(0, 20, size=14).astype(np.int16)
+        board[rng.random(14) < 0.3] = 0
+        views.append(StateView(board=board,
+                               scores=(int(rng.integers(0, 36)), int(rng.integers(0, 36))),
+                               current_player=int(rng.integers(0, 2)),
+                               solidarity_mode=bool(rng.random() < 0.3)))
+    boards = np.stack([v.board for v in views])
+    scores = np.array([v.scores for v in views])
+    cp = np.array([v.current_player for v in views])
+    sm = np.array([v.solidarity_mode for v in views])
+    expected = np.stack([encode(v) for v in views])
+    np.testing.assert_array_equal(encode_arrays(boards, scores, cp, sm), expected)
+    if TORCH_OK:
+        from encoding_v3 import encode_arrays_torch
+        np.testing.assert_array_equal(
+            encode_arrays_torch(boards, scores, cp, sm).numpy(), expected)
+
+
 def test_mirror_reverses_width_axis():
     v = StateView.initial()
     t = encode(v)
@@ -0,0 +1,60 @@
+"""
+Round-trip tests for the 20-byte PackedState.
+"""
+import pickle
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from songo_game import SongoGame
+from packed_state import PackedState
+from self_play_v3 import state_view_of
+
+
+def _random_games(seed: int, n: int):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        game = SongoGame()
+        for _ in range(int(rng.integers(0, 80))):
+            valid = game.get_valid_moves()
+            if game.is_terminal or len(valid) == 0:
+                break
+            game.execute_move(int(rng.choice(valid)))
+        yield game
+
+
+def test_packed_state_roundtrip_game():
+    for game in _random_games(0, 50):
+        packed = PackedState.from_game(game)
+        assert len(packed.to_bytes()) == PackedState.SIZE == 20
+        back = PackedState.from_bytes(packed.to_bytes()).to_game()
+        assert np.array_equal(back.board, game.board)
+        assert np.array_equal(back.scores, game.scores)
+        assert back.current_player == game.current_player
+        assert back.solidarity_mode == game.solidarity_mode
+        assert back.solidarity_beneficiary == game.solidarity_beneficiary
+        assert back.key() == game.key()
+        assert packed.book_hash() == game.book_hash()
+        assert PackedState.from_int(packed.to_int()) == packed
+
+
+def test_packed_state_roundtrip_view():
+    game = SongoGame()
+    game.execute_move(6)
+    game.solidarity_mode = True
+    game.solidarity_beneficiary = 0
+    view = state_view_of(game)
+    packed = PackedState.from_view(view)
+    assert packed == PackedState.from_game(game)
+    back = packed.to_view()
+    assert np.array_equal(back.board, view.board)
+    assert back.scores == view.scores
+    assert back.current_player == view.current_player
+    assert back.solidarity_mode and back.solidarity_beneficiary == 0
+
+
+def test_packed_state_hash_and_pickle():
+    states = [PackedState.from_game(g) for g in _random_games(1, 20)]
+    assert len(set(states)) == len(set(s.to_bytes() for s in states))
+    assert pickle.loads(pickle.dumps(states)) == states
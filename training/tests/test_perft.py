@@ -0,0 +1,15 @@
+"""
+Perft node counts must match the known totals for every engine variant.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from perft import run_perft, POSITIONS, ENGINES
+
+
+def test_perft_known_totals():
+    report = run_perft(4, list(POSITIONS), list(ENGINES), verbose=False)
+    bad = [r for r in report["results"] if not r["ok"]]
+    assert not bad, f"perft mismatches: {bad}"
+    assert all(r["expected"] is not None for r in report["results"])
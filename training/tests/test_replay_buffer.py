@@ -0,0 +1,76 @@
+"""
+v2 replay buffer: ring-buffer eviction, sampling, memory-mapped
+persistence, and import of pickled buffers.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pickle
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from self_play import ReplayBuffer, stack_samples
+
+
+def _samples(lo: int, hi: int):
+    return [(np.full(80, i, np.float32), np.full(7, i / 7, np.float32), float(i))
+            for i in range(lo, hi)]
+
+
+def test_ring_buffer_keeps_newest_samples():
+    buf = ReplayBuffer(max_size=10, seed=0)
+    buf.add(*stack_samples(_samples(0, 6)))
+    buf.add(*stack_samples([]))
+    buf.add(*stack_samples(_samples(6, 14)))
+    assert len(buf) == 10 and buf.cursor == 4
+    assert sorted(buf.values.tolist()) == list(range(4, 14))
+    # Rows stay aligned across the three arrays
+    assert np.array_equal(buf.states[:, 0], buf.values)
+
+    states, policies, values = buf.sample_batch(6)
+    assert states.shape == (6, 80) and policies.shape == (6, 7) and values.shape == (6,)
+    assert len(set(values.tolist())) == 6
+    assert np.array_equal(states[:, 0], values)
+    assert len(buf.sample_batch(64)[2]) == 10
+
+    big = ReplayBuffer(max_size=4)
+    big.add(*stack_samples(_samples(0, 9)))
+    assert sorted(big.values.tolist()) == [5, 6, 7, 8]
+
+
+def test_memory_mapped_buffer_persists_incrementally(tmp_path):
+    path = str(tmp_path / "replay_buffer")
+    buf = ReplayBuffer(max_size=10, path=path)
+    assert isinstance(buf.states, np.memmap)
+    buf.add(*stack_samples(_samples(0, 6)))
+    buf.flush()
+    buf.add(*stack_samples(_samples(6, 14)))     # not flushed: header still at 6
+    assert len(ReplayBuffer(max_size=10, path=path)) == 6
+    buf.flush()
+
+    reopened = ReplayBuffer(max_size=10, path=path)
+    assert isinstance(reopened.values, np.memmap)
+    assert len(reopened) == 10 and reopened.cursor == 4
+    assert sorted(reopened.values.tolist()) == list(range(4, 14))
+    reopened.add(*stack_samples(_samples(14, 15)))
+    reopened.flush()
+    assert sorted(ReplayBuffer(max_size=10, path=path).values.tolist()) == list(range(5, 15))
+
+    # Reopened at another size: rewritten, newest samples kept
+    smaller = ReplayBuffer(max_size=6, path=path)
+    assert sorted(smaller.values[:len(smaller)].tolist()) == list(range(9, 15))
+    assert len(ReplayBuffer(max_size=6, path=path)) == 6
+
+
+def test_load_pickled_buffer(tmp_path):
+    path = str(tmp_path / "replay_buffer.pkl")
+    with open(path, "wb") as f:
+        pickle.dump({"buffer": _samples(0, 12), "max_size": 20}, f)
+    buf = ReplayBuffer(max_size=10, path=str(tmp_path / "replay_buffer"))
+    assert buf.load(path) and sorted(buf.values.tolist()) == list(range(2, 12))
+    assert len(ReplayBuffer(max_size=10, path=str(tmp_path / "replay_buffer"))) == 10
+    assert not ReplayBuffer().load(str(tmp_path / "missing.pkl"))
@@ -119,3 +119,205 @@ def test_batched_self_play_matches_schema_and_is_faster(tmp_path):
         assert t_batched <= t_serial * 1.3, (
             f"batched slower than serial? serial={t_serial:.2f}s batched={t_batched:.2f}s"
         )
+
+
+@pytest.mark.skipif(not TORCH_OK, reason="torch unavailable")
+def test_mcts_tree_select_and_reset():
+    from self_play_v3 import MctsTree, ROOT
+
+    tree = MctsTree(capacity=8)
+    legal = np.array([1, 1, 0, 1, 1, 1, 1], dtype=bool)
+    tree.expand(ROOT, np.full(7, 1 / 6), legal)
+    assert tree.size == 8 and tree.is_expanded(ROOT)
+    # Child stats are from the child's mover: a high value there is bad for
+    # the root, so selection must avoid it.
+    tree.visits[ROOT] = 10
+    for rel in range(7):
+        child = tree.child(ROOT, rel)
+        tree.visits[child] = 1
+        tree.value_sum[child] = 0.9
+    tree.value_sum[tree.child(ROOT, 4)] = -0.9
+    assert tree.select(ROOT, c_puct=1.5) == 4
+
+    # Growing past capacity keeps existing nodes
+    tree.expand(tree.child(ROOT, 4), np.full(7, 1 / 7), np.ones(7, dtype=bool))
+    assert tree.capacity >= 15 and tree.child_visits(ROOT)[4] == 1
+
+    capacity = tree.capacity
+    tree.reset()
+    assert tree.size == 1 and tree.capacity == capacity
+    assert not tree.is_expanded(ROOT)
+    assert tree.child_visits(ROOT).sum() == 0
+    assert not tree.visits.any() and (tree.first_child == -1).all()
+
+
+@pytest.mark.skipif(not TORCH_OK, reason="torch unavailable")
+def test_mcts_tree_reroot_keeps_subtree():
+    from self_play_v3 import MctsTree, ROOT
+
+    rng = np.random.default_rng(0)
+    tree = MctsTree(capacity=8)
+    # Random tree: expand random unexpanded legal slots, random stats.
+    tree.expand(ROOT, np.full(7, 1 / 7), np.ones(7, dtype=bool))
+    for _ in range(40):
+        node = int(rng.integers(1, tree.size))
+        if tree.first_child[node] < 0 and tree.bias[node] == 0:
+            legal = rng.random(7) < 0.8
+            legal[0] = True
+            tree.expand(node, rng.dirichlet(np.ones(7)), legal)
+    tree.visits[:tree.size] = rng.integers(0, 50, tree.size)
+    tree.value_sum[:tree.size] = rng.normal(size=tree.size)
+
+    def snapshot(node):
+        """Nested (prior, visits, value_sum, children) of a subtree."""
+        fc = tree.first_child[node]
+        kids = [] if fc < 0 else [snapshot(fc + r) for r in range(7)]
+        return (tree.prior[node], tree.visits[node], tree.value_sum[node],
+                tuple(tree.legal[node]), kids)
+
+    new_root = max(range(1, 8), key=lambda n: tree.first_child[n] >= 0)
+    expected = snapshot(new_root)[1:]
+    tree.reroot(new_root)
+    assert snapshot(ROOT)[1:] == expected
+    assert tree.size == 1 + 7 * int((tree.first_child[:tree.size] >= 0).sum())
+    assert not tree.visits[tree.size:].any()
+
+
+@pytest.mark.skipif(not TORCH_OK, reason="torch unavailable")
+def test_lockstep_self_play_shares_forward_passes():
+    from network_v3 import SongoNetV3, NetworkV3Config
+    from self_play_v3 import SelfPlayEngine, MctsConfig
+
+    torch.manual_seed(0)
+    model = SongoNetV3(NetworkV3Config(num_blocks=1, filters=16))
+    cfg = MctsConfig(num_simulations=24, max_game_plies=12, leaf_batch_size=8,
+                     transposition_entries=128)
+    engine = SelfPlayEngine(model, "cpu", cfg)
+    batch_sizes = []
+    nn_eval_batch = engine._nn_eval_batch
+    engine._nn_eval_batch = lambda xs: batch_sizes.append(len(xs)) or nn_eval_batch(xs)
+
+    games = engine.play_games_lockstep(np.random.default_rng(0), num_games=5, parallel=3)
+    assert len(games) == 5 and len(engine.trees) == 3
+    for records in games:
+        assert len(records) == cfg.max_game_plies
+        assert all(abs(r["policy"].sum() - 1.0) < 1e-4 for r in records)
+        assert all(r["value"] == 0.0 for r in records)   # ply cap → draw
+    lockstep = list(batch_sizes)
+
+    batch_sizes.clear()
+    for _ in range(5):
+        engine.play_game_batched(np.random.default_rng(0))
+    # Three trees feed each forward pass: fewer, larger batches.
+    assert max(lockstep) > cfg.leaf_batch_size
+    assert len(lockstep) < len(batch_sizes)
+    assert engine.table_stats()["tt_misses"] > 0
+
+
+@pytest.mark.skipif(not TORCH_OK, reason="torch unavailable")
+def test_gumbel_root_search():
+    from network_v3 import SongoNetV3, NetworkV3Config
+    from self_play_v3 import SelfPlayEngine, MctsConfig, ROOT
+    from songo_game import SongoGame
+
+    torch.manual_seed(0)
+    model = SongoNetV3(NetworkV3Config(num_blocks=1, filters=16))
+    cfg = MctsConfig(num_simulations=28, max_game_plies=10, leaf_batch_size=8,
+                     root_search="gumbel")
+    engine = SelfPlayEngine(model, "cpu", cfg)
+    tree, game = engine.tree, SongoGame()
+    tree.reset()
+    engine._expand(tree, ROOT, game)
+    rel, policy = engine._search(tree, game, cfg.num_simulations, np.random.default_rng(1))
+
+    # 7 legal actions: rounds of 7x1, 4x2, then the last 13 sims on 2 actions
+    visits = tree.child_visits(ROOT)
+    assert visits.sum() == 28
+    assert sorted(visits.tolist()) == [1, 1, 1, 3, 3, 9, 10]
+    assert visits[rel] >= 9
+    assert policy.dtype == np.float32 and abs(policy.sum() - 1.0) < 1e-5
+
+    # Self-play records keep their format; lockstep drives the same search
+    records = engine.play_game_batched(np.random.default_rng(0))
+    assert len(records) == cfg.max_game_plies
+    assert all(r["policy"].shape == (7,) and not r["policy"][~r["move_mask"]].any()
+               for r in records)
+    games = engine.play_games_lockstep(np.random.default_rng(0), num_games=2, parallel=2)
+    assert [len(g) for g in games] == [cfg.max_game_plies] * 2
+
+    with pytest.raises(ValueError):
+        SelfPlayEngine(model, "cpu", MctsConfig(root_search="sampled"))
+
+
+@pytest.mark.skipif(not TORCH_OK, reason="torch unavailable")
+def test_playout_cap_randomization(tmp_path):
+    from network_v3 import SongoNetV3, NetworkV3Config
+    from self_play_v3 import SelfPlayEngine, MctsConfig, records_to_npz
+    from distillation import EgtbDataset
+
+    torch.manual_seed(0)
+    model = SongoNetV3(NetworkV3Config(num_blocks=1, filters=16))
+    cfg = MctsConfig(num_simulations=40, fast_simulations=8, full_search_prob=0.25,
+                     max_game_plies=40, leaf_batch_size=8, reuse_tree=False,
+                     early_stop=False)
+    engine = SelfPlayEngine(model, "cpu", cfg)
+    records = engine.play_game_batched(np.random.default_rng(3))
+    full = [r for r in records if r["full_search"]]
+    assert 0 < len(full) < len(records)
+    assert engine.stats["sims"] == 40 * len(full) + 8 * (len(records) - len(full))
+
+    # Only full-search plies become training samples
+    assert records_to_npz(records, tmp_path / "sp.npz") == len(full)
+    ds = EgtbDataset(tmp_path / "sp.npz")
+    assert len(ds) == len(full)
+    np.testing.assert_allclose(ds.policy, np.stack([r["policy"] for r in full]))
+
+    # Serial play follows the same schedule
+    records = engine.play_game(np.random.default_rng(3))
+    assert 0 < sum(r["full_search"] for r in records) < len(records)
+
+
+@pytest.mark.skipif(not TORCH_OK, reason="torch unavailable")
+def test_early_stop_and_forced_moves():
+    from network_v3 import SongoNetV3, NetworkV3Config
+    from self_play_v3 import SelfPlayEngine, MctsConfig, ROOT
+    from songo_game import SongoGame
+
+    torch.manual_seed(0)
+    model = SongoNetV3(NetworkV3Config(num_blocks=1, filters=16))
+    cfg = MctsConfig(num_simulations=64, leaf_batch_size=8, reuse_tree=False)
+    engine = SelfPlayEngine(model, "cpu", cfg)
+    tree, game, rng = engine.tree, SongoGame(), np.random.default_rng(0)
+
+    # Leader 30 visits ahead: settled with ≤ 29 sims left, not with 30
+    tree.reset()
+    tree.expand(ROOT, np.full(7, 1 / 7), np.ones(7, dtype=bool))
+    tree.visits[tree.first_child[ROOT] + np.arange(7)] = [2, 32, 0, 0, 0, 0, 0]
+    assert engine._root_decided(tree, 29) and not engine._root_decided(tree, 30)
+    engine.stats["sims"] = 29
+    assert list(engine._puct_steps(tree, 29, stop_early=True)) == []
+    assert engine.stats["sims"] == 0 and engine.stats["sims_saved"] == 29
+    assert len(list(engine._puct_steps(tree, 29, stop_early=False))) == 4
+
+    # A fast (move-picking) search stops once its leader is out of reach
+    tree.reset()
+    engine._expand(tree, ROOT, game)
+    tree.prior[tree.first_child[ROOT] + np.arange(7)] = [0.01] * 6 + [0.94]
+    engine.stats.update(sims=0, sims_saved=0)
+    engine._search(tree, game, engine._search_budget(tree, 400), rng, stop_early=True)
+    run = engine.stats["sims"]
+    assert run < 400 and run + engine.stats["sims_saved"] == 400
+    assert tree.child_visits(ROOT).sum() == run
+
+    # Forced move: no search at all, one-hot policy target
+    tree.reset()
+    legal = np.zeros(7, dtype=bool)
+    legal[4] = True
+    tree.expand(ROOT, legal.astype(np.float32), legal)
+    engine.stats.update(sims=0, sims_saved=0)
+    assert engine._start_search(tree, game, 0, rng) == (0, True)
+    assert engine.stats == {"sims": 0, "sims_reused": 0, "sims_saved": 64}
+    records = []
+    engine._play_searched_move(tree, game, 0, records, rng)
+    assert records[0]["policy"].tolist() == legal.astype(np.float32).tolist()
+    assert game.current_player == 1
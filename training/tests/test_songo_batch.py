@@ -0,0 +1,115 @@
+"""
+Parity tests for the vectorized batch engine.
+
+SongoBatch must be bit-exact with SongoGame: same legal moves, and the same
+board / scores / flags / terminal state after every move, on random games
+and on random (seed-heavy) positions.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from songo_game import SongoGame
+from songo_batch import SongoBatch, NO_WINNER, NO_BENEFICIARY
+
+
+def _assert_same(batch: SongoBatch, i: int, game: SongoGame, ctx: str):
+    assert np.array_equal(batch.board[i], game.board), f"{ctx}: board {batch.board[i]} vs {game.board}"
+    assert np.array_equal(batch.scores[i], game.scores), f"{ctx}: scores"
+    assert batch.current_player[i] == game.current_player, f"{ctx}: current_player"
+    assert batch.is_terminal[i] == game.is_terminal, f"{ctx}: is_terminal"
+    expected_winner = NO_WINNER if game.winner is None else game.winner
+    assert batch.winner[i] == expected_winner, f"{ctx}: winner"
+    assert batch.solidarity_mode[i] == game.solidarity_mode, f"{ctx}: solidarity_mode"
+    expected_sb = NO_BENEFICIARY if game.solidarity_beneficiary is None else game.solidarity_beneficiary
+    assert batch.solidarity_beneficiary[i] == expected_sb, f"{ctx}: solidarity_beneficiary"
+    assert batch.move_count[i] == game.move_count, f"{ctx}: move_count"
+
+
+def _random_position(rng: np.random.Generator) -> SongoGame:
+    """Random legal-looking position, biased toward big (≥14) pits."""
+    game = SongoGame()
+    in_play = int(rng.integers(1, 71))
+    weights = rng.dirichlet(np.full(14, 0.3))
+    game.board = rng.multinomial(in_play, weights).astype(np.int32)
+    s0 = int(rng.integers(0, 70 - in_play + 1))
+    game.scores = np.array([s0, 70 - in_play - s0], dtype=np.int32)
+    game.current_player = int(rng.integers(0, 2))
+    if rng.random() < 0.2:
+        game.solidarity_mode = True
+        game.solidarity_beneficiary = 1 - game.current_player
+    game.move_count = int(rng.integers(0, 300))
+    return game
+
+
+def _lockstep(games: list, rng: np.random.Generator, max_plies: int = 400):
+    batch = SongoBatch.from_games(games)
+    for ply in range(max_plies):
+        mask = batch.valid_moves_mask()
+        actions = np.full(len(games), -1, dtype=np.int64)
+        for i, game in enumerate(games):
+            ctx = f"game {i} ply {ply}"
+            assert np.array_equal(mask[i], game.get_valid_moves_mask() > 0), \
+                f"{ctx}: mask {mask[i]} vs {game.get_valid_moves_mask()}"
+            legal = np.flatnonzero(mask[i])
+            if game.is_terminal or legal.size == 0:
+                continue
+            actions[i] = rng.choice(legal)
+            game.execute_move(game.action_to_pit_index(int(actions[i])))
+        if (actions < 0).all():
+            break
+        batch.execute_moves(actions)
+        for i, game in enumerate(games):
+            _assert_same(batch, i, game, f"game {i} ply {ply}")
+
+
+def test_batch_initial_state():
+    batch = SongoBatch.initial(3)
+    for i in range(3):
+        _assert_same(batch, i, SongoGame(), "initial")
+    assert batch.valid_moves_mask().all()
+
+
+def test_batch_parity_random_games():
+    rng = np.random.default_rng(7)
+    games = [SongoGame() for _ in range(64)]
+    _lockstep(games, rng)
+    assert all(g.is_terminal for g in games)
+
+
+def test_batch_parity_random_positions():
+    rng = np.random.default_rng(11)
+    games = [_random_position(rng) for _ in range(256)]
+    _lockstep(games, rng, max_plies=60)
+
+
+def test_batch_roundtrip_to_game():
+    rng = np.random.default_rng(3)
+    games = [_random_position(rng) for _ in range(8)]
+    batch = SongoBatch.from_games(games)
+    for i, game in enumerate(games):
+        back = batch.to_game(i)
+        _assert_same(SongoBatch.from_games([back]), 0, game, f"roundtrip {i}")
+
+
+def test_batch_play_random_conserves_seeds():
+    batch = SongoBatch.initial(512)
+    batch.play_random(np.random.default_rng(0))
+    assert batch.is_terminal.all()
+    assert (batch.winner != NO_WINNER).all()
+    totals = batch.board.sum(axis=1) + batch.scores.sum(axis=1)
+    assert (totals == 70).all()
+
+
+def test_batch_grand_slam_protection():
+    game = SongoGame()
+    game.board = np.zeros(14, dtype=np.int32)
+    game.board[6] = 7          # lands on pit 13, every opponent pit ends at 2
+    game.board[0] = 3
+    game.board[7:14] = 1
+    batch = SongoBatch.from_games([game])
+    game.execute_move(6)
+    batch.execute_moves(np.array([6]))
+    _assert_same(batch, 0, game, "grand slam")
+    assert game.scores[0] == 0, "Grand Slam must not capture"
@@ -7,7 +7,10 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import numpy as np
-from songo_game import SongoGame
+from songo_game import (
+    SongoGame, SOW_DELTA, SOW_LANDING, SOW_AUTO_CAPTURE, SOW_FEEDS, fnv1a_64,
+    encode_states_batch,
+)
 
 
 def test_initial_state():
@@ -214,6 +217,31 @@ def test_encode_state():
     print("✓ test_encode_state")
 
 
+def test_encode_states_batch():
+    """Test that the vectorized encoder matches encode_state exactly."""
+    rng = np.random.default_rng(17)
+    games = []
+    for _ in range(60):
+        game = SongoGame()
+        while not game.is_terminal:
+            games.append(game.clone())
+            valid = game.get_valid_moves()
+            if len(valid) == 0:
+                break
+            game.execute_move(int(rng.choice(valid)))
+    boards = np.stack([g.board for g in games])
+    scores = np.stack([g.scores for g in games])
+    cp = np.array([g.current_player for g in games])
+    sm = np.array([g.solidarity_mode for g in games])
+    sb = np.array([-1 if g.solidarity_beneficiary is None else g.solidarity_beneficiary
+                   for g in games])
+    batch = encode_states_batch(boards, scores, cp, sm, sb)
+    expected = np.stack([g.encode_state() for g in games])
+    assert batch.shape == (len(games), 80) and batch.dtype == np.float32
+    assert np.array_equal(batch, expected)
+    print("✓ test_encode_states_batch")
+
+
 def test_valid_moves_mask():
     """Test valid moves mask."""
     game = SongoGame()
@@ -264,6 +292,150 @@ def test_many_random_games():
     print("✓ test_many_random_games (100 games, all seeds conserved)")
 
 
+def test_sowing_tables():
+    """Test precomputed sowing tables on small and lapping (≥14) moves."""
+    # 5 seeds from pit 4 → pits 5..9, last seed on the opponent's pit 9
+    assert list(np.flatnonzero(SOW_DELTA[4, 5])) == [5, 6, 7, 8, 9]
+    assert SOW_LANDING[4, 5] == 9
+    assert SOW_FEEDS[4, 5, 1] and SOW_FEEDS[4, 5, 0]
+    assert not SOW_FEEDS[0, 3, 1], "3 seeds from pit 0 stay home"
+
+    # 18 seeds from pit 2: 13 around the board, 5 more on pits 7..11
+    delta = SOW_DELTA[2, 18]
+    assert delta[2] == 0, "The played pit is skipped"
+    assert delta.sum() == 18
+    assert list(delta[7:14]) == [2, 2, 2, 2, 2, 1, 1]
+    assert SOW_LANDING[2, 18] == 11
+    assert not SOW_AUTO_CAPTURE[2, 18]
+
+    # 21 seeds: remainder 8 ≡ 1 (mod 7) → the last seed is auto-captured
+    assert SOW_AUTO_CAPTURE[9, 21]
+    assert SOW_DELTA[9, 21].sum() == 20
+    assert SOW_LANDING[9, 21] == -1
+    print("✓ test_sowing_tables")
+
+
+def test_incremental_totals_and_legal_cache():
+    """Test side totals / non-empty bitmask tracking and legal-move caching."""
+    rng = np.random.default_rng(5)
+    for _ in range(30):
+        game = SongoGame()
+        while not game.is_terminal:
+            for player in (0, 1):
+                side = game.board[7 * player:7 * player + 7]
+                assert game.side_seeds(player) == side.sum()
+            expected_bits = sum(1 << i for i in range(14) if game.board[i] > 0)
+            assert game.nonempty_pits == expected_bits
+            valid = game.get_valid_moves()
+            assert game.get_valid_moves() is valid, "Legal moves should be cached"
+            if len(valid) == 0:
+                break
+            game.execute_move(int(rng.choice(valid)))
+
+    # In-place edits need an explicit invalidation
+    game = SongoGame()
+    game.get_valid_moves()
+    game.board[0] = 0
+    game.invalidate_caches()
+    assert 0 not in game.get_valid_moves()
+    assert game.side_seeds(0) == 30
+    print("✓ test_incremental_totals_and_legal_cache")
+
+
+def test_position_key():
+    """Test incremental keys, the packed form and the book hash."""
+    assert fnv1a_64(b"") == 0xcbf29ce484222325
+    assert fnv1a_64(b"a") == 0xaf63dc4c8601ec8c
+
+    rng = np.random.default_rng(9)
+    for _ in range(30):
+        game = SongoGame()
+        while not game.is_terminal:
+            fresh = game.clone()
+            fresh.invalidate_caches()
+            assert game.key() == fresh.key(), "Incremental key drifted"
+            back = SongoGame.from_key(game.packed_key())
+            assert back.packed_key() == game.packed_key()
+            assert back.key() == game.key()
+            valid = game.get_valid_moves()
+            if len(valid) == 0:
+                break
+            game.execute_move(int(rng.choice(valid)))
+
+    game = SongoGame()
+    other = game.clone()
+    other.current_player = 1
+    assert other.key() != game.key()
+    assert other.book_hash() != game.book_hash()
+    other = game.clone()
+    other.solidarity_mode = True
+    other.solidarity_beneficiary = 0
+    assert other.key() != game.key()
+    assert other.packed_key()[18] == 0b011
+
+    key = game.key()
+    record = game.execute_move_undoable(3)
+    assert game.key() != key
+    game.undo_move(record)
+    assert game.key() == key
+    print("✓ test_position_key")
+
+
+def _snapshot(game):
+    return (game.board.tolist(), game.scores.tolist(), game.current_player,
+            game.is_terminal, game.winner, game.solidarity_mode,
+            game.solidarity_beneficiary, game.move_count)
+
+
+def test_all_successors():
+    """Test that all_successors matches clone + execute_move per child."""
+    rng = np.random.default_rng(13)
+    for _ in range(20):
+        game = SongoGame()
+        while not game.is_terminal:
+            before = _snapshot(game)
+            succ = game.all_successors()
+            assert _snapshot(game) == before, "Parent must be left untouched"
+            assert np.array_equal(succ.mask, game.get_valid_moves_mask() > 0)
+            for a in np.flatnonzero(succ.mask):
+                child = game.clone()
+                child.execute_move(game.action_to_pit_index(int(a)))
+                assert np.array_equal(succ.board[a], child.board)
+                assert np.array_equal(succ.scores[a], child.scores)
+                assert succ.current_player[a] == child.current_player
+                assert succ.solidarity_mode[a] == child.solidarity_mode
+                assert succ.is_terminal[a] == child.is_terminal
+                assert succ.winner[a] == (-2 if child.winner is None else child.winner)
+                assert succ.keys[a] == child.key()
+            valid = game.get_valid_moves()
+            if len(valid) == 0:
+                break
+            game.execute_move(int(rng.choice(valid)))
+    print("✓ test_all_successors")
+
+
+def test_undo_move_roundtrip():
+    """Make/unmake: undo_move restores the exact pre-move state, every move."""
+    rng = np.random.default_rng(5)
+    for _ in range(50):
+        game = SongoGame()
+        while not game.is_terminal:
+            valid = game.get_valid_moves()
+            if len(valid) == 0:
+                break
+            before = _snapshot(game)
+            for pit_index in valid:
+                record = game.execute_move_undoable(int(pit_index))
+                game.undo_move(record)
+                assert _snapshot(game) == before, f"undo of pit {pit_index} diverged"
+            pit_index = int(rng.choice(valid))
+            reference = game.clone()
+            reference.execute_move(pit_index)
+            game.execute_move_undoable(pit_index)
+            assert _snapshot(game) == _snapshot(reference)
+    print("✓ test_undo_move_roundtrip")
+
+
 if __name__ == "__main__":
     print("=" * 50)
     print("  Songo Game Engine Tests")
@@ -282,9 +454,15 @@ if __name__ == "__main__":
     test_game_end_by_score()
     test_clone()
     test_encode_state()
+    test_encode_states_batch()
     test_valid_moves_mask()
     test_full_game()
     test_many_random_games()
+    test_sowing_tables()
+    test_incremental_totals_and_legal_cache()
+    test_position_key()
+    test_undo_move_roundtrip()
+    test_all_successors()
     
     print("\n" + "=" * 50)
     print("  All tests passed! ✓")
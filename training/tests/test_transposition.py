@@ -0,0 +1,116 @@
+"""
+Transposition table: row sharing, LRU eviction at search boundaries, and
+transposition-aware v3 search.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from songo_game import SongoGame
+from transposition import TranspositionTable
+
+
+def test_transposed_positions_share_a_row():
+    table = TranspositionTable(max_entries=64)
+    a, b = SongoGame(), SongoGame()
+    # Two move orders reaching the same position
+    for pit in (0, 10, 1, 11, 3):
+        a.execute_move(pit)
+    for pit in (0, 11, 1, 10, 3):
+        b.execute_move(pit)
+    assert a.packed_key() == b.packed_key()
+    row = table.link(a.key())
+    assert row > 0 and table.link(b.key()) == row
+    assert table.link(SongoGame().key()) != row
+
+    assert table.lookup(row) is None
+    prior = np.full(7, 1 / 7, dtype=np.float32)
+    table.store(row, prior, np.ones(7, dtype=bool), 0.25)
+    cached_prior, legal, value = table.lookup(row)
+    assert np.array_equal(cached_prior, prior) and legal.all() and value == 0.25
+    # Storing an evaluation found elsewhere (e.g. an eval-cache hit) is no miss
+    table.store(table.link(SongoGame().key()), prior, np.ones(7, dtype=bool), 0.0)
+    assert table.stats()["tt_hits"] == 1 and table.stats()["tt_misses"] == 1
+
+
+def test_eviction_is_lru_and_spares_protected_rows():
+    table = TranspositionTable(max_entries=4, capacity=2)
+    old = [table.link(k) for k in (1, 2, 3)]
+    table.visits[old] = [5, 1, 3]
+    table.new_search()
+    recent = [table.link(k) for k in (4, 5, 6)]
+    # Over the cap by 2: evict the oldest rows, fewest visits first,
+    # but never a protected one.
+    table.new_search(protect=np.array([old[1]]))
+    assert len(table) == 4
+    assert 2 in table and 1 not in table and 3 not in table
+    assert all(k in table for k in (4, 5, 6))
+    assert table.stats()["tt_evictions"] == 2
+    # Freed rows are recycled, zeroed
+    row = table.link(7)
+    assert row in (old[0], old[2])
+    assert table.visits[row] == 0 and not table.evaluated[row]
+
+    table.clear()
+    assert len(table) == 0
+
+
+def test_self_play_with_transposition_table():
+    torch = pytest.importorskip("torch")
+    from network_v3 import SongoNetV3, NetworkV3Config
+    from self_play_v3 import SelfPlayEngine, MctsConfig, ROOT
+
+    torch.manual_seed(0)
+    model = SongoNetV3(NetworkV3Config(num_blocks=1, filters=16))
+    cfg = MctsConfig(num_simulations=48, max_game_plies=30, leaf_batch_size=8,
+                     transposition_entries=256)
+    engine = SelfPlayEngine(model, "cpu", cfg)
+    records = engine.play_game_batched(np.random.default_rng(0))
+    assert records and all(abs(r["policy"].sum() - 1.0) < 1e-4 for r in records)
+    table = engine.tree.table
+    assert table.stats()["tt_misses"] > 0
+    assert table.evictions > 0 and len(table) <= table.max_entries + engine.tree.size
+
+    # Every live tree node on a searched path is linked to a table row whose
+    # visits cover the tree's own (edge) visits through it.
+    tree = engine.tree
+    game = SongoGame()
+    tree.reset()
+    engine._expand(tree, ROOT, game)
+    for _ in range(32):
+        engine._simulate(tree, game)
+    linked = np.flatnonzero(tree.row[:tree.size])
+    assert tree.row[ROOT] > 0
+    assert (table.visits[tree.row[linked]] >= tree.visits[linked]).all()
+
+
+def test_backup_counts_a_repeated_position_once():
+    pytest.importorskip("torch")
+    from self_play_v3 import MctsTree, ROOT
+
+    table = TranspositionTable(max_entries=64)
+    tree = MctsTree(table=table)
+    legal = np.ones(7, dtype=bool)
+    tree.expand(ROOT, np.full(7, 1 / 7), legal)
+    child = tree.child(ROOT, 0)
+    tree.expand(child, np.full(7, 1 / 7), legal)
+    grandchild = tree.child(child, 2)
+    # The grandchild repeats the root position
+    tree.link(ROOT, 1)
+    tree.link(child, 2)
+    tree.link(grandchild, 1)
+
+    path = [ROOT, child, grandchild]
+    for _ in range(3):
+        for node in path:
+            tree.add_virtual_loss(node, 1.0)
+        tree.backup(path, 0.5, 1.0)
+    repeated, other = tree.row[ROOT], tree.row[child]
+    # One visit per simulation, valued as at the occurrence nearest the leaf
+    assert table.visits[repeated] == 3 and table.value_sum[repeated] == pytest.approx(1.5)
+    assert table.visits[other] == 3 and table.value_sum[other] == pytest.approx(-1.5)
+    assert np.array_equal(tree.visits[path], [3, 3, 3])
+    assert np.allclose(tree.value_sum[path], [1.5, -1.5, 1.5])
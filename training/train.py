@@ -35,7 +35,7 @@ if sys.platform == 'win32' and not isinstance(sys.stdout, io.TextIOWrapper):
 
 from config import AlphaZeroConfig, MCTSConfig, NetworkConfig
 from neural_network import SongoNet, create_network
-from self_play import generate_self_play_data, ReplayBuffer
+from self_play import generate_self_play_data, ReplayBuffer, stack_samples
 from pit_evaluation import play_pit_game
 from mcts import MCTS
 
@@ -268,8 +268,6 @@ def train(config: AlphaZeroConfig = None, resume_from: str = None):
         gamma=config.training.lr_scheduler_gamma
     )
 
-    replay_buffer = ReplayBuffer(max_size=config.training.replay_buffer_size)
-
     # ── Paths ────────────────────────────────────────────────────────────
     checkpoint_dir = Path(config.training.checkpoint_dir)
     checkpoint_dir.mkdir(parents=True, exist_ok=True)
@@ -277,15 +275,21 @@ def train(config: AlphaZeroConfig = None, resume_from: str = None):
     champion_path = checkpoint_dir / "model_champion.pt"
     champion_backup_path = checkpoint_dir / "model_champion_prev.pt"
     latest_path = checkpoint_dir / "model_latest.pt"
-    replay_buffer_path = checkpoint_dir / "replay_buffer.pkl"
+    replay_buffer_path = checkpoint_dir / "replay_buffer"
+    legacy_buffer_path = checkpoint_dir / "replay_buffer.pkl"
 
     # ── Resume ───────────────────────────────────────────────────────────
     start_iteration = 0
     if resume_from and os.path.exists(resume_from):
         start_iteration = load_checkpoint(model, optimizer, resume_from) + 1
 
-    # ── Load persisted replay buffer ─────────────────────────────────────
-    replay_buffer.load(str(replay_buffer_path))
+    # ── Persistent replay buffer (memory-mapped, appended every iteration)
+    replay_buffer = ReplayBuffer(max_size=config.training.replay_buffer_size,
+                                 state_size=config.network.input_size,
+                                 path=str(replay_buffer_path))
+    if len(replay_buffer) == 0:
+        # One-time import of a buffer pickled by earlier versions
+        replay_buffer.load(str(legacy_buffer_path))
 
     # ── Champion state (in memory) ───────────────────────────────────────
     champion_state = {k: v.cpu().clone() for k, v in model.state_dict().items()}
@@ -311,6 +315,8 @@ def train(config: AlphaZeroConfig = None, resume_from: str = None):
     print(f"  MCTS batch:      {mcts_batch_size} leaves/inference")
     print(f"  Symmetry:        ON (mirror augmentation)")
     sp_mode = f"{num_workers} CPU workers (parallel)" if num_workers > 1 else f"GPU single-process"
+    if num_workers > 1 and config.training.inference_server:
+        sp_mode += f" + inference server on {device}"
     print(f"  Self-play:       {sp_mode}")
     print(f"  Train batch:     {config.training.batch_size}")
     print(f"  Learning rate:   {config.training.learning_rate}")
@@ -348,8 +354,10 @@ def train(config: AlphaZeroConfig = None, resume_from: str = None):
             network_config=config.network,
             batch_size=mcts_batch_size,
             use_symmetry=True,
+            inference_server=config.training.inference_server,
         )
-        replay_buffer.add(samples)
+        replay_buffer.add(*stack_samples(samples))
+        replay_buffer.flush()
 
         sp_time = time.time() - t0
         print(f"[Self-Play] {sp_time:.0f}s | {len(samples)} samples | "
@@ -472,7 +480,7 @@ def train(config: AlphaZeroConfig = None, resume_from: str = None):
             del champion_model
 
         # ═════════════════════════════════════════════════════════════════
-        # Save latest checkpoint + replay buffer (always)
+        # Save latest checkpoint (always)
         # ═════════════════════════════════════════════════════════════════
         save_checkpoint(
             model, optimizer, iteration,
@@ -480,17 +488,10 @@ def train(config: AlphaZeroConfig = None, resume_from: str = None):
             str(latest_path)
         )
 
-        # Persist replay buffer every 5 iterations (avoid I/O overhead)
-        if (iteration + 1) % 5 == 0 or iteration == start_iteration:
-            replay_buffer.save(str(replay_buffer_path))
-
         iter_time = time.time() - iter_start
         print(f"\n[Iteration {iteration + 1}] Total: {iter_time:.0f}s "
               f"(self-play: {sp_time:.0f}s, train: {train_time:.0f}s)")
 
-    # ── Final save ────────────────────────────────────────────────────────
-    replay_buffer.save(str(replay_buffer_path))
-
     print(f"\n{'=' * 60}")
     print(f"  Training Complete!")
     print(f"{'=' * 60}")
@@ -525,6 +526,10 @@ if __name__ == "__main__":
                         help="Learning rate override")
     parser.add_argument("--batch-size", type=int, default=None,
                         help="MCTS batch size (leaves per inference, default: 16)")
+    parser.add_argument("--inference-server", action="store_true",
+                        help="Workers search only; one process runs the network in large batches")
+    parser.add_argument("--symmetry",   choices=("none", "root", "random", "all"), default=None,
+                        help="MCTS mirror ensembling (default: all)")
     parser.add_argument("--quick",      action="store_true",
                         help="Quick test (3 iterations, 10 games, 50 sims)")
     args = parser.parse_args()
@@ -553,5 +558,9 @@ if __name__ == "__main__":
         config.training.learning_rate = args.lr
     if args.batch_size:
         config.training.mcts_batch_size = args.batch_size
+    if args.inference_server:
+        config.training.inference_server = True
+    if args.symmetry:
+        config.mcts.symmetry = args.symmetry
 
     train(config, resume_from=args.resume)
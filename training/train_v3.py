@@ -43,9 +43,10 @@ from torch.utils.data import ConcatDataset, DataLoader, WeightedRandomSampler
 
 from arena_v3 import ArenaConfig, load_model, pit
 from distillation import EgtbDataset, describe
+from eval_cache import EvalCache
 from network_v3 import SongoNetV3, NetworkV3Config
 from pretrain_from_egtb import compute_losses, PretrainConfig, evaluate
-from self_play_v3 import MctsConfig, SelfPlayEngine, records_to_npz
+from self_play_v3 import MctsConfig, SelfPlayEngine, generate_parallel, records_to_npz
 
 
 @dataclass
@@ -58,6 +59,17 @@ class TrainV3Config:
     selfplay_games: int = 40
     selfplay_sims: int = 120
     selfplay_buffer_iters: int = 5   # keep the most recent N iterations of self-play
+    selfplay_parallel_games: int = 8  # games searched in lockstep (1 = one at a time)
+    selfplay_workers: int = 0         # search processes behind an inference server (0 = in-process)
+    # Playout-cap randomization: full `selfplay_sims` search (and a training
+    # sample) on this fraction of plies, `selfplay_fast_sims` elsewhere.
+    selfplay_full_search_prob: float = 1.0
+    selfplay_fast_sims: int = 25
+    # Champion evaluations cached across games and iterations (0 = off);
+    # dropped whenever a new champion is promoted.
+    eval_cache_entries: int = 200_000
+    # Uncompressed endgame tablebase layers probed at self-play leaves
+    egtb_dir: str | None = None
 
     epochs_per_iter: int = 3
     batch_size: int = 512
@@ -68,6 +80,9 @@ class TrainV3Config:
     arena_games: int = 30
     arena_sims: int = 100
     arena_temperature_plies: int = 6  # stochastic opening for arena diversity
+    # Root search for self-play and arena: "puct" or "gumbel" (sequential
+    # halving, meant for low budgets such as 16-32 sims).
+    root_search: str = "puct"
     win_threshold: float = 0.55
     alpha: float = 0.05
 
@@ -95,8 +110,10 @@ def load_model_cfg(path: Path, device: str) -> SongoNetV3:
     return load_model(str(path), device)
 
 
-def run_selfplay(model: SongoNetV3, cfg: TrainV3Config, out_path: Path):
-    """Generate self-play samples with the given model."""
+def run_selfplay(model: SongoNetV3, cfg: TrainV3Config, out_path: Path,
+                 eval_cache: EvalCache | None = None, model_version: int = 0):
+    """Generate self-play samples with the given model. `eval_cache` entries
+    are keyed by `model_version`, which must change with the weights."""
     mcfg = MctsConfig(
         num_simulations=cfg.selfplay_sims,
         dirichlet_alpha=0.5,
@@ -104,23 +121,53 @@ def run_selfplay(model: SongoNetV3, cfg: TrainV3Config, out_path: Path):
         temperature_start=1.0,
         temperature_end=0.1,
         temperature_threshold=15,
-        # Batched MCTS: 15-25x speedup vs serial on GPU
-        leaf_batch_size=64,
+        # Batched MCTS: 15-25x speedup vs serial on GPU. In lockstep every
+        # running game contributes its leaves to the same forward pass, so
+        # each tree can use a smaller batch (less virtual-loss distortion).
+        leaf_batch_size=64 if cfg.selfplay_parallel_games <= 1 else 16,
         virtual_loss=1.0,
+        root_search=cfg.root_search,
+        full_search_prob=cfg.selfplay_full_search_prob,
+        fast_simulations=cfg.selfplay_fast_sims,
+        egtb_dir=cfg.egtb_dir,
+        # Only used by self-play workers; in-process search gets `eval_cache`
+        eval_cache_entries=cfg.eval_cache_entries,
     )
-    engine = SelfPlayEngine(model, cfg.device, mcfg)
+    engine = SelfPlayEngine(model, cfg.device, mcfg,
+                            eval_cache=eval_cache, model_version=model_version)
     rng = np.random.default_rng(cfg.seed)
     all_records: list[dict] = []
     t0 = time.time()
-    for g in range(cfg.selfplay_games):
-        recs = engine.play_game_batched(rng)
+    if cfg.selfplay_workers > 1:
+        # Each worker builds its own `eval_cache_entries` cache for this
+        # call; the shared `eval_cache` stays in this process, unused.
+        played, stats = generate_parallel(model, mcfg, cfg.selfplay_games,
+                                          cfg.selfplay_workers, device=cfg.device,
+                                          seed=cfg.seed,
+                                          parallel_games=cfg.selfplay_parallel_games)
+        games = iter(played)
+        engine.stats.update({k: stats[k] for k in engine.stats})
+        print(f"  inference server: {stats['forwards']} forwards, "
+              f"mean batch {stats['mean_batch']:.1f}")
+    elif cfg.selfplay_parallel_games > 1:
+        games = iter(engine.play_games_lockstep(rng, cfg.selfplay_games,
+                                                cfg.selfplay_parallel_games))
+    else:
+        games = (engine.play_game_batched(rng) for _ in range(cfg.selfplay_games))
+    for g, recs in enumerate(games):
         all_records.extend(recs)
         if (g + 1) % max(1, cfg.selfplay_games // 5) == 0:
             print(f"  self-play {g+1}/{cfg.selfplay_games}  "
-                  f"samples={len(all_records)}  elapsed={time.time()-t0:.1f}s")
-    records_to_npz(all_records, out_path)
-    print(f"  → saved {len(all_records)} samples to {out_path}")
-    return len(all_records)
+                  f"plies={len(all_records)}  elapsed={time.time()-t0:.1f}s")
+    saved = records_to_npz(all_records, out_path)
+    print(f"  → saved {saved} samples ({len(all_records)} plies) to {out_path}  "
+          f"(sims run/reused = {engine.stats['sims']}/{engine.stats['sims_reused']}, "
+          f"saved {engine.stats['sims_saved'] / max(cfg.selfplay_games, 1):.0f}/game)")
+    if eval_cache is not None:
+        st = eval_cache.stats()
+        print(f"  eval cache: {st['cache_hits']} hits / {st['cache_misses']} misses "
+              f"({st['cache_hit_rate']:.1%}), {st['cache_entries']} entries")
+    return saved
 
 
 def build_selfplay_buffer(run_dir: Path, current_iter: int, buffer_iters: int) -> EgtbDataset | None:
@@ -237,6 +284,11 @@ def run_training(cfg: TrainV3Config):
     if egtb_ds:
         print(f"[egtb] {describe(egtb_ds)}")
 
+    # Shared by every self-play run of the current champion; its version
+    # is bumped (and its old entries dropped) on promotion.
+    eval_cache = EvalCache(cfg.eval_cache_entries) if cfg.eval_cache_entries > 0 else None
+    champion_version = 0
+
     global_history = []
     t_global = time.time()
     for it in range(1, cfg.iterations + 1):
@@ -256,7 +308,8 @@ def run_training(cfg: TrainV3Config):
         selfplay_path = iter_dir / "selfplay.npz"
         if not selfplay_path.exists():
             print("[self-play] generating …")
-            run_selfplay(champion_model, cfg, selfplay_path)
+            run_selfplay(champion_model, cfg, selfplay_path,
+                         eval_cache=eval_cache, model_version=champion_version)
         del champion_model  # free GPU mem
 
         # 2) Build mixed dataset
@@ -277,6 +330,8 @@ def run_training(cfg: TrainV3Config):
             num_simulations=cfg.arena_sims,
             temperature_plies=cfg.arena_temperature_plies,
             rng_seed=cfg.seed + it,  # different opening distribution per iter
+            eval_cache_entries=cfg.eval_cache_entries,
+            root_search=cfg.root_search,
             win_threshold=cfg.win_threshold,
             alpha=cfg.alpha,
             verbose=False,
@@ -295,6 +350,9 @@ def run_training(cfg: TrainV3Config):
             shutil.copy2(champion_ckpt, prev_path)
             shutil.copy2(candidate_ckpt, champion_ckpt)
             promoted = True
+            if eval_cache is not None:
+                eval_cache.retire(champion_version)
+            champion_version += 1
             print(f"  PROMOTED. Backup: {prev_path}")
 
         iter_log = {
@@ -305,6 +363,7 @@ def run_training(cfg: TrainV3Config):
             "total_samples_per_epoch": train_info["total_samples_per_epoch"],
             "arena": arena_res.to_dict(),
             "promoted": promoted,
+            "eval_cache": eval_cache.stats() if eval_cache is not None else None,
             "elapsed_sec": round(time.time() - t_global, 2),
         }
         with (iter_dir / "history.json").open("w") as f:
@@ -329,6 +388,19 @@ def main():
     p.add_argument("--selfplay-games", type=int, default=40)
     p.add_argument("--selfplay-sims", type=int, default=120)
     p.add_argument("--buffer-iters", type=int, default=5)
+    p.add_argument("--selfplay-parallel", type=int, default=8,
+                   help="self-play games searched in lockstep (1 = sequential)")
+    p.add_argument("--full-search-prob", type=float, default=1.0,
+                   help="fraction of self-play plies searched fully and recorded "
+                        "(playout-cap randomization; 1 = every ply)")
+    p.add_argument("--fast-sims", type=int, default=25,
+                   help="simulations of the fast, unrecorded plies")
+    p.add_argument("--selfplay-workers", type=int, default=0,
+                   help="self-play search processes sharing one inference server (0 = in-process)")
+    p.add_argument("--eval-cache", type=int, default=200_000,
+                   help="champion evaluation cache size in positions (0 = off)")
+    p.add_argument("--egtb-dir", default=None,
+                   help="directory of uncompressed egtb-n*.bin layers probed at self-play leaves")
     p.add_argument("--epochs", type=int, default=3)
     p.add_argument("--batch", type=int, default=512)
     p.add_argument("--lr", type=float, default=2e-4)
@@ -338,6 +410,8 @@ def main():
     p.add_argument("--arena-temp-plies", type=int, default=6,
                    help="stochastic-opening plies for arena (0 = fully deterministic)")
     p.add_argument("--win-threshold", type=float, default=0.55)
+    p.add_argument("--root-search", choices=("puct", "gumbel"), default="puct",
+                   help="root search for self-play and arena (gumbel suits 16-32 sims)")
     p.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
     p.add_argument("--seed", type=int, default=2026)
     args = p.parse_args()
@@ -350,6 +424,12 @@ def main():
         selfplay_games=args.selfplay_games,
         selfplay_sims=args.selfplay_sims,
         selfplay_buffer_iters=args.buffer_iters,
+        selfplay_parallel_games=args.selfplay_parallel,
+        selfplay_workers=args.selfplay_workers,
+        selfplay_full_search_prob=args.full_search_prob,
+        selfplay_fast_sims=args.fast_sims,
+        eval_cache_entries=args.eval_cache,
+        egtb_dir=args.egtb_dir,
         epochs_per_iter=args.epochs,
         batch_size=args.batch,
         lr=args.lr,
@@ -357,6 +437,7 @@ def main():
         arena_games=args.arena_games,
         arena_sims=args.arena_sims,
         arena_temperature_plies=args.arena_temp_plies,
+        root_search=args.root_search,
         win_threshold=args.win_threshold,
         device=args.device,
         seed=args.seed,
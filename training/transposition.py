@@ -0,0 +1,142 @@
+"""
+Transposition table for MCTS — shared statistics per position.
+
+Different sowing orders often reach the same board and scores, so a search
+tree holds many copies of one position. The table maps a position key
+(`SongoGame.key()`) to a row holding:
+
+    visits, value_sum : simulations through the position and their summed
+                        value, from the perspective of the player to move
+    prior, legal      : cached network policy and legal-move mask, both
+                        (7,) over relative actions
+    value             : cached network value
+    evaluated         : whether prior/legal/value are filled in
+
+Search trees keep their own per-edge visit counts (used for exploration and
+for the visit-count policy) and link each expanded node to its row; Q is
+read from the shared row. Every simulation adds to the rows of the
+positions on its path, once each, so a position's Q averages all the
+simulations that reached it, through whichever parent.
+
+Row 0 is a sentinel that always reads as unvisited; unlinked nodes point at
+it. Rows are never evicted in the middle of a search: `new_search()` first
+drops least-recently-used rows (fewest visits first among equals) until at
+most `max_entries` remain, then starts a new generation. Rows still
+referenced by a kept tree are passed as `protect`.
+"""
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+
+
+class TranspositionTable:
+    """Array-backed position-keyed MCTS statistics with LRU eviction."""
+
+    def __init__(self, max_entries: int, capacity: Optional[int] = None):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be ≥ 1, got {max_entries}")
+        self.max_entries = max_entries
+        self.capacity = 0
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.visits = np.zeros(0)
+        self.value_sum = np.zeros(0)
+        self.prior = np.zeros((0, 7), dtype=np.float32)
+        self.legal = np.zeros((0, 7), dtype=bool)
+        self.value = np.zeros(0, dtype=np.float32)
+        self.evaluated = np.zeros(0, dtype=bool)
+        self.last_used = np.zeros(0, dtype=np.int64)
+        self._grow(1 + min(max_entries, capacity or 4096))
+        self._rows: dict[int, int] = {}
+        self._free: list[int] = []
+        self._next = 1          # rows [1, _next) have been handed out once
+        self.generation = 0
+        self.hits = 0           # evaluations served from the table
+        self.misses = 0         # lookups of positions not evaluated yet
+        self.evictions = 0
+
+    def _grow(self, capacity: int):
+        def grown(arr: np.ndarray) -> np.ndarray:
+            out = np.zeros((capacity,) + arr.shape[1:], dtype=arr.dtype)
+            out[:self.capacity] = arr
+            return out
+        for name in ("keys", "visits", "value_sum", "prior", "legal",
+                     "value", "evaluated", "last_used"):
+            setattr(self, name, grown(getattr(self, name)))
+        self.capacity = capacity
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._rows
+
+    # ─── Rows ─────────────────────────────────────────────────────────────
+
+    def link(self, key: int) -> int:
+        """Row of the position `key`, allocated (unvisited) if new."""
+        row = self._rows.get(key)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                if self._next == self.capacity:
+                    self._grow(2 * self.capacity)
+                row = self._next
+                self._next += 1
+            self._rows[key] = row
+            self.keys[row] = key
+        self.last_used[row] = self.generation
+        return row
+
+    def q(self, row: int) -> float:
+        n = self.visits[row]
+        return 0.0 if n == 0 else float(self.value_sum[row] / n)
+
+    def store(self, row: int, prior: np.ndarray, legal: np.ndarray, value: float):
+        """Cache the network evaluation of the row's position."""
+        self.prior[row] = prior
+        self.legal[row] = legal
+        self.value[row] = value
+        self.evaluated[row] = True
+
+    def lookup(self, row: int) -> Optional[tuple[np.ndarray, np.ndarray, float]]:
+        """Cached (prior, legal, value) of the row, or None."""
+        if not self.evaluated[row]:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.prior[row], self.legal[row], float(self.value[row])
+
+    # ─── Eviction ─────────────────────────────────────────────────────────
+
+    def new_search(self, protect: Optional[np.ndarray] = None):
+        """Evict down to `max_entries` rows, then start a new generation."""
+        if protect is not None and len(protect):
+            self.last_used[protect] = self.generation + 1
+        excess = len(self._rows) - self.max_entries
+        if excess > 0:
+            live = np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+            live = live[self.last_used[live] <= self.generation]
+            order = np.lexsort((self.visits[live], self.last_used[live]))
+            self._evict(live[order[:excess]])
+        self.generation += 1
+
+    def _evict(self, rows: np.ndarray):
+        for row, key in zip(rows.tolist(), self.keys[rows].tolist()):
+            del self._rows[key]
+            self._free.append(row)
+        self.visits[rows] = 0.0
+        self.value_sum[rows] = 0.0
+        self.evaluated[rows] = False
+        self.evictions += len(rows)
+
+    def clear(self):
+        """Drop every row (e.g. after the network changes)."""
+        if self._rows:
+            self._evict(np.fromiter(self._rows.values(), dtype=np.int64,
+                                    count=len(self._rows)))
+
+    def stats(self) -> dict:
+        return {"tt_entries": len(self), "tt_hits": self.hits,
+                "tt_misses": self.misses, "tt_evictions": self.evictions}